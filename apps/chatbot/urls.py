@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import ChatbotView
+from apps.core.asyncviews import async_variant
+from .views import ChatbotView, AsyncChatbotView
 
 urlpatterns = [
-    path('ask/', ChatbotView.as_view(), name='chatbot-ask'),
+    path('ask/', async_variant(ChatbotView, AsyncChatbotView).as_view(), name='chatbot-ask'),
 ]
\ No newline at end of file
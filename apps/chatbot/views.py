@@ -2,6 +2,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny # O IsAuthenticated si requiere login
+from django.http import JsonResponse
+from apps.core.asyncviews import AsyncAPIView
 from .serializers import ChatInputSerializer, ChatResponseSerializer
 import random # Para respuestas de ejemplo
 
@@ -59,4 +61,24 @@ class ChatbotView(APIView):
             output_serializer.is_valid(raise_exception=True) # Debería ser siempre válido
             return Response(output_serializer.data, status=status.HTTP_200_OK)
         else:
-            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncChatbotView(AsyncAPIView):
+    """
+    Variante asíncrona de ChatbotView (ASYNC_VIEWS). Con la integración real,
+    la llamada al proveedor de IA se hará con su cliente asíncrono (await) y
+    el worker seguirá atendiendo otras peticiones mientras responde.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        input_serializer = ChatInputSerializer(data=self.get_data(request))
+        input_serializer.is_valid(raise_exception=True)
+        message = input_serializer.validated_data['message']
+
+        # reply_text = await aget_ai_response(message, session_id=...)
+        reply_text = get_placeholder_ai_response(message)
+
+        output_serializer = ChatResponseSerializer(data={'reply': reply_text})
+        output_serializer.is_valid(raise_exception=True)
+        return JsonResponse(output_serializer.data, status=status.HTTP_200_OK)
@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import ContactMessageCreateView
+from apps.core.asyncviews import async_variant
+from .views import ContactMessageCreateView, AsyncContactMessageCreateView
 # from .views import ContactMessageViewSet # Si añades el ViewSet
 # from rest_framework.routers import DefaultRouter
 
@@ -7,6 +8,6 @@ from .views import ContactMessageCreateView
 # router.register(r'messages', ContactMessageViewSet) # Si usas ViewSet para admins
 
 urlpatterns = [
-    path('send-message/', ContactMessageCreateView.as_view(), name='contact-send'),
+    path('send-message/', async_variant(ContactMessageCreateView, AsyncContactMessageCreateView).as_view(), name='contact-send'),
     # path('admin/', include(router.urls)), # Si usas ViewSet para admins
 ]
\ No newline at end of file
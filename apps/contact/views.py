@@ -1,6 +1,8 @@
-from rest_framework import generics, permissions
-from django.core.mail import send_mail
+from rest_framework import generics, permissions, status
 from django.conf import settings
+from django.http import JsonResponse
+from apps.core.asyncviews import AsyncAPIView
+from apps.mailer.outbox import aqueue_mail, queue_mail
 from .models import ContactMessage
 from .serializers import ContactMessageSerializer
 
@@ -19,9 +21,46 @@ class ContactMessageCreateView(generics.CreateAPIView):
         self.send_notification_email(contact_message)
 
     def send_notification_email(self, contact_message):
-        """Envía un email al correo configurado en settings."""
-        subject = f"Nuevo Mensaje de Contacto: {contact_message.subject}"
-        message_body = f"""
+        """Encola un email al correo configurado en settings (lo entrega send_outbox)."""
+        email = build_notification_email(contact_message)
+        if email is None:
+            print("ADVERTENCIA: No se ha configurado RESTAURANT_CONTACT_EMAIL en .env. No se enviará notificación.")
+            return
+
+        try:
+            queue_mail(**email)
+            print(f"Notificación de contacto encolada para {settings.RESTAURANT_CONTACT_EMAIL}")
+        except Exception as e:
+            print(f"Error al encolar notificación de contacto para {settings.RESTAURANT_CONTACT_EMAIL}: {e}")
+
+
+class AsyncContactMessageCreateView(AsyncAPIView):
+    """Variante asíncrona de ContactMessageCreateView (ASYNC_VIEWS)."""
+
+    async def post(self, request, *args, **kwargs):
+        serializer = ContactMessageSerializer(data=self.get_data(request))
+        serializer.is_valid(raise_exception=True)  # Sin validadores que consulten la base de datos
+        contact_message = await ContactMessage.objects.acreate(**serializer.validated_data)
+        email = build_notification_email(contact_message)
+        if email is None:
+            print("ADVERTENCIA: No se ha configurado RESTAURANT_CONTACT_EMAIL en .env. No se enviará notificación.")
+        else:
+            try:
+                await aqueue_mail(**email)
+                print(f"Notificación de contacto encolada para {settings.RESTAURANT_CONTACT_EMAIL}")
+            except Exception as e:
+                print(f"Error al encolar notificación de contacto para {settings.RESTAURANT_CONTACT_EMAIL}: {e}")
+        return JsonResponse(ContactMessageSerializer(contact_message).data, status=status.HTTP_201_CREATED)
+
+
+def build_notification_email(contact_message):
+    """Argumentos de queue_mail para avisar al restaurante, o None si no hay destinatario configurado."""
+    recipient_email = settings.RESTAURANT_CONTACT_EMAIL
+    if not recipient_email:
+        return None
+
+    subject = f"Nuevo Mensaje de Contacto: {contact_message.subject}"
+    message_body = f"""
 Has recibido un nuevo mensaje de contacto a través del sitio web:
 
 Nombre: {contact_message.name}
@@ -35,23 +74,12 @@ Mensaje:
 
 Fecha: {contact_message.created_at.strftime('%d/%m/%Y %H:%M')}
 """
-        recipient_email = settings.RESTAURANT_CONTACT_EMAIL
-
-        if not recipient_email:
-            print("ADVERTENCIA: No se ha configurado RESTAURANT_CONTACT_EMAIL en .env. No se enviará notificación.")
-            return
-
-        try:
-            send_mail(
-                subject,
-                message_body,
-                settings.DEFAULT_FROM_EMAIL, # Remitente (puede ser el mismo que el de notificaciones)
-                [recipient_email], # Destinatario (el email del restaurante)
-                fail_silently=False,
-            )
-            print(f"Notificación de contacto enviada a {recipient_email}")
-        except Exception as e:
-            print(f"Error al enviar notificación de contacto a {recipient_email}: {e}")
+    return {
+        'subject': subject,
+        'message': message_body,
+        'from_email': settings.DEFAULT_FROM_EMAIL, # Remitente (puede ser el mismo que el de notificaciones)
+        'recipient_list': [recipient_email], # Destinatario (el email del restaurante)
+    }
 
 # Si necesitas listar/ver mensajes (solo para admins), puedes añadir un ViewSet:
 # from rest_framework import viewsets
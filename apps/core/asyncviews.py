@@ -0,0 +1,64 @@
+"""
+Base de las variantes asíncronas de las vistas con E/S (base de datos, PDFs, llamadas externas).
+
+DRF no admite vistas asíncronas, así que son vistas de Django con métodos
+`async def` que reutilizan los serializers de DRF para validar y responden
+con el mismo formato JSON (errores de validación incluidos). Las consultas
+usan el ORM asíncrono (aget, acreate, aupdate...); lo que sigue siendo
+síncrono (validadores que consultan la base de datos, create_user, generar
+un PDF) se ejecuta con sync_to_async.
+
+Solo se enrutan con ASYNC_VIEWS=True, es decir, al servir el proyecto con
+uvicorn (restaurant_backend/asgi.py): bajo WSGI cada petición a una vista
+asíncrona necesitaría su propio bucle de eventos y no ganaría nada.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated, ParseError
+
+from apps.users.authentication import CachedJWTAuthentication
+
+
+def async_variant(sync_view, async_view):
+    """Devuelve la vista que corresponde al modo de despliegue (ver ASYNC_VIEWS)."""
+    return async_view if settings.ASYNC_VIEWS else sync_view
+
+
+class AsyncAPIView(View):
+    """Vista asíncrona con el comportamiento básico de APIView: JSON, JWT y errores de DRF."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Igual que APIView: sin CSRF, la API se autentica con JWT
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+
+    def get_data(self, request):
+        """Cuerpo de la petición: JSON o formulario."""
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError as exc:
+                raise ParseError(f"JSON parse error - {exc}")
+        return request.POST
+
+    async def authenticate(self, request):
+        """Usuario del JWT de la cabecera Authorization (401 si falta o no es válido)."""
+        auth = CachedJWTAuthentication()
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header else None
+        if raw_token is None:
+            raise NotAuthenticated()
+        validated_token = auth.get_validated_token(raw_token)
+        return await sync_to_async(auth.get_user)(validated_token)
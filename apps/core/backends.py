@@ -0,0 +1,39 @@
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from .cache import record_evictions
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache que contabiliza las entradas expulsadas al alcanzar MAX_ENTRIES."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._location = name
+
+    def _cull(self):
+        before = len(self._cache)
+        super()._cull()
+        record_evictions(self._location, before - len(self._cache))
+
+
+class InstrumentedFileBasedCache(FileBasedCache):
+    """FileBasedCache que contabiliza los ficheros borrados al alcanzar MAX_ENTRIES."""
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._location = dir
+        self._culling = False
+
+    def _cull(self):
+        self._culling = True
+        try:
+            super()._cull()
+        finally:
+            self._culling = False
+
+    def _delete(self, fname):
+        deleted = super()._delete(fname)
+        if deleted and self._culling:
+            record_evictions(self._location, 1)
+        return deleted
@@ -0,0 +1,137 @@
+"""
+Capa de caché del proyecto.
+
+Cada espacio de nombres (menu, sessions, ratelimit, documents...) es un alias de
+settings.CACHES con su propio backend, KEY_PREFIX, VERSION y TIMEOUT. Las apps
+usan get_cache('<alias>') en lugar de django.core.cache.cache para que los
+aciertos y fallos queden registrados en cache_stats().
+"""
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# Contadores por proceso (cada worker de gunicorn lleva los suyos)
+_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+_evictions = Counter()
+_MISSING = object()
+
+
+def record_evictions(location, count):
+    if count > 0:
+        with _lock:
+            _evictions[location] += count
+
+
+def _record(alias, hits=0, misses=0):
+    with _lock:
+        _hits[alias] += hits
+        _misses[alias] += misses
+
+
+class NamespacedCache:
+    """Envoltorio fino sobre un alias de CACHES que registra aciertos y fallos."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def backend(self):
+        # caches[alias] es por hilo, no se guarda la instancia
+        return caches[self.alias]
+
+    def get(self, key, default=None, version=None):
+        value = self.backend.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            _record(self.alias, misses=1)
+            return default
+        _record(self.alias, hits=1)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.backend.get_many(keys, version=version)
+        _record(self.alias, hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            self.backend.add(key, value, timeout=timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.backend.set(key, value, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.backend.set_many(data, timeout=timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.backend.add(key, value, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self.backend.incr(key, delta, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.backend.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self.backend.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        return self.backend.delete_many(keys, version=version)
+
+    def clear(self):
+        return self.backend.clear()
+
+
+_namespaces = {}
+
+
+def get_cache(namespace='default'):
+    """Devuelve la caché del espacio de nombres indicado (un alias de settings.CACHES)."""
+    if namespace not in settings.CACHES:
+        raise KeyError(f"Espacio de caché desconocido: '{namespace}'")
+    if namespace not in _namespaces:
+        _namespaces[namespace] = NamespacedCache(namespace)
+    return _namespaces[namespace]
+
+
+def _redis_info(backend):
+    """Estadísticas del servidor Redis (compartidas por todos los alias que usan el mismo servidor)."""
+    try:
+        info = backend._cache.get_client().info('stats')
+    except Exception as e:
+        return {'error': str(e)}
+    return {
+        'keyspace_hits': info.get('keyspace_hits'),
+        'keyspace_misses': info.get('keyspace_misses'),
+        'evicted_keys': info.get('evicted_keys'),
+    }
+
+
+def cache_stats():
+    """Aciertos, fallos y expulsiones de cada espacio de caché en este proceso."""
+    stats = {'pid': os.getpid(), 'caches': {}}
+    for alias, config in settings.CACHES.items():
+        hits, misses = _hits[alias], _misses[alias]
+        lookups = hits + misses
+        entry = {
+            'backend': config['BACKEND'],
+            'key_prefix': config.get('KEY_PREFIX', ''),
+            'version': config.get('VERSION', 1),
+            'timeout': config.get('TIMEOUT', 300),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+            'evictions': _evictions[config.get('LOCATION', '')],
+        }
+        if config['BACKEND'].endswith('RedisCache'):
+            entry['server'] = _redis_info(caches[alias])
+        stats['caches'][alias] = entry
+    return stats
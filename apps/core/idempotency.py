@@ -0,0 +1,141 @@
+"""
+Soporte de la cabecera Idempotency-Key en acciones POST.
+
+Con @idempotent, la primera petición con una clave reserva un registro
+IN_PROGRESS, ejecuta la vista y guarda su respuesta. Los reintentos con la
+misma clave (mismo usuario) reciben esa respuesta sin volver a ejecutar nada:
+no se duplican pedidos ni emails. Mientras la primera sigue en curso se
+responde 409; si la clave se reutiliza con otra petición, 422. Si el proceso
+que la atendía murió (timeout, OOM, despliegue), pasados
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS el siguiente reintento se hace cargo de ella.
+Las respuestas 5xx y las excepciones no se guardan, así el cliente puede reintentar.
+
+La vista y el paso a COMPLETED van en la misma transacción: si el proceso muere
+entre medias no queda un pedido creado con la clave aún IN_PROGRESS (que el
+reintento volvería a crear). Completar o liberar la clave solo vale si sigue
+siendo de esta petición (locked_at); si otro reintento se hizo cargo entretanto,
+el trabajo de esta se deshace y responde 409.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """Huella de la petición: método, ruta y cuerpo normalizado."""
+    try:
+        body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    except TypeError:
+        body = repr(request.data)  # multipart con ficheros: no se puede normalizar
+    payload = f"{request.method}\n{request.get_full_path()}\n{body}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _reserve(user, key, request_hash):
+    """Crea el registro IN_PROGRESS. Devuelve (registro, creado)."""
+    expires_at = timezone.now() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    try:
+        with transaction.atomic():
+            return IdempotencyRecord.objects.create(user=user, key=key, request_hash=request_hash, expires_at=expires_at), True
+    except IntegrityError:
+        pass
+    record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+    if record is None or record.expires_at <= timezone.now():
+        # Caducado (o purgado entretanto): la clave vuelve a estar libre
+        IdempotencyRecord.objects.filter(user=user, key=key, expires_at__lte=timezone.now()).delete()
+        return _reserve(user, key, request_hash)
+    return record, False
+
+
+def _take_over(record):
+    """
+    Reclama un registro IN_PROGRESS abandonado. Solo uno de varios reintentos
+    simultáneos lo consigue (UPDATE condicionado al locked_at leído).
+    """
+    now = timezone.now()
+    if record.locked_at > now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS):
+        return False
+    claimed = IdempotencyRecord.objects.filter(pk=record.pk, status='IN_PROGRESS', locked_at=record.locked_at).update(locked_at=now)
+    if claimed:
+        record.locked_at = now
+    return bool(claimed)
+
+
+class _ClaimLost(Exception):
+    """Otro reintento se hizo cargo de la clave mientras esta petición seguía en curso."""
+
+
+def _owned(record):
+    """El registro, solo si sigue IN_PROGRESS con el locked_at que reclamó esta petición."""
+    return IdempotencyRecord.objects.filter(pk=record.pk, status='IN_PROGRESS', locked_at=record.locked_at)
+
+
+def _in_progress():
+    response = Response({"error": "Una petición con esta clave sigue en curso. Reintente en unos segundos."},
+                        status=status.HTTP_409_CONFLICT)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Decorador para métodos de ViewSet/APIView que aceptan Idempotency-Key.
+    Sin la cabecera (o sin usuario autenticado) la vista se ejecuta normalmente.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER, '').strip()
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"{HEADER} no puede superar {MAX_KEY_LENGTH} caracteres."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        request_hash = request_fingerprint(request)
+        record, created = _reserve(request.user, key, request_hash)
+        if not created:
+            if record.request_hash != request_hash:
+                return Response({"error": f"{HEADER} ya se usó con una petición distinta."},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if record.status == 'COMPLETED':
+                return _replay(record)
+            if not _take_over(record):
+                return _in_progress()
+
+        try:
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code < 500 and isinstance(response, Response):
+                    completed = _owned(record).update(status='COMPLETED', response_status=response.status_code,
+                                                      response_body=response.data)
+                    if not completed:
+                        raise _ClaimLost()  # Deshace lo hecho: lo está repitiendo el nuevo dueño de la clave
+                    return response
+        except _ClaimLost:
+            return _in_progress()
+        except Exception:
+            _owned(record).delete()
+            raise
+
+        _owned(record).delete()
+        return response
+    return wrapper
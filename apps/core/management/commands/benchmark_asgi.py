@@ -0,0 +1,120 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+
+from apps.contact.models import ContactMessage
+from apps.contact.views import AsyncContactMessageCreateView, ContactMessageCreateView
+from apps.mailer.models import OutboundEmail
+
+MARKER = '[benchmark_asgi]'
+
+
+class QueryLatency:
+    """Añade `delay` segundos a cada consulta de las conexiones que se abran (base de datos remota)."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:  # El mismo hilo puede reabrir su conexión
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.install)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el rendimiento del formulario de contacto (INSERT + aqueue_mail, sin SMTP en la petición) "
+        "en modo WSGI (N workers síncronos, como gunicorn --workers N) y en modo ASGI (un worker de "
+        "uvicorn con las vistas asíncronas) con una base de datos con latencia simulada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=60, help="Peticiones por modo.")
+        parser.add_argument('--workers', type=int, default=3, help="Workers síncronos del modo WSGI.")
+        parser.add_argument('--concurrency', type=int, default=10, help="Peticiones simultáneas del modo ASGI.")
+        parser.add_argument('--db-latency-ms', type=float, default=20, help="Latencia añadida a cada consulta.")
+
+    def handle(self, *args, **options):
+        payload = json.dumps({'name': 'Benchmark', 'email': 'benchmark@localhost',
+                              'subject': MARKER, 'message': 'Mensaje de prueba de rendimiento.'})
+        try:
+            with override_settings(RESTAURANT_CONTACT_EMAIL='benchmark@localhost'), \
+                    QueryLatency(options['db_latency_ms'] / 1000):
+                wsgi = self.run_wsgi(payload, options['requests'], options['workers'])
+                asgi = asyncio.run(self.run_asgi(payload, options['requests'], options['concurrency']))
+            # Las vistas registran los fallos al encolar sin devolver error: se comprueba en la bandeja
+            queued = OutboundEmail.objects.filter(subject__endswith=MARKER).count()
+            if queued != 2 * options['requests']:
+                self.stderr.write(f"Solo se encolaron {queued} de {2 * options['requests']} emails")
+        finally:
+            ContactMessage.objects.filter(subject=MARKER).delete()
+            OutboundEmail.objects.filter(subject__endswith=MARKER).delete()
+
+        self.stdout.write(f"Base de datos con {options['db_latency_ms']:.0f} ms por consulta, "
+                          f"{options['requests']} peticiones por modo")
+        self.report(f"WSGI ({options['workers']} workers síncronos)", *wsgi)
+        self.report(f"ASGI (1 worker, {options['concurrency']} concurrentes)", *asgi)
+        self.stdout.write(f"ASGI/WSGI: x{(asgi[0] / asgi[1]) / (wsgi[0] / wsgi[1]):.1f} peticiones por segundo")
+
+    def run_wsgi(self, payload, total, workers):
+        view = ContactMessageCreateView.as_view()
+        factory = RequestFactory()
+
+        def call(_):
+            started = time.perf_counter()
+            try:
+                response = view(factory.post('/api/contact/send-message/', payload, content_type='application/json'))
+                assert response.status_code == 201, response.status_code
+            finally:
+                connection.close()  # Cada hilo hace de worker con su propia conexión
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(call, range(total)))
+        return total, time.perf_counter() - started, latencies
+
+    async def run_asgi(self, payload, total, concurrency):
+        view = AsyncContactMessageCreateView.as_view()
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with semaphore:
+                started = time.perf_counter()
+                # Como el ASGIHandler de Django: el ORM de cada petición va a su propio hilo
+                async with ThreadSensitiveContext():
+                    response = await view(factory.post('/api/contact/send-message/', payload,
+                                                       content_type='application/json'))
+                assert response.status_code == 201, response.status_code
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(call() for _ in range(total)))
+        return total, time.perf_counter() - started, latencies
+
+    def report(self, label, total, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{label}: {total / elapsed:.1f} peticiones/s en {elapsed:.2f}s; "
+            f"latencia p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = "Elimina las claves de idempotencia caducadas (ejecutar periódicamente, ej. cada hora con cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Registros eliminados por consulta.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        total = 0
+        while True:
+            # Por lotes para no mantener un bloqueo largo sobre la tabla
+            ids = list(IdempotencyRecord.objects.filter(expires_at__lte=now)
+                       .values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            total += IdempotencyRecord.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(f"{total} clave(s) de idempotencia caducada(s) eliminada(s)")
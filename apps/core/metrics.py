@@ -0,0 +1,62 @@
+"""
+Métricas operativas compartidas entre procesos.
+
+Los procesos auxiliares (run_jobs, release_scheduled_orders) no comparten
+memoria con los de la web, así que los resúmenes se guardan en la caché
+'default' (archivo o Redis en producción) y los lee /api/core/metrics/.
+Cada métrica es un resumen simple: número de observaciones, suma, máximo y
+último valor. La actualización no es atómica: pensada para un escritor por
+métrica (o para tolerar alguna observación perdida con varias réplicas).
+"""
+from django.utils import timezone
+
+from .cache import get_cache
+
+cache = get_cache('default')
+NAMES_KEY = 'metrics:names'
+
+
+def _key(name):
+    return f'metrics:{name}'
+
+
+def _register(name):
+    names = cache.get(NAMES_KEY) or []
+    if name not in names:
+        cache.set(NAMES_KEY, sorted([*names, name]), timeout=None)
+
+
+def observe(name, values):
+    """Añade una o varias observaciones (ej: segundos de retraso) al resumen de la métrica."""
+    values = [values] if isinstance(values, (int, float)) else list(values)
+    if not values:
+        return
+    summary = cache.get(_key(name)) or {'count': 0, 'sum': 0.0, 'max': None}
+    summary['count'] += len(values)
+    summary['sum'] += sum(values)
+    summary['max'] = max(values) if summary['max'] is None else max(summary['max'], *values)
+    summary['last'] = values[-1]
+    summary['updated_at'] = timezone.now().isoformat()
+    cache.set(_key(name), summary, timeout=None)
+    _register(name)
+
+
+def gauge(name, value):
+    """Fija el valor actual de la métrica (ej: pedidos pendientes)."""
+    cache.set(_key(name), {'value': value, 'updated_at': timezone.now().isoformat()}, timeout=None)
+    _register(name)
+
+
+def get_metrics():
+    """Todas las métricas registradas, con la media calculada para los resúmenes."""
+    names = cache.get(NAMES_KEY) or []
+    stored = cache.get_many([_key(name) for name in names])
+    metrics = {}
+    for name in names:
+        summary = stored.get(_key(name))
+        if summary is None:
+            continue  # Expulsada de la caché
+        if summary.get('count'):
+            summary['avg'] = summary['sum'] / summary['count']
+        metrics[name] = summary
+    return metrics
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Resultado de una petición POST con cabecera Idempotency-Key.
+    Los reintentos con la misma clave reciben la respuesta guardada sin repetir
+    el trabajo. Caducan a las IDEMPOTENCY_KEY_TTL_HOURS (purge_idempotency_keys).
+    """
+    STATUS_CHOICES = [
+        ('IN_PROGRESS', 'En Curso'),
+        ('COMPLETED', 'Completada'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', verbose_name="Usuario")
+    key = models.CharField(max_length=255, verbose_name="Clave de Idempotencia")
+    # Huella de método, ruta y cuerpo: la misma clave con otra petición es un error del cliente
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='IN_PROGRESS')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    # Inicio de la ejecución en curso: un IN_PROGRESS más antiguo que IDEMPOTENCY_LOCK_TIMEOUT_SECONDS está abandonado
+    locked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Clave de Idempotencia"
+        verbose_name_plural = "Claves de Idempotencia"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.get_status_display()})"
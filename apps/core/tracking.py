@@ -0,0 +1,70 @@
+class FieldTrackerMixin:
+    """
+    Registra en memoria los valores con los que se cargó la instancia para los
+    campos de `tracked_fields`, así se puede saber qué cambió sin volver a
+    consultar la base de datos (por ejemplo en pre_save/post_save).
+
+    Los valores originales se toman al cargar desde la BD (from_db) y se
+    actualizan tras cada save() y refresh_from_db(). Las claves foráneas se
+    guardan por su columna (`product` -> `product_id`). Una instancia nueva no
+    tiene originales: todos sus campos cuentan como cambiados.
+
+    Debe ir antes de models.Model en la herencia:
+        class Order(FieldTrackerMixin, models.Model):
+            tracked_fields = ('status',)
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._store_originals()
+        return instance
+
+    @classmethod
+    def _tracked_attnames(cls):
+        return [cls._meta.get_field(name).attname for name in cls.tracked_fields]
+
+    @classmethod
+    def _attname(cls, field):
+        return cls._meta.get_field(field).attname
+
+    def _store_originals(self, attnames=None):
+        if not hasattr(self, '_original_values'):
+            self._original_values = {}
+        for attname in attnames or self._tracked_attnames():
+            # Los campos diferidos (only/defer) no están en __dict__ y no se pueden comparar
+            if attname in self.__dict__:
+                self._original_values[attname] = self.__dict__[attname]
+
+    def get_original(self, field, default=None):
+        """Valor con el que se cargó el campo (None/default si la instancia es nueva)."""
+        return getattr(self, '_original_values', {}).get(self._attname(field), default)
+
+    def has_changed(self, field):
+        attname = self._attname(field)
+        originals = getattr(self, '_original_values', None)
+        if originals is None:
+            return True  # Instancia nueva
+        if attname not in originals:
+            # Diferido al cargar: solo se sabe que cambió si se ha asignado o cargado después
+            return attname in self.__dict__
+        return self.__dict__.get(attname) != originals[attname]
+
+    def changed_fields(self):
+        """Nombres de los campos seguidos que difieren de los valores cargados."""
+        return [name for name in self.tracked_fields if self.has_changed(name)]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Las señales post_save ya han visto los cambios; ahora lo guardado pasa a ser el original
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            tracked = set(self.tracked_fields)
+            self._store_originals([self._attname(name) for name in update_fields if name in tracked])
+        else:
+            self._store_originals()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._store_originals()
@@ -0,0 +1,31 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import cache_stats
+from .metrics import get_metrics
+
+
+class CacheStatsView(APIView):
+    """
+    Estadísticas de la caché para administradores: aciertos, fallos y
+    expulsiones por espacio de nombres. Los contadores son del proceso que
+    atiende la petición (se indica su pid); con Redis se incluyen también los
+    del servidor, que sí son globales.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats())
+
+
+class MetricsView(APIView):
+    """
+    Métricas operativas para administradores (ej: retraso del liberador de
+    pedidos programados). A diferencia de CacheStatsView, se comparten entre
+    procesos a través de la caché 'default'.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_metrics())
@@ -2,20 +2,17 @@
 
 from django.contrib import admin
 
-# Register your models here.
-# from .models import DelivererProfile # Ejemplo si tuvieras modelos aquí
+from .models import DelivererProfile
 
-# Nota: En la implementación actual, no hay modelos específicos en la app 'delivery'
-# para registrar en el admin.
-# - La gestión de qué usuarios son repartidores (campo 'is_deliverer') se hace
-#   a través del admin de la app 'users' (modificando el modelo User).
-# - La asignación de un repartidor a un pedido se hace a través del admin
-#   de la app 'orders' (modificando el modelo Order).
+# - Qué usuarios son repartidores (campo 'is_deliverer') se gestiona en el admin de 'users'.
+# - La asignación manual de un repartidor a un pedido sigue en el admin de 'orders';
+#   el reparto automático está en apps/delivery/dispatch.py.
 
-# Ejemplo de cómo registrarías un modelo si lo tuvieras:
-# @admin.register(DelivererProfile)
-# class DelivererProfileAdmin(admin.ModelAdmin):
-#     list_display = ('user', 'vehicle_type', 'is_available')
-#     list_filter = ('vehicle_type', 'is_available')
-#     search_fields = ('user__email', 'user__first_name', 'user__last_name')
-#     raw_id_fields = ('user',) # Para búsqueda eficiente de usuarios
\ No newline at end of file
+
+@admin.register(DelivererProfile)
+class DelivererProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'is_available', 'max_active_orders', 'latitude', 'longitude', 'location_updated_at')
+    list_filter = ('is_available',)
+    list_editable = ('is_available', 'max_active_orders')
+    search_fields = ('user__email', 'user__first_name', 'user__last_name')
+    raw_id_fields = ('user',) # Para búsqueda eficiente de usuarios
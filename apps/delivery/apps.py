@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class DeliveryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.delivery'
-    verbose_name = "Logística y Reparto"
\ No newline at end of file
+    verbose_name = "Logística y Reparto"
+
+    def ready(self):
+        # Importar señales cuando la app esté lista (mantienen al día el índice de repartidores)
+        import apps.delivery.signals
@@ -0,0 +1,217 @@
+"""
+Reparto automático de pedidos.
+
+DelivererIndex mantiene en memoria los repartidores de servicio con su
+posición y su carga (pedidos asignados sin entregar). Se carga con una sola
+consulta y se recarga cada DELIVERY_INDEX_TTL_SECONDS o cuando las señales
+lo invalidan; las asignaciones hechas por este proceso actualizan la carga
+sin volver a consultar. Las señales solo llegan al proceso que guarda el
+pedido (una asignación manual en un worker web no invalida el índice de
+auto_dispatch), así que la capacidad se vuelve a comprobar en el UPDATE que
+asigna: el índice solo decide a quién proponer cada pedido.
+
+match_orders es un emparejador voraz: los pedidos se atienden por orden de
+antigüedad y cada uno se asigna al repartidor con
+menor coste = distancia (km) + DELIVERY_LOAD_PENALTY_KM por pedido en curso,
+entre los que no han llegado a su capacidad. Es O(pedidos x repartidores)
+sin estructuras auxiliares: con 1000 x 100 son 100k evaluaciones
+(benchmark_dispatch).
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import LessThanOrEqual
+from django.utils import timezone
+
+from apps.orders.events import record_order_events
+from apps.orders.models import Order
+from apps.orders.scheduler import release_cutoff
+from .models import DelivererProfile
+
+EARTH_RADIUS_KM = 6371.0
+# Pedidos que ocupan al repartidor y estados que se pueden asignar
+ACTIVE_STATUSES = ('PROCESSING', 'SCHEDULED', 'OUT_FOR_DELIVERY')
+
+
+@dataclass
+class DelivererState:
+    id: object
+    latitude: float
+    longitude: float
+    load: int
+    capacity: int
+
+
+@dataclass(frozen=True)
+class OrderPoint:
+    id: object
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True)
+class Assignment:
+    order_id: object
+    deliverer_id: object
+    distance_km: float
+
+
+def match_orders(orders, deliverers, load_penalty_km=None):
+    """
+    Empareja `orders` (OrderPoint, ya en orden de prioridad) con `deliverers`
+    (DelivererState). Actualiza la carga de los repartidores y devuelve la lista
+    de Assignment; los pedidos sin repartidor libre se quedan sin asignar.
+    """
+    penalty = settings.DELIVERY_LOAD_PENALTY_KM if load_penalty_km is None else load_penalty_km
+    sin, cos, asin, sqrt, radians = math.sin, math.cos, math.asin, math.sqrt, math.radians
+    # Radianes y cosenos de los repartidores calculados una vez (el bucle interno es haversine puro)
+    free = [(d, radians(d.latitude), radians(d.longitude), cos(radians(d.latitude)))
+            for d in deliverers if d.load < d.capacity]
+    assignments = []
+    for order in orders:
+        if not free:
+            break
+        lat, lon = radians(order.latitude), radians(order.longitude)
+        cos_lat = cos(lat)
+        best, best_cost, best_distance = None, None, None
+        for entry in free:
+            deliverer, d_lat, d_lon, d_cos = entry
+            a = sin((d_lat - lat) / 2) ** 2 + cos_lat * d_cos * sin((d_lon - lon) / 2) ** 2
+            distance = 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+            cost = distance + penalty * deliverer.load
+            if best_cost is None or cost < best_cost:
+                best, best_cost, best_distance = entry, cost, distance
+        deliverer = best[0]
+        deliverer.load += 1
+        if deliverer.load >= deliverer.capacity:
+            free.remove(best)
+        assignments.append(Assignment(order.id, deliverer.id, best_distance))
+    return assignments
+
+
+class DelivererIndex:
+    """Repartidores de servicio con su posición y carga, en memoria del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+        self._loaded_at = None
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _load(self):
+        active_orders = Count('user__assigned_orders', filter=Q(user__assigned_orders__status__in=ACTIVE_STATUSES))
+        rows = (DelivererProfile.objects.filter(is_available=True, user__is_deliverer=True, user__is_active=True)
+                .annotate(load=active_orders)
+                .values_list('user_id', 'latitude', 'longitude', 'load', 'max_active_orders'))
+        states = {}
+        for user_id, latitude, longitude, load, max_active_orders in rows:
+            # Sin ubicación conocida se supone que está en el restaurante
+            states[user_id] = DelivererState(
+                id=user_id,
+                latitude=settings.RESTAURANT_LATITUDE if latitude is None else latitude,
+                longitude=settings.RESTAURANT_LONGITUDE if longitude is None else longitude,
+                load=load,
+                capacity=settings.DELIVERY_MAX_ACTIVE_ORDERS if max_active_orders is None else max_active_orders,
+            )
+        return states
+
+    def snapshot(self):
+        """Copia del estado actual (recargándolo si ha caducado) para emparejar sin tocar el índice."""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.DELIVERY_INDEX_TTL_SECONDS:
+                self._states = self._load()
+                self._loaded_at = time.monotonic()
+            return [DelivererState(**vars(state)) for state in self._states.values()]
+
+    def record_assignments(self, assignments):
+        with self._lock:
+            for assignment in assignments:
+                state = self._states.get(assignment.deliverer_id)
+                if state is not None:
+                    state.load += 1
+
+
+deliverer_index = DelivererIndex()
+
+
+def pending_orders():
+    """Pedidos sin repartidor listos para reparto, los más urgentes primero."""
+    due = Q(status='PROCESSING') | Q(status='SCHEDULED', scheduled_datetime__lte=release_cutoff())
+    return Order.objects.filter(due, assigned_to__isnull=True).order_by('created_at', 'id')
+
+
+def save_assignments(assignments, capacities):
+    """
+    Guarda las asignaciones con un UPDATE por repartidor, condicionado a que
+    los pedidos sigan sin repartidor y a que su carga real (pedidos activos en
+    la BD, no la del índice) más los nuevos no supere su capacidad. Los que no
+    se guardan quedan para la siguiente pasada, con el índice recargado.
+    Devuelve las asignaciones guardadas.
+    """
+    by_deliverer = defaultdict(list)
+    for assignment in assignments:
+        by_deliverer[assignment.deliverer_id].append(assignment)
+
+    now = timezone.now()
+    saved = []
+    for deliverer_id, group in by_deliverer.items():
+        order_ids = [assignment.order_id for assignment in group]
+        current_load = Coalesce(Subquery(
+            Order.objects.filter(assigned_to_id=deliverer_id, status__in=ACTIVE_STATUSES)
+            .order_by().values('assigned_to').annotate(count=Count('id')).values('count')
+        ), Value(0))
+        updated = Order.objects.filter(
+            LessThanOrEqual(current_load, Value(capacities[deliverer_id] - len(group))),
+            id__in=order_ids, assigned_to__isnull=True,
+        ).update(assigned_to_id=deliverer_id, updated_at=now)
+        if updated == len(group):
+            saved.extend(group)
+            continue
+        if updated:
+            assigned = set(Order.objects.filter(id__in=order_ids, assigned_to_id=deliverer_id).values_list('id', flat=True))
+            saved.extend(assignment for assignment in group if assignment.order_id in assigned)
+        # Otro proceso le asignó pedidos entretanto: el índice estaba desactualizado
+        deliverer_index.invalidate()
+    return saved
+
+
+def dispatch(limit=500, dry_run=False):
+    """
+    Asigna repartidor a hasta `limit` pedidos pendientes. Los pedidos se reclaman
+    con SKIP LOCKED (varias instancias no se pisan) y se guardan con un UPDATE
+    condicional por repartidor (save_assignments). Devuelve la lista de Assignment.
+    """
+    with transaction.atomic():
+        rows = list(pending_orders().select_for_update(skip_locked=True)
+                    .values_list('id', 'delivery_latitude', 'delivery_longitude', 'user_id', 'status')[:limit])
+        if not rows:
+            return []
+        orders = [
+            OrderPoint(order_id,
+                       settings.RESTAURANT_LATITUDE if latitude is None else latitude,
+                       settings.RESTAURANT_LONGITUDE if longitude is None else longitude)
+            for order_id, latitude, longitude, _, _ in rows
+        ]
+        deliverers = deliverer_index.snapshot()
+        assignments = match_orders(orders, deliverers)
+        if dry_run or not assignments:
+            return assignments
+        capacities = {deliverer.id: deliverer.capacity for deliverer in deliverers}
+        assignments = save_assignments(assignments, capacities)
+        if not assignments:
+            return assignments
+        # UPDATE sin post_save: eventos del canal en vivo para cliente y repartidor
+        owners = {order_id: (user_id, status) for order_id, _, _, user_id, status in rows}
+        record_order_events([(a.order_id, owners[a.order_id][0], a.deliverer_id, owners[a.order_id][1])
+                             for a in assignments])
+    deliverer_index.record_assignments(assignments)
+    return assignments
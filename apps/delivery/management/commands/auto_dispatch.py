@@ -0,0 +1,38 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.delivery.dispatch import dispatch
+
+
+class Command(BaseCommand):
+    help = "Asigna periódicamente repartidor a los pedidos pendientes (reparto automático)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Hace una pasada y termina.")
+        parser.add_argument('--limit', type=int, default=500, help="Pedidos como máximo por pasada.")
+        parser.add_argument('--interval', type=float, default=20.0, help="Segundos entre pasadas.")
+
+    def handle(self, *args, **options):
+        self._stop = False
+        # Terminar la pasada en curso antes de salir (systemd envía SIGTERM)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write("Reparto automático iniciado")
+        while not self._stop:
+            started = time.monotonic()
+            assignments = dispatch(limit=options['limit'])
+            if assignments:
+                average = sum(a.distance_km for a in assignments) / len(assignments)
+                self.stdout.write(f"{len(assignments)} pedido(s) asignado(s); distancia media {average:.2f} km")
+            if options['once']:
+                break
+            deadline = started + options['interval']
+            while not self._stop and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+        self.stdout.write("Reparto automático detenido")
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
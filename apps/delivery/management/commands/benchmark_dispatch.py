@@ -0,0 +1,50 @@
+import math
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.delivery.dispatch import DelivererState, OrderPoint, match_orders
+
+
+def _random_point(rng, radius_km):
+    """Punto aleatorio a menos de radius_km del restaurante."""
+    distance = radius_km * math.sqrt(rng.random())
+    angle = rng.random() * 2 * math.pi
+    latitude = settings.RESTAURANT_LATITUDE + (distance * math.cos(angle)) / 111.0
+    longitude = settings.RESTAURANT_LONGITUDE + (distance * math.sin(angle)) / (111.0 * math.cos(math.radians(settings.RESTAURANT_LATITUDE)))
+    return latitude, longitude
+
+
+class Command(BaseCommand):
+    help = "Mide el emparejador del reparto automático con datos sintéticos (por defecto 1000 pedidos x 100 repartidores, sin base de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--deliverers', type=int, default=100)
+        parser.add_argument('--capacity', type=int, default=None, help="Pedidos por repartidor (por defecto DELIVERY_MAX_ACTIVE_ORDERS).")
+        parser.add_argument('--radius-km', type=float, default=8.0)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        capacity = options['capacity'] or settings.DELIVERY_MAX_ACTIVE_ORDERS
+        orders = [OrderPoint(i, *_random_point(rng, options['radius_km'])) for i in range(options['orders'])]
+        positions = [_random_point(rng, options['radius_km']) for _ in range(options['deliverers'])]
+
+        timings, assignments = [], []
+        for _ in range(max(options['iterations'], 2)):
+            deliverers = [DelivererState(i, lat, lon, load=rng.randint(0, 1), capacity=capacity)
+                          for i, (lat, lon) in enumerate(positions)]
+            start = time.perf_counter()
+            assignments = match_orders(orders, deliverers)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+        distances = [a.distance_km for a in assignments]
+        self.stdout.write(f"{len(orders)} pedidos x {len(positions)} repartidores (capacidad {capacity})")
+        self.stdout.write(f"  p50 {cuts[49]:.1f} ms, p99 {cuts[98]:.1f} ms")
+        self.stdout.write(f"  asignados {len(assignments)}, distancia media {statistics.mean(distances) if distances else 0:.2f} km")
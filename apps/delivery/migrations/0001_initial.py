@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DelivererProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_available', models.BooleanField(default=False, verbose_name='De Servicio')),
+                ('latitude', models.FloatField(blank=True, null=True, verbose_name='Latitud')),
+                ('longitude', models.FloatField(blank=True, null=True, verbose_name='Longitud')),
+                ('location_updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Ubicación Actualizada')),
+                ('max_active_orders', models.PositiveIntegerField(blank=True, help_text='Vacío = DELIVERY_MAX_ACTIVE_ORDERS.', null=True, verbose_name='Pedidos Simultáneos')),
+                ('user', models.OneToOneField(limit_choices_to={'is_deliverer': True}, on_delete=django.db.models.deletion.CASCADE, related_name='deliverer_profile', to=settings.AUTH_USER_MODEL, verbose_name='Repartidor')),
+            ],
+            options={
+                'verbose_name': 'Perfil de Repartidor',
+                'verbose_name_plural': 'Perfiles de Repartidor',
+            },
+        ),
+    ]
@@ -1,4 +1,24 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
-# No models defined here in the current implementation.
\ No newline at end of file
+
+class DelivererProfile(models.Model):
+    """Estado operativo de un repartidor: si está de servicio, dónde está y cuántos pedidos admite."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='deliverer_profile',
+                                limit_choices_to={'is_deliverer': True}, verbose_name="Repartidor")
+    is_available = models.BooleanField(default=False, verbose_name="De Servicio")
+    latitude = models.FloatField(blank=True, null=True, verbose_name="Latitud")
+    longitude = models.FloatField(blank=True, null=True, verbose_name="Longitud")
+    location_updated_at = models.DateTimeField(blank=True, null=True, verbose_name="Ubicación Actualizada")
+    max_active_orders = models.PositiveIntegerField(blank=True, null=True, verbose_name="Pedidos Simultáneos",
+                                                    help_text="Vacío = DELIVERY_MAX_ACTIVE_ORDERS.")
+
+    class Meta:
+        verbose_name = "Perfil de Repartidor"
+        verbose_name_plural = "Perfiles de Repartidor"
+
+    def __str__(self):
+        return f"{self.user.email} ({'de servicio' if self.is_available else 'fuera de servicio'})"
+
+    def get_capacity(self):
+        return self.max_active_orders if self.max_active_orders is not None else settings.DELIVERY_MAX_ACTIVE_ORDERS
@@ -1,3 +1,20 @@
 from rest_framework import serializers
 
-# No serializers defined here in the current implementation.
\ No newline at end of file
+from .models import DelivererProfile
+
+
+class DelivererStatusSerializer(serializers.ModelSerializer):
+    """Estado que el propio repartidor actualiza desde la app: de servicio y ubicación."""
+    latitude = serializers.FloatField(required=False, allow_null=True, min_value=-90, max_value=90)
+    longitude = serializers.FloatField(required=False, allow_null=True, min_value=-180, max_value=180)
+
+    class Meta:
+        model = DelivererProfile
+        fields = ['is_available', 'latitude', 'longitude', 'location_updated_at', 'max_active_orders']
+        read_only_fields = ['location_updated_at', 'max_active_orders']  # La capacidad la fija un admin
+
+
+class DispatchSerializer(serializers.Serializer):
+    """Parámetros de POST /api/delivery/dispatch/."""
+    limit = serializers.IntegerField(required=False, default=500, min_value=1, max_value=5000)
+    dry_run = serializers.BooleanField(required=False, default=False)
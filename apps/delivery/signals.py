@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.orders.models import Order
+from .dispatch import deliverer_index
+from .models import DelivererProfile
+
+
+@receiver([post_save, post_delete], sender=DelivererProfile)
+def deliverer_profile_changed(sender, instance, **kwargs):
+    """Entra o sale de servicio, se mueve o cambia su capacidad: recargar el índice."""
+    deliverer_index.invalidate()
+
+
+@receiver(post_save, sender=Order)
+def order_assignment_changed(sender, instance, created, **kwargs):
+    """Asignación manual o pedido entregado/cancelado: la carga de algún repartidor cambió."""
+    if not created and (instance.has_changed('assigned_to') or instance.has_changed('status')):
+        deliverer_index.invalidate()
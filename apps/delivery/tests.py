@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.orders.models import Order
+from .dispatch import deliverer_index, dispatch
+from .models import DelivererProfile
+
+User = get_user_model()
+
+
+class DispatchCapacityTests(TestCase):
+    def setUp(self):
+        self.deliverer = User.objects.create_user(email="repartidor@example.com", password="Secreta123!",
+                                                  first_name="Repartidor", last_name="Prueba",
+                                                  is_active=True, is_deliverer=True)
+        DelivererProfile.objects.create(user=self.deliverer, is_available=True, max_active_orders=1)
+        deliverer_index.invalidate()
+        self.addCleanup(deliverer_index.invalidate)
+
+    def create_order(self, **kwargs):
+        return Order.objects.create(total_price=Decimal('10.00'), status='PROCESSING', **kwargs)
+
+    def test_assigns_free_deliverer(self):
+        order = self.create_order()
+        self.assertEqual([a.order_id for a in dispatch()], [order.pk])
+        order.refresh_from_db()
+        self.assertEqual(order.assigned_to, self.deliverer)
+
+    def test_rechecks_load_assigned_by_another_process(self):
+        deliverer_index.snapshot()  # Índice cargado con el repartidor libre
+        # Asignación manual en otro proceso: aquí no llega la señal que invalida el índice
+        manual = self.create_order()
+        Order.objects.filter(pk=manual.pk).update(assigned_to=self.deliverer)
+
+        pending = self.create_order()
+        self.assertEqual(dispatch(), [])
+        pending.refresh_from_db()
+        self.assertIsNone(pending.assigned_to)
+        # El rechazo recarga el índice: la siguiente pasada ya ve al repartidor ocupado
+        self.assertEqual(deliverer_index.snapshot()[0].load, 1)
@@ -1,7 +1,10 @@
-from django.urls import path, include
+from django.urls import path
+
+from .views import DispatchView, MyDelivererStatusView
 
 app_name = 'delivery'
 
 urlpatterns = [
-    # No URLs defined here in the current implementation.
-]
\ No newline at end of file
+    path('dispatch/', DispatchView.as_view(), name='dispatch'),
+    path('me/', MyDelivererStatusView.as_view(), name='my-status'),
+]
@@ -1,5 +1,53 @@
-from django.shortcuts import render
-from rest_framework import viewsets, permissions
+from django.utils import timezone
+from rest_framework import generics, status, views
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
-# No views defined here in the current implementation.
\ No newline at end of file
+from .dispatch import dispatch
+from .models import DelivererProfile
+from .serializers import DelivererStatusSerializer, DispatchSerializer
+
+
+class IsDeliverer(IsAuthenticated):
+    message = "Solo los repartidores pueden acceder a este recurso."
+
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and getattr(request.user, 'is_deliverer', False)
+
+
+class DispatchView(views.APIView):
+    """
+    Asigna repartidor a los pedidos pendientes (PROCESSING y SCHEDULED próximos)
+    según distancia y carga. Con {"dry_run": true} solo devuelve la propuesta.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = DispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assignments = dispatch(**serializer.validated_data)
+        print(f"Admin {request.user.email} lanzó el reparto automático: {len(assignments)} pedido(s) asignado(s)")
+        return Response({
+            "assigned": len(assignments),
+            "dry_run": serializer.validated_data['dry_run'],
+            "assignments": [
+                {"order_id": str(a.order_id), "deliverer_id": str(a.deliverer_id), "distance_km": round(a.distance_km, 2)}
+                for a in assignments
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+class MyDelivererStatusView(generics.RetrieveUpdateAPIView):
+    """El repartidor autenticado consulta o actualiza si está de servicio y su ubicación."""
+    serializer_class = DelivererStatusSerializer
+    permission_classes = [IsDeliverer]
+
+    def get_object(self):
+        profile, created = DelivererProfile.objects.get_or_create(user=self.request.user)
+        return profile
+
+    def perform_update(self, serializer):
+        if {'latitude', 'longitude'} & set(serializer.validated_data):
+            serializer.save(location_updated_at=timezone.now())
+        else:
+            serializer.save()
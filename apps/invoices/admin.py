@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Invoice
+
+
+@admin.register(Invoice)
+class InvoiceAdmin(admin.ModelAdmin):
+    list_display = ('order', 'sha256', 'size', 'render_version', 'rendered_at')
+    list_filter = ('render_version', 'rendered_at')
+    search_fields = ('order__order_number', 'sha256')
+    readonly_fields = ('order', 'sha256', 'size', 'render_version', 'rendered_at')
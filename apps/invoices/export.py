@@ -0,0 +1,218 @@
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.orders.models import Order
+from .services import is_invoice_current, save_invoice
+from .storage import InvoiceStore
+from .utils import generate_invoice_pdf
+from .workers import init_worker
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Destino no posicionable para zipfile: acumula lo escrito hasta que se
+    recoge con pop(). zipfile detecta que no se puede hacer seek y usa
+    descriptores de datos, así que el ZIP nunca está entero en memoria.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+# Pool de renderizado compartido por las exportaciones del proceso. Se crea con
+# 'spawn' y no con fork: los workers de gunicorn tienen varios hilos y un hijo
+# creado con fork heredaría sus locks y conexiones a la BD a medio usar.
+_pool_lock = threading.Lock()
+_executor = None
+_active_exports = 0
+
+
+def get_executor(workers=None):
+    global _executor
+    with _pool_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers or settings.INVOICE_EXPORT_WORKERS or os.cpu_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+            )
+        return _executor
+
+
+def _discard_executor(executor):
+    global _executor
+    with _pool_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def acquire_export_slot():
+    """
+    Reserva una de las INVOICE_EXPORT_MAX_CONCURRENT exportaciones simultáneas
+    del proceso. Devuelve False si no queda ninguna.
+    """
+    global _active_exports
+    with _pool_lock:
+        if _active_exports >= settings.INVOICE_EXPORT_MAX_CONCURRENT:
+            return False
+        _active_exports += 1
+        return True
+
+
+def release_export_slot():
+    """Libera la reserva; con la última exportación terminada se cierran los procesos del pool."""
+    global _active_exports, _executor
+    with _pool_lock:
+        _active_exports -= 1
+        executor = _executor if _active_exports == 0 else None
+        if executor is not None:
+            _executor = None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+class SlotReleasingStream:
+    """
+    Iterador del ZIP que libera la reserva de acquire_export_slot al terminar
+    o al cerrarse la respuesta (también si la descarga se corta antes de empezar).
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.chunks.close()
+            release_export_slot()
+
+
+def _render_invoice(order):
+    """Se ejecuta en el pool: el pedido llega con items y usuario ya cargados, sin tocar la BD."""
+    try:
+        return generate_invoice_pdf(order), None
+    except Exception as e:
+        return None, str(e)
+
+
+def filter_orders(date_from=None, date_to=None, status=None):
+    """Pedidos a exportar. Las fechas son `date` inclusivas en la zona horaria local."""
+    queryset = Order.objects.all()
+    if date_from:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to:
+        next_day = date_to + timedelta(days=1)
+        queryset = queryset.filter(created_at__lt=timezone.make_aware(datetime.combine(next_day, time.min)))
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def iter_order_chunks(queryset, chunk_size=None):
+    """
+    Recorre el queryset en lotes paginados por clave (created_at, id) en lugar
+    de OFFSET, así cada lote cuesta lo mismo aunque la exportación sea enorme.
+    """
+    chunk_size = chunk_size or settings.INVOICE_EXPORT_CHUNK_SIZE
+    queryset = (queryset.select_related('invoice')
+                .prefetch_related('items', 'user')
+                .order_by('created_at', 'id'))
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id))
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def _zip_info(order):
+    info = zipfile.ZipInfo(f"factura_{order.order_number}.pdf",
+                           date_time=timezone.localtime(order.created_at).timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED  # Los PDF ya van comprimidos
+    return info
+
+
+def stream_invoice_zip(queryset, workers=None, chunk_size=None, store=None):
+    """
+    Genera el ZIP con las facturas de los pedidos como un iterador de bytes.
+    Las facturas ya almacenadas se reutilizan; el resto se renderizan en el
+    pool compartido (get_executor) y se guardan en el almacén para la próxima vez.
+    """
+    store = store or InvoiceStore()
+    stream = _ZipStream()
+    executor = None
+    errors = []
+
+    try:
+        with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+            for chunk in iter_order_chunks(queryset, chunk_size):
+                pending = [order for order in chunk
+                           if not is_invoice_current(getattr(order, 'invoice', None), store)]
+                rendered = {}
+                if pending:
+                    if executor is None:
+                        executor = get_executor(workers)
+                    for order, (content, error) in zip(pending, executor.map(_render_invoice, pending)):
+                        if error:
+                            print(f"Error al generar PDF de factura para pedido {order.order_number} (exportación): {error}")
+                            errors.append(f"{order.order_number}: {error}")
+                            continue
+                        save_invoice(order, content, store)
+                        rendered[order.pk] = content
+
+                for order in chunk:
+                    if order.pk in rendered:
+                        content = rendered[order.pk]
+                    elif is_invoice_current(getattr(order, 'invoice', None), store):
+                        content = store.read(order.invoice.sha256)
+                    else:
+                        continue  # Falló el renderizado, queda en ERRORES.txt
+                    archive.writestr(_zip_info(order), content)
+                    yield stream.pop()
+
+            if errors:
+                archive.writestr('ERRORES.txt', '\n'.join(errors) + '\n')
+        # Directorio central del ZIP
+        yield stream.pop()
+    except BrokenProcessPool:
+        # Un proceso del pool murió (p. ej. por memoria): el siguiente export crea otro pool
+        _discard_executor(executor)
+        raise
@@ -0,0 +1,68 @@
+import time
+import tracemalloc
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.invoices.utils import InvoiceRenderer
+
+
+def _fake_order(item_count):
+    """Pedido en memoria con la forma que espera el renderer (sin base de datos)."""
+    items = [
+        SimpleNamespace(
+            product_name=f"Producto {i}",
+            quantity=(i % 3) + 1,
+            price=Decimal('9.95'),
+            get_total_price=lambda q=(i % 3) + 1: q * Decimal('9.95'),
+        )
+        for i in range(item_count)
+    ]
+    user = SimpleNamespace(email='cliente@example.com', phone_number='600000000', get_full_name=lambda: 'Cliente Prueba')
+    return SimpleNamespace(
+        order_number=f"ORD-BENCH-{item_count}",
+        created_at=timezone.now(),
+        user=user,
+        phone_number='600000000',
+        delivery_address='Calle Falsa 123\n28000 Madrid',
+        total_price=sum(item.get_total_price() for item in items),
+    ), items
+
+
+class Command(BaseCommand):
+    help = "Compara tiempo y memoria por factura: renderer creado en cada llamada (antes) frente a renderer compartido (después)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Facturas renderizadas por caso.")
+        parser.add_argument('--logo', default=None, help="Ruta a un logo PNG para incluirlo en la medición.")
+
+    def _measure(self, render, iterations):
+        # Calentamiento (fuentes, imports perezosos de ReportLab)
+        render()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / iterations
+
+        tracemalloc.start()
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed_ms, peak / 1024
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        logo = options['logo']
+        shared = InvoiceRenderer(logo_path=logo)
+
+        self.stdout.write(f"{'Items':>6} {'Antes ms':>10} {'Después ms':>11} {'Antes KiB':>10} {'Después KiB':>12}")
+        for item_count in (1, 10, 200):
+            order, items = _fake_order(item_count)
+            before_ms, before_kib = self._measure(
+                lambda: InvoiceRenderer(logo_path=logo).render(order, items), iterations)
+            after_ms, after_kib = self._measure(lambda: shared.render(order, items), iterations)
+            self.stdout.write(
+                f"{item_count:>6} {before_ms:>10.2f} {after_ms:>11.2f} {before_kib:>10.0f} {after_kib:>12.0f}"
+            )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.invoices.export import SlotReleasingStream, acquire_export_slot, filter_orders, stream_invoice_zip
+from apps.orders.models import Order
+
+
+def _date(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise CommandError(f"Fecha '{value}' inválida, usa el formato AAAA-MM-DD.")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Exporta a un ZIP las facturas de los pedidos en un rango de fechas (p. ej. cierre de mes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=_date, help="Fecha inicial incluida (AAAA-MM-DD).")
+        parser.add_argument('--to', dest='date_to', type=_date, help="Fecha final incluida (AAAA-MM-DD).")
+        parser.add_argument('--status', choices=[choice for choice, _ in Order.ORDER_STATUS_CHOICES])
+        parser.add_argument('--output', '-o', default=None, help="Ruta del ZIP (por defecto facturas_<from>_<to>.zip).")
+        parser.add_argument('--workers', type=int, default=None, help="Procesos de renderizado.")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Pedidos por lote.")
+
+    def handle(self, *args, **options):
+        queryset = filter_orders(options['date_from'], options['date_to'], options['status'])
+        output = options['output'] or "facturas_{}_{}.zip".format(options['date_from'] or 'inicio', options['date_to'] or 'hoy')
+
+        if not acquire_export_slot():
+            raise CommandError("INVOICE_EXPORT_MAX_CONCURRENT no permite ninguna exportación.")
+        # Como la vista: al terminar (o si falla o se interrumpe) se libera la reserva
+        # y, al ser la única exportación del proceso, se cierran los procesos del pool
+        chunks = SlotReleasingStream(stream_invoice_zip(queryset, workers=options['workers'],
+                                                        chunk_size=options['chunk_size']))
+        written = 0
+        try:
+            with open(output, 'wb') as f:
+                for data in chunks:
+                    f.write(data)
+                    written += len(data)
+        finally:
+            chunks.close()
+        self.stdout.write(self.style.SUCCESS(f"Facturas de {queryset.count()} pedidos exportadas en {output} ({written} bytes)"))
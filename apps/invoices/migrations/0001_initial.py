@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('orders', '0003_alter_order_order_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='Hash SHA-256')),
+                ('size', models.PositiveIntegerField(verbose_name='Tamaño (bytes)')),
+                ('render_version', models.PositiveSmallIntegerField(verbose_name='Versión de Plantilla')),
+                ('rendered_at', models.DateTimeField(auto_now=True, verbose_name='Renderizada')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='invoice', to='orders.order', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Factura',
+                'verbose_name_plural': 'Facturas',
+                'ordering': ['-rendered_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import models
+
+from apps.orders.models import Order
+
+
+class Invoice(models.Model):
+    """
+    Factura renderizada de un pedido.
+    El PDF se genera una sola vez y se guarda en un almacén direccionado por
+    contenido (ver storage.InvoiceStore); aquí solo se registran sus metadatos.
+    """
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='invoice', verbose_name="Pedido")
+    sha256 = models.CharField(max_length=64, verbose_name="Hash SHA-256")
+    size = models.PositiveIntegerField(verbose_name="Tamaño (bytes)")
+    render_version = models.PositiveSmallIntegerField(verbose_name="Versión de Plantilla")
+    rendered_at = models.DateTimeField(auto_now=True, verbose_name="Renderizada")
+
+    class Meta:
+        ordering = ['-rendered_at']
+        verbose_name = "Factura"
+        verbose_name_plural = "Facturas"
+
+    def __str__(self):
+        return f"Factura del pedido {self.order_id} ({self.sha256[:12]})"
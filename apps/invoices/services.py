@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from apps.orders.models import Order
+from .models import Invoice
+from .storage import InvoiceStore
+from .utils import generate_invoice_pdf
+
+
+def get_or_render_invoice(order, store=None):
+    """
+    Devuelve la factura almacenada del pedido, renderizándola solo si no existe,
+    si su fichero se ha perdido o si se generó con una versión anterior de la plantilla.
+    """
+    store = store or InvoiceStore()
+    try:
+        invoice = order.invoice
+    except Invoice.DoesNotExist:
+        invoice = None
+
+    if is_invoice_current(invoice, store):
+        return invoice
+
+    # Cargar items y usuario de una vez para el renderizado
+    order = Order.objects.select_related('user').prefetch_related('items').get(pk=order.pk)
+    return save_invoice(order, generate_invoice_pdf(order), store)
+
+
+def is_invoice_current(invoice, store):
+    """True si la factura existe, es de la versión actual de la plantilla y su fichero sigue en el almacén."""
+    return (invoice is not None
+            and invoice.render_version == settings.INVOICE_RENDER_VERSION
+            and store.exists(invoice.sha256))
+
+
+def save_invoice(order, content, store):
+    """Guarda el PDF ya renderizado en el almacén y registra/actualiza la factura del pedido."""
+    digest = store.save(content)
+    values = {'sha256': digest, 'size': len(content), 'render_version': settings.INVOICE_RENDER_VERSION}
+
+    try:
+        with transaction.atomic():
+            invoice, _ = Invoice.objects.update_or_create(order=order, defaults=values)
+    except IntegrityError:
+        # Otro proceso la creó a la vez: la suya es igual de válida
+        invoice = Invoice.objects.get(order=order)
+    return invoice
@@ -0,0 +1,53 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+
+class InvoiceStore:
+    """
+    Almacén de PDFs direccionado por contenido bajo settings.INVOICE_STORAGE_ROOT.
+    Cada fichero se guarda como <aa>/<bb>/<sha256>.pdf, así que escribir dos
+    veces el mismo contenido es idempotente y nunca se sobrescribe un PDF distinto.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or settings.INVOICE_STORAGE_ROOT
+
+    def relative_path(self, digest):
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+
+    def path(self, digest):
+        return os.path.join(self.root, self.relative_path(digest))
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def save(self, content):
+        """Guarda el contenido y devuelve su hash SHA-256."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Escritura atómica: fichero temporal en el mismo directorio + rename
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest
+
+    def read(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            return f.read()
+
+    def open(self, digest):
+        return open(self.path(digest), 'rb')
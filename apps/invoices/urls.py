@@ -2,13 +2,17 @@
 
 from django.urls import path
 # Asegúrate de que la importación de tu vista sea correcta
-from .views import DownloadInvoiceView
+from apps.core.asyncviews import async_variant
+from .views import DownloadInvoiceView, AsyncDownloadInvoiceView, ExportInvoicesView
 
 # ESTA LISTA ES LA QUE DJANGO BUSCA:
 urlpatterns = [
     # Define la ruta para descargar la factura.
     # Usa <uuid:order_pk> porque el ID del modelo Order es un UUIDField.
-    path('download/<uuid:order_pk>/', DownloadInvoiceView.as_view(), name='download-invoice'),
+    path('download/<uuid:order_pk>/', async_variant(DownloadInvoiceView, AsyncDownloadInvoiceView).as_view(), name='download-invoice'),
+
+    # Exportación masiva en ZIP para administradores: ?from=&to=&status=
+    path('export/', ExportInvoicesView.as_view(), name='export-invoices'),
 
     # Puedes añadir más rutas relacionadas con facturas aquí si las necesitas en el futuro.
 ]
@@ -1,44 +1,159 @@
-from django.http import HttpResponse, Http404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
 
+from apps.core.asyncviews import AsyncAPIView
 from apps.orders.models import Order
-from .utils import generate_invoice_pdf
+from .export import SlotReleasingStream, acquire_export_slot, filter_orders, stream_invoice_zip
+from .services import get_or_render_invoice
+from .storage import InvoiceStore
+
+def invoice_not_modified(request, invoice):
+    """Respuesta 304 si el cliente ya tiene esta versión de la factura (ETag/Last-Modified), o None."""
+    return get_conditional_response(request, etag=quote_etag(invoice.sha256),
+                                    last_modified=int(invoice.rendered_at.timestamp()))
+
+
+def invoice_response(order, invoice, store, content=None):
+    """
+    Respuesta con el PDF: los bytes de `content` o, si no se pasan, el fichero del almacén.
+    Si está configurado INVOICE_X_ACCEL_REDIRECT_PREFIX lo envía nginx.
+    """
+    accel_prefix = settings.INVOICE_X_ACCEL_REDIRECT_PREFIX
+    if accel_prefix:
+        # nginx sirve el fichero desde su location interna
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{store.relative_path(invoice.sha256)}"
+    elif content is not None:
+        response = HttpResponse(content, content_type='application/pdf')
+    else:
+        response = FileResponse(store.open(invoice.sha256), content_type='application/pdf')
+        response['Content-Length'] = invoice.size
+    response['Content-Disposition'] = f'inline; filename="factura_{order.order_number}.pdf"'
+    # 'inline' intenta mostrarlo en el navegador, 'attachment' fuerza la descarga
+    response['ETag'] = quote_etag(invoice.sha256)
+    response['Last-Modified'] = http_date(int(invoice.rendered_at.timestamp()))
+    response['Cache-Control'] = 'private, no-cache'  # Revalidar siempre (304 barato)
+    return response
+
 
 class DownloadInvoiceView(APIView):
     """
     Permite a un usuario autenticado descargar la factura de SU pedido,
     o a un administrador descargar la factura de CUALQUIER pedido.
+
+    La factura se renderiza una sola vez y se sirve desde el almacén con
+    ETag/Last-Modified (304 si el cliente ya la tiene). Si está configurado
+    INVOICE_X_ACCEL_REDIRECT_PREFIX, nginx envía el fichero en lugar de gunicorn.
     """
     permission_classes = [IsAuthenticated] # Requerir autenticación base
 
     def get(self, request, order_pk, *args, **kwargs):
         try:
-            order = get_object_or_404(Order, pk=order_pk)
+            order = get_object_or_404(Order.objects.select_related('invoice'), pk=order_pk)
 
             # Verificar permisos: ¿Es el dueño del pedido o es admin?
-            if not (order.user == request.user or request.user.is_staff):
+            if not (order.user_id == request.user.pk or request.user.is_staff):
                  return HttpResponse("No tienes permiso para ver esta factura.", status=status.HTTP_403_FORBIDDEN)
 
-            # Generar el PDF
+            # Obtener la factura almacenada (se genera solo la primera vez)
+            store = InvoiceStore()
             try:
-                pdf_content = generate_invoice_pdf(order)
+                invoice = get_or_render_invoice(order, store=store)
             except Exception as e:
                  # Loggear el error e informar al usuario
                  print(f"Error generando PDF para factura {order.order_number} (descarga): {e}")
                  return HttpResponse("Error al generar la factura en PDF.", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # Preparar la respuesta HTTP con el PDF
-            response = HttpResponse(pdf_content, content_type='application/pdf')
-            response['Content-Disposition'] = f'inline; filename="factura_{order.order_number}.pdf"'
-            # 'inline' intenta mostrarlo en el navegador, 'attachment' fuerza la descarga
+            not_modified = invoice_not_modified(request, invoice)
+            if not_modified is not None:
+                return not_modified
 
-            return response
+            return invoice_response(order, invoice, store)
 
         except Http404:
             return HttpResponse("Pedido no encontrado.", status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             print(f"Error inesperado en DownloadInvoiceView para order_pk {order_pk}: {e}")
-            return HttpResponse("Ocurrió un error inesperado.", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return HttpResponse("Ocurrió un error inesperado.", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncDownloadInvoiceView(AsyncAPIView):
+    """
+    Variante asíncrona de DownloadInvoiceView (ASYNC_VIEWS). El pedido se lee
+    con el ORM asíncrono; el render (solo la primera vez) y la lectura del PDF
+    van a un hilo. Sin X-Accel-Redirect el PDF se envía desde memoria: un
+    FileResponse bajo ASGI se leería igualmente entero antes de enviarlo.
+    """
+
+    async def get(self, request, order_pk, *args, **kwargs):
+        user = await self.authenticate(request)
+        try:
+            order = await Order.objects.select_related('invoice').aget(pk=order_pk)
+        except Order.DoesNotExist:
+            return HttpResponse("Pedido no encontrado.", status=status.HTTP_404_NOT_FOUND)
+
+        if not (order.user_id == user.pk or user.is_staff):
+            return HttpResponse("No tienes permiso para ver esta factura.", status=status.HTTP_403_FORBIDDEN)
+
+        store = InvoiceStore()
+        try:
+            invoice = await sync_to_async(get_or_render_invoice)(order, store=store)
+        except Exception as e:
+            print(f"Error generando PDF para factura {order.order_number} (descarga): {e}")
+            return HttpResponse("Error al generar la factura en PDF.", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        not_modified = invoice_not_modified(request, invoice)
+        if not_modified is not None:
+            return not_modified
+
+        content = None
+        if not settings.INVOICE_X_ACCEL_REDIRECT_PREFIX:
+            content = await sync_to_async(store.read, thread_sensitive=False)(invoice.sha256)
+        return invoice_response(order, invoice, store, content)
+
+
+class ExportInvoicesView(APIView):
+    """
+    Exportación masiva para contabilidad (solo administradores).
+    Devuelve un ZIP en streaming con las facturas de los pedidos filtrados por
+    ?from=AAAA-MM-DD&to=AAAA-MM-DD&status=ESTADO.
+    Como mucho INVOICE_EXPORT_MAX_CONCURRENT exportaciones a la vez por proceso (503 si no).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        filters = {}
+        for param, key in (('from', 'date_from'), ('to', 'date_to')):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    filters[key] = parse_date(value)
+                except ValueError:
+                    filters[key] = None
+                if filters[key] is None:
+                    return Response({"error": f"Fecha '{param}' inválida, usa el formato AAAA-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        order_status = request.query_params.get('status')
+        if order_status and order_status not in dict(Order.ORDER_STATUS_CHOICES):
+            return Response({"error": f"Estado '{order_status}' no válido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not acquire_export_slot():
+            response = Response({"error": "Ya hay una exportación en curso, inténtalo en unos minutos."},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = '60'
+            return response
+
+        queryset = filter_orders(status=order_status, **filters)
+        response = StreamingHttpResponse(SlotReleasingStream(stream_invoice_zip(queryset)), content_type='application/zip')
+        suffix = '_'.join(str(v) for v in (filters.get('date_from'), filters.get('date_to'), order_status) if v)
+        response['Content-Disposition'] = f'attachment; filename="facturas{"_" + suffix if suffix else ""}.zip"'
+        return response
@@ -0,0 +1,13 @@
+"""
+Inicialización de los procesos del pool de exportación (apps/invoices/export.py).
+
+Está en un módulo aparte, sin importar modelos: con 'spawn' el proceso hijo
+carga el inicializador antes de que Django esté configurado.
+"""
+import django
+from django.apps import apps
+
+
+def init_worker():
+    if not apps.ready:
+        django.setup()
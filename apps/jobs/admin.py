@@ -0,0 +1,30 @@
+from django.contrib import admin
+
+from .models import Job, DeadLetterJob
+from .queue import enqueue
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'created_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key')
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'created_at', 'updated_at')
+
+
+@admin.register(DeadLetterJob)
+class DeadLetterJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'attempts', 'enqueued_at', 'failed_at')
+    list_filter = ('name', 'failed_at')
+    search_fields = ('name', 'dedup_key', 'last_error')
+    readonly_fields = ('name', 'payload', 'dedup_key', 'attempts', 'last_error', 'enqueued_at', 'failed_at')
+    actions = ['requeue_jobs']
+
+    def requeue_jobs(self, request, queryset):
+        requeued_count = 0
+        for dead_job in queryset:
+            enqueue(dead_job.name, dedup_key=dead_job.dedup_key, **dead_job.payload)
+            dead_job.delete()
+            requeued_count += 1
+        self.message_user(request, f'{requeued_count} trabajos fueron reencolados.')
+    requeue_jobs.short_description = "Reencolar trabajos seleccionados"
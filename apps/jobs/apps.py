@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+    verbose_name = "Cola de Trabajos en Segundo Plano"
+
+    def ready(self):
+        # Registrar las tareas declaradas en los módulos tasks.py de cada app
+        autodiscover_modules('tasks')
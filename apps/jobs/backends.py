@@ -0,0 +1,98 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job, DeadLetterJob
+from .registry import get_task
+
+DEFAULTS = {
+    'BACKEND': 'apps.jobs.backends.DatabaseBackend',
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF_SECONDS': 30,
+    'MAX_RETRY_BACKOFF_SECONDS': 3600,
+    'LOCK_TIMEOUT_SECONDS': 600,
+    'EAGER_PROPAGATE_EXCEPTIONS': False,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'JOB_QUEUE', {}).get(name, DEFAULTS[name])
+
+
+def retry_delay(attempts):
+    """Backoff exponencial: base * 2^(intentos-1), con un tope."""
+    delay = get_setting('RETRY_BACKOFF_SECONDS') * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, get_setting('MAX_RETRY_BACKOFF_SECONDS')))
+
+
+def resolve_max_attempts(name, max_attempts=None):
+    if max_attempts:
+        return max_attempts
+    try:
+        return get_task(name).max_attempts or get_setting('MAX_ATTEMPTS')
+    except KeyError:
+        return get_setting('MAX_ATTEMPTS')
+
+
+class BaseBackend:
+    """Interfaz común de los backends de la cola."""
+
+    def enqueue(self, name, payload, dedup_key=None, run_at=None, max_attempts=None):
+        raise NotImplementedError
+
+
+class DatabaseBackend(BaseBackend):
+    """
+    Guarda el trabajo en la tabla Job para que lo procese el comando `run_jobs`.
+    No necesita ningún broker externo.
+    """
+
+    def enqueue(self, name, payload, dedup_key=None, run_at=None, max_attempts=None):
+        get_task(name)  # Falla pronto si la tarea no existe
+        try:
+            with transaction.atomic():
+                return Job.objects.create(
+                    name=name,
+                    payload=payload,
+                    dedup_key=dedup_key,
+                    run_at=run_at or timezone.now(),
+                    max_attempts=resolve_max_attempts(name, max_attempts),
+                )
+        except IntegrityError:
+            if dedup_key is None:
+                raise
+            # Ya hay un trabajo vivo con la misma clave: no duplicar
+            print(f"Trabajo '{name}' descartado por duplicado (clave {dedup_key})")
+            return None
+
+
+class EagerBackend(BaseBackend):
+    """
+    Ejecuta la tarea en el mismo proceso en el momento de encolarla.
+    Pensado para tests y desarrollo: reintenta inmediatamente y, si se agotan
+    los intentos, registra el trabajo en la tabla de fallidos.
+    """
+
+    def enqueue(self, name, payload, dedup_key=None, run_at=None, max_attempts=None):
+        func = get_task(name)
+        attempts = resolve_max_attempts(name, max_attempts)
+        enqueued_at = timezone.now()
+        last_error = ''
+        for _ in range(attempts):
+            try:
+                func(**payload)
+                return None
+            except Exception:
+                last_error = traceback.format_exc()
+
+        DeadLetterJob.objects.create(
+            name=name, payload=payload, dedup_key=dedup_key, attempts=attempts,
+            last_error=last_error, enqueued_at=enqueued_at,
+        )
+        print(f"Trabajo '{name}' fallido tras {attempts} intentos (modo eager)")
+        if get_setting('EAGER_PROPAGATE_EXCEPTIONS'):
+            raise RuntimeError(f"La tarea '{name}' falló en modo eager:\n{last_error}")
+        return None
@@ -0,0 +1,36 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Ejecuta el worker de la cola de trabajos respaldada por base de datos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Procesa los trabajos pendientes y termina.")
+        parser.add_argument('--batch-size', type=int, default=10, help="Trabajos reclamados por iteración.")
+        parser.add_argument('--sleep', type=float, default=2.0, help="Segundos de espera cuando la cola está vacía.")
+
+    def handle(self, *args, **options):
+        worker = Worker(batch_size=options['batch_size'])
+        self._stop = False
+        # Terminar el lote en curso antes de salir (systemd envía SIGTERM)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write(f"Worker {worker.worker_id} iniciado")
+        while not self._stop:
+            processed = worker.run_once()
+            if processed:
+                self.stdout.write(f"{processed} trabajo(s) procesado(s)")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(f"Worker {worker.worker_id} detenido")
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeadLetterJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Tarea')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('dedup_key', models.CharField(blank=True, max_length=200, null=True, verbose_name='Clave de Deduplicación')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último Error')),
+                ('enqueued_at', models.DateTimeField(verbose_name='Encolado')),
+                ('failed_at', models.DateTimeField(auto_now_add=True, verbose_name='Fallido')),
+            ],
+            options={
+                'verbose_name': 'Trabajo Fallido',
+                'verbose_name_plural': 'Trabajos Fallidos (Dead Letter)',
+                'ordering': ['-failed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Tarea')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parámetros')),
+                ('dedup_key', models.CharField(blank=True, max_length=200, null=True, unique=True, verbose_name='Clave de Deduplicación')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('RUNNING', 'En Ejecución')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Intentos Máximos')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Ejecutar a partir de')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100)),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Trabajo',
+                'verbose_name_plural': 'Trabajos',
+                'ordering': ['run_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx')],
+            },
+        ),
+    ]
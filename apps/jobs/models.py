@@ -0,0 +1,55 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Trabajo pendiente en la cola respaldada por base de datos."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('RUNNING', 'En Ejecución'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="Tarea")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    # Clave de deduplicación: no puede haber dos trabajos vivos con la misma clave
+    dedup_key = models.CharField(max_length=200, unique=True, null=True, blank=True, verbose_name="Clave de Deduplicación")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Intentos Máximos")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Ejecutar a partir de")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='', verbose_name="Último Error")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run_at', 'id']
+        verbose_name = "Trabajo"
+        verbose_name_plural = "Trabajos"
+        indexes = [
+            # El worker busca siempre por estado y fecha de ejecución
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()}, intento {self.attempts}/{self.max_attempts})"
+
+
+class DeadLetterJob(models.Model):
+    """Trabajo que agotó sus reintentos. Se conserva para inspección o reencolado manual."""
+    name = models.CharField(max_length=100, verbose_name="Tarea")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="Parámetros")
+    dedup_key = models.CharField(max_length=200, null=True, blank=True, verbose_name="Clave de Deduplicación")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    last_error = models.TextField(blank=True, default='', verbose_name="Último Error")
+    enqueued_at = models.DateTimeField(verbose_name="Encolado")
+    failed_at = models.DateTimeField(auto_now_add=True, verbose_name="Fallido")
+
+    class Meta:
+        ordering = ['-failed_at']
+        verbose_name = "Trabajo Fallido"
+        verbose_name_plural = "Trabajos Fallidos (Dead Letter)"
+
+    def __str__(self):
+        return f"{self.name} fallido tras {self.attempts} intentos"
@@ -0,0 +1,30 @@
+from functools import partial
+
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .backends import get_setting
+
+_backends = {}
+
+
+def get_backend():
+    """Devuelve (y memoiza) el backend configurado en settings.JOB_QUEUE['BACKEND']."""
+    path = get_setting('BACKEND')
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def enqueue(name, dedup_key=None, run_at=None, max_attempts=None, **payload):
+    """Encola la tarea `name` con el payload dado. Devuelve el Job creado (o None)."""
+    return get_backend().enqueue(name, payload, dedup_key=dedup_key, run_at=run_at, max_attempts=max_attempts)
+
+
+def enqueue_on_commit(name, dedup_key=None, run_at=None, max_attempts=None, **payload):
+    """
+    Encola la tarea solo cuando la transacción actual se confirme.
+    Si la transacción se revierte, el trabajo nunca llega a existir.
+    """
+    transaction.on_commit(partial(enqueue, name, dedup_key=dedup_key, run_at=run_at,
+                                  max_attempts=max_attempts, **payload))
@@ -0,0 +1,27 @@
+# Registro de tareas ejecutables por la cola de trabajos
+
+_registry = {}
+
+
+def task(name, max_attempts=None):
+    """
+    Decorador que registra una función como tarea de la cola.
+    Las tareas reciben su payload como argumentos con nombre, por lo que
+    los parámetros deben ser serializables a JSON (ids, cadenas, números).
+    """
+    def decorator(func):
+        if name in _registry and _registry[name] is not func:
+            raise ValueError(f"Ya existe una tarea registrada con el nombre '{name}'.")
+        func.task_name = name
+        func.max_attempts = max_attempts
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    """Devuelve la función registrada para una tarea o lanza KeyError si no existe."""
+    try:
+        return _registry[name]
+    except KeyError:
+        raise KeyError(f"No hay ninguna tarea registrada con el nombre '{name}'.")
@@ -0,0 +1,96 @@
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .backends import get_setting, retry_delay
+from .models import Job, DeadLetterJob
+from .registry import get_task
+
+
+class Worker:
+    """
+    Procesa trabajos de la tabla Job.
+    Varios workers pueden ejecutarse a la vez: los trabajos se reclaman con
+    SELECT ... FOR UPDATE SKIP LOCKED, de modo que nunca se reparten dos veces
+    (en SQLite, que no soporta bloqueo de filas, se recomienda un único worker).
+    """
+
+    def __init__(self, batch_size=10, worker_id=None):
+        self.batch_size = batch_size
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    def claim_batch(self):
+        """Reclama hasta `batch_size` trabajos listos (o abandonados por un worker caído)."""
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=get_setting('LOCK_TIMEOUT_SECONDS'))
+        with transaction.atomic():
+            jobs = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='PENDING', run_at__lte=now) | Q(status='RUNNING', locked_at__lt=stale_before))
+                .order_by('run_at', 'id')[:self.batch_size]
+            )
+            if jobs:
+                Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                    status='RUNNING', locked_at=now, locked_by=self.worker_id, attempts=F('attempts') + 1,
+                )
+        for job in jobs:
+            job.status = 'RUNNING'
+            job.attempts += 1
+        return jobs
+
+    def run_job(self, job):
+        """Ejecuta un trabajo reclamado. Devuelve True si terminó bien."""
+        try:
+            func = get_task(job.name)
+        except KeyError as e:
+            # Una tarea desconocida nunca va a funcionar: directa a la tabla de fallidos
+            self._dead_letter(job, str(e))
+            return False
+
+        try:
+            func(**job.payload)
+        except Exception:
+            self._handle_failure(job, traceback.format_exc())
+            return False
+
+        # Los trabajos completados se borran para mantener la tabla pequeña
+        Job.objects.filter(pk=job.pk).delete()
+        return True
+
+    def run_once(self):
+        """Reclama y ejecuta un lote. Devuelve el número de trabajos procesados."""
+        jobs = self.claim_batch()
+        for job in jobs:
+            self.run_job(job)
+        return len(jobs)
+
+    def _handle_failure(self, job, error):
+        if job.attempts >= job.max_attempts:
+            self._dead_letter(job, error)
+            return
+        Job.objects.filter(pk=job.pk).update(
+            status='PENDING',
+            run_at=timezone.now() + retry_delay(job.attempts),
+            locked_at=None,
+            locked_by='',
+            last_error=error,
+        )
+        print(f"Trabajo {job.pk} ('{job.name}') falló en el intento {job.attempts}/{job.max_attempts}; se reintentará")
+
+    def _dead_letter(self, job, error):
+        with transaction.atomic():
+            DeadLetterJob.objects.create(
+                name=job.name,
+                payload=job.payload,
+                dedup_key=job.dedup_key,
+                attempts=job.attempts,
+                last_error=error,
+                enqueued_at=job.created_at,
+            )
+            Job.objects.filter(pk=job.pk).delete()
+        print(f"Trabajo {job.pk} ('{job.name}') movido a la tabla de fallidos tras {job.attempts} intentos")
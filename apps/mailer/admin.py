@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'to', 'provider', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'provider', 'created_at')
+    search_fields = ('subject', 'to', 'last_error')
+    readonly_fields = ('provider', 'from_email', 'to', 'subject', 'body', 'html_body', 'attachments', 'attempts',
+                       'locked_at', 'last_error', 'sent_at', 'created_at')
+    actions = ['retry_emails']
+
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status='SENT').update(
+            status='PENDING', attempts=0, next_attempt_at=timezone.now(), locked_at=None,
+        )
+        self.message_user(request, f'{updated} emails volverán a enviarse.')
+    retry_emails.short_description = "Reintentar emails seleccionados"
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from apps.mailer.rendering import EmailTemplate, render_stats, shared_context
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Renderiza N confirmaciones de pedido con render_to_string + strip_tags (método anterior) "
+        "y con las plantillas precompiladas de texto y HTML (apps/mailer/rendering.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Emails renderizados por método.")
+
+    def handle(self, *args, **options):
+        order = (Order.objects.filter(items__isnull=False, user__isnull=False)
+                 .select_related('user').prefetch_related('items').first())
+        if order is None:
+            raise CommandError("Hace falta al menos un pedido con productos para el benchmark.")
+        count = options['count']
+        context = {'order': order, 'user': order.user}
+
+        started = time.perf_counter()
+        for _ in range(count):
+            html = render_to_string('emails/order_confirmation.html', {**shared_context(), **context})
+            strip_tags(html)
+        baseline = time.perf_counter() - started
+
+        template = EmailTemplate('order_confirmation')
+        started = time.perf_counter()
+        for _ in range(count):
+            template.render(context)
+        precompiled = time.perf_counter() - started
+        render_stats.flush()
+
+        self.stdout.write(f"{count} confirmaciones del pedido {order.order_number} ({order.items.count()} productos)")
+        self.stdout.write(f"render_to_string + strip_tags: {baseline:.2f}s ({baseline / count * 1000:.3f} ms por email)")
+        self.stdout.write(f"plantillas precompiladas texto + HTML: {precompiled:.2f}s "
+                          f"({precompiled / count * 1000:.3f} ms por email, x{baseline / precompiled:.1f})")
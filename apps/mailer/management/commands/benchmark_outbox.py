@@ -0,0 +1,87 @@
+import time
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.mailer.models import OutboundEmail
+from apps.mailer.outbox import queue_mail
+from apps.mailer.sender import OutboxSender
+from apps.mailer.smtp_stub import LocalSMTPServer
+
+PROVIDER = 'benchmark'
+ASYNC_PROVIDER = 'benchmark-async'
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide emails por segundo contra un servidor SMTP local con latencia simulada: "
+        "send_mail con una conexión por email (comportamiento anterior) frente a la bandeja de salida "
+        "(queue_mail + sender con conexión reutilizada, y con varias conexiones a la vez con el transporte asíncrono)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200, help="Emails por modo.")
+        parser.add_argument('--batch-size', type=int, default=50, help="Lote del sender.")
+        parser.add_argument('--connections', type=int, default=4, help="Conexiones del transporte asíncrono.")
+        parser.add_argument('--connect-delay-ms', type=float, default=100, help="Latencia al abrir cada conexión SMTP.")
+        parser.add_argument('--message-delay-ms', type=float, default=5, help="Latencia por mensaje aceptado.")
+
+    def handle(self, *args, **options):
+        total = options['messages']
+        server = LocalSMTPServer(options['connect_delay_ms'] / 1000, options['message_delay_ms'] / 1000).start()
+        smtp = {'host': '127.0.0.1', 'port': server.port, 'use_tls': False, 'username': '', 'password': ''}
+        mailer = {
+            'BATCH_SIZE': options['batch_size'],
+            'PROVIDERS': {
+                PROVIDER: {'BACKEND': 'django.core.mail.backends.smtp.EmailBackend', 'OPTIONS': smtp},
+                ASYNC_PROVIDER: {'BACKEND': 'django.core.mail.backends.smtp.EmailBackend', 'OPTIONS': smtp,
+                                 'CONNECTIONS': options['connections']},
+            },
+        }
+        try:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+                                   EMAIL_PORT=server.port, EMAIL_USE_TLS=False, EMAIL_HOST_USER='',
+                                   EMAIL_HOST_PASSWORD='', MAILER=mailer):
+                started = time.perf_counter()
+                for i in range(total):
+                    send_mail(f"Benchmark {i}", "Cuerpo de prueba.", None, ['benchmark@localhost'])
+                direct = time.perf_counter() - started
+                direct_connections = server.connections
+
+                started = time.perf_counter()
+                for i in range(total):
+                    queue_mail(f"Benchmark {i}", "Cuerpo de prueba.", ['benchmark@localhost'], provider=PROVIDER)
+                queued = time.perf_counter() - started
+
+                sender = OutboxSender()
+                started = time.perf_counter()
+                while sender.run_once():
+                    pass
+                sender.close()
+                outbox = time.perf_counter() - started
+                outbox_connections = server.connections - direct_connections
+                sent = OutboundEmail.objects.filter(provider=PROVIDER, status='SENT').count()
+
+                for i in range(total):
+                    queue_mail(f"Benchmark {i}", "Cuerpo de prueba.", ['benchmark@localhost'], provider=ASYNC_PROVIDER)
+                sender = OutboxSender()
+                started = time.perf_counter()
+                while sender.run_once():
+                    pass
+                sender.close()
+                concurrent = time.perf_counter() - started
+                concurrent_connections = server.connections - direct_connections - outbox_connections
+                concurrent_sent = OutboundEmail.objects.filter(provider=ASYNC_PROVIDER, status='SENT').count()
+        finally:
+            server.stop()
+            OutboundEmail.objects.filter(provider__in=[PROVIDER, ASYNC_PROVIDER]).delete()
+
+        self.stdout.write(f"{total} emails, {options['connect_delay_ms']:.0f} ms por conexión y "
+                          f"{options['message_delay_ms']:.0f} ms por mensaje")
+        self.stdout.write(f"send_mail directo: {total / direct:.1f} emails/s ({direct_connections} conexiones)")
+        self.stdout.write(f"queue_mail (coste en la petición): {queued / total * 1000:.2f} ms por email")
+        self.stdout.write(f"sender de la bandeja: {sent / outbox:.1f} emails/s ({outbox_connections} conexión(es), "
+                          f"{sent}/{total} enviados)")
+        self.stdout.write(f"sender con transporte asíncrono: {concurrent_sent / concurrent:.1f} emails/s "
+                          f"({concurrent_connections} conexión(es), {concurrent_sent}/{total} enviados)")
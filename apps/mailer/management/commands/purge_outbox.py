@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.mailer.models import OutboundEmail
+from apps.mailer.outbox import get_setting
+
+
+class Command(BaseCommand):
+    help = "Elimina los emails enviados o fallidos más antiguos que MAILER['RETENTION_DAYS'] (ejecutar periódicamente con cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Emails eliminados por consulta.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=get_setting('RETENTION_DAYS'))
+        total = 0
+        while True:
+            # Por lotes para no mantener un bloqueo largo sobre la tabla
+            ids = list(OutboundEmail.objects.filter(status__in=('SENT', 'FAILED'), created_at__lt=cutoff)
+                       .values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            total += OutboundEmail.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(f"{total} email(s) eliminado(s) de la bandeja de salida")
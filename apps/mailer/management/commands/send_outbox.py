@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.mailer.sender import OutboxSender
+
+
+class Command(BaseCommand):
+    help = "Envía los emails de la bandeja de salida (OutboundEmail) reutilizando la conexión SMTP."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Envía los emails pendientes y termina.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Emails reclamados por lote (MAILER['BATCH_SIZE']).")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Segundos de espera cuando no hay nada que enviar.")
+        parser.add_argument('--idle-timeout', type=float, default=30.0,
+                            help="Segundos sin enviar tras los que se cierra la conexión SMTP.")
+
+    def handle(self, *args, **options):
+        sender = OutboxSender(batch_size=options['batch_size'])
+        self._stop = False
+        # Terminar el lote en curso antes de salir (systemd envía SIGTERM)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write("Sender de la bandeja de salida iniciado")
+        try:
+            while not self._stop:
+                processed = sender.run_once()
+                if processed:
+                    self.stdout.write(f"{processed} email(s) procesado(s)")
+                    continue
+                if options['once']:
+                    break
+                sender.close_idle(options['idle_timeout'])
+                time.sleep(options['sleep'])
+        finally:
+            sender.close()
+        self.stdout.write("Sender de la bandeja de salida detenido")
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='default', max_length=50, verbose_name='Proveedor')),
+                ('from_email', models.CharField(max_length=254, verbose_name='Remitente')),
+                ('to', models.JSONField(default=list, verbose_name='Destinatarios')),
+                ('subject', models.CharField(max_length=255, verbose_name='Asunto')),
+                ('body', models.TextField(blank=True, default='', verbose_name='Texto Plano')),
+                ('html_body', models.TextField(blank=True, default='', verbose_name='HTML')),
+                ('attachments', models.JSONField(blank=True, default=list, verbose_name='Adjuntos')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('SENDING', 'Enviando'), ('SENT', 'Enviado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='Intentos Máximos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Enviar a partir de')),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último Error')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Email Saliente',
+                'verbose_name_plural': 'Emails Salientes',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['provider', 'status', 'next_attempt_at'], name='outbox_provider_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """Email pendiente o enviado. Lo entrega el comando send_outbox (apps/mailer/sender.py)."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('SENDING', 'Enviando'),
+        ('SENT', 'Enviado'),
+        ('FAILED', 'Fallido'),
+    ]
+
+    provider = models.CharField(max_length=50, default='default', verbose_name="Proveedor")
+    from_email = models.CharField(max_length=254, verbose_name="Remitente")
+    to = models.JSONField(default=list, verbose_name="Destinatarios")
+    subject = models.CharField(max_length=255, verbose_name="Asunto")
+    body = models.TextField(blank=True, default='', verbose_name="Texto Plano")
+    html_body = models.TextField(blank=True, default='', verbose_name="HTML")
+    # Ficheros del disco compartido con el sender: [{'filename', 'mimetype', 'path'}]
+    attachments = models.JSONField(default=list, blank=True, verbose_name="Adjuntos")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name="Intentos Máximos")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Enviar a partir de")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='', verbose_name="Último Error")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Email Saliente"
+        verbose_name_plural = "Emails Salientes"
+        indexes = [
+            # El sender busca siempre por proveedor, estado y fecha del siguiente intento
+            models.Index(fields=['provider', 'status', 'next_attempt_at'], name='outbox_provider_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.get_status_display()})"
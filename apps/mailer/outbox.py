@@ -0,0 +1,84 @@
+"""
+Bandeja de salida de emails.
+
+queue_mail sustituye a send_mail: guarda el email en OutboundEmail (dentro
+de la transacción en curso, así que un rollback tampoco envía nada) y
+vuelve enseguida. El comando send_outbox lo entrega después reutilizando la
+conexión SMTP, con límite de envíos por proveedor y reintentos con backoff.
+"""
+import mimetypes
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+
+from .models import OutboundEmail
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF_SECONDS': 60,
+    'MAX_RETRY_BACKOFF_SECONDS': 3600,
+    'LOCK_TIMEOUT_SECONDS': 600,
+    'RETENTION_DAYS': 30,
+    'PROVIDERS': {'default': {}},
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'MAILER', {}).get(name, DEFAULTS[name])
+
+
+def retry_delay(attempts):
+    """Backoff exponencial: base * 2^(intentos-1), con un tope."""
+    delay = get_setting('RETRY_BACKOFF_SECONDS') * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, get_setting('MAX_RETRY_BACKOFF_SECONDS')))
+
+
+def attachment_from_path(path, filename=None, mimetype=None):
+    """Adjunto para queue_mail a partir de un fichero que el sender puede leer (ej: InvoiceStore)."""
+    filename = filename or os.path.basename(path)
+    return {
+        'filename': filename,
+        'mimetype': mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        'path': path,
+    }
+
+
+def _outbound(subject, message, recipient_list, from_email, html_message, attachments, provider):
+    return OutboundEmail(
+        provider=provider,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+        subject=subject,
+        body=message or '',
+        html_body=html_message or '',
+        attachments=attachments or [],
+        max_attempts=get_setting('MAX_ATTEMPTS'),
+    )
+
+
+def queue_mail(subject, message, recipient_list, from_email=None, html_message=None, attachments=None, provider='default'):
+    """Encola un email (acepta los argumentos con nombre de send_mail). Devuelve el OutboundEmail creado."""
+    email = _outbound(subject, message, recipient_list, from_email, html_message, attachments, provider)
+    email.save()
+    return email
+
+
+async def aqueue_mail(subject, message, recipient_list, from_email=None, html_message=None, attachments=None, provider='default'):
+    """Como queue_mail, para las vistas asíncronas."""
+    email = _outbound(subject, message, recipient_list, from_email, html_message, attachments, provider)
+    await email.asave()
+    return email
+
+
+def build_message(email, connection=None):
+    """EmailMultiAlternatives listo para enviar a partir de un OutboundEmail."""
+    message = EmailMultiAlternatives(email.subject, email.body, email.from_email, email.to, connection=connection)
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    for attachment in email.attachments:
+        with open(attachment['path'], 'rb') as f:
+            message.attach(attachment['filename'], f.read(), attachment['mimetype'])
+    return message
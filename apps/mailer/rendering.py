@@ -0,0 +1,104 @@
+"""
+Plantillas de los emails transaccionales.
+
+Cada email tiene dos plantillas, emails/<nombre>.html y emails/<nombre>.txt:
+la versión de texto se renderiza de la suya, en lugar de pasar el HTML
+completo (estilos incluidos) por strip_tags en cada envío. Las plantillas
+se cargan y compilan una vez por proceso (en DEBUG se vuelven a pedir al
+motor para ver los cambios) y el contexto común a todos los emails
+(restaurante, URL del frontend) se calcula una sola vez.
+
+El tiempo de render se acumula en memoria y se vuelca a las métricas
+(email.render_seconds.<nombre>) cada RENDER_METRICS_FLUSH_EVERY renders o
+RENDER_METRICS_FLUSH_SECONDS segundos, para no escribir en la caché en cada email.
+"""
+import os
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.core import metrics
+
+RENDER_METRICS_FLUSH_EVERY = 100
+RENDER_METRICS_FLUSH_SECONDS = 10
+
+
+@lru_cache(maxsize=None)
+def _static_context():
+    return {
+        'restaurant_name': settings.RESTAURANT_NAME,
+        'frontend_url': os.getenv('FRONTEND_URL', ''),
+    }
+
+
+def shared_context():
+    """Variables disponibles en todas las plantillas de email (el contexto de cada email las puede sustituir)."""
+    return {**_static_context(), 'current_year': timezone.now().year}
+
+
+class RenderStats:
+    """Tiempos de render pendientes de volcar a apps.core.metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._count = 0
+        self._flushed_at = time.monotonic()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self._pending.setdefault(name, []).append(seconds)
+            self._count += 1
+            due = (self._count >= RENDER_METRICS_FLUSH_EVERY
+                   or time.monotonic() - self._flushed_at >= RENDER_METRICS_FLUSH_SECONDS)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending, self._count = self._pending, {}, 0
+            self._flushed_at = time.monotonic()
+        for name, values in pending.items():
+            metrics.observe(f'email.render_seconds.{name}', values)
+
+
+render_stats = RenderStats()
+
+
+class EmailTemplate:
+    """Par de plantillas compiladas (texto y HTML) de un email."""
+
+    def __init__(self, name):
+        self.name = name
+        self.text_template = get_template(f'emails/{name}.txt')
+        self.html_template = get_template(f'emails/{name}.html')
+
+    def render(self, context):
+        """Devuelve (texto, html)."""
+        context = {**shared_context(), **context}
+        started = time.perf_counter()
+        text = self.text_template.render(context)
+        html = self.html_template.render(context)
+        render_stats.record(self.name, time.perf_counter() - started)
+        return text, html
+
+
+_templates = {}
+
+
+def get_email_template(name):
+    if settings.DEBUG:
+        return EmailTemplate(name)
+    template = _templates.get(name)
+    if template is None:
+        template = _templates[name] = EmailTemplate(name)
+    return template
+
+
+def render_email(name, context):
+    """Renderiza el email `name` (ej: 'order_confirmation'). Devuelve (texto, html)."""
+    return get_email_template(name).render(context)
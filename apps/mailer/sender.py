@@ -0,0 +1,197 @@
+"""
+Entrega de la bandeja de salida (comando send_outbox).
+
+Por cada proveedor de MAILER['PROVIDERS'] el sender mantiene una conexión
+abierta mientras hay emails que enviar (se cierra tras un rato sin uso) y un
+cubo de fichas con su límite de envíos por minuto. Los emails se reclaman
+por lotes con SELECT ... FOR UPDATE SKIP LOCKED, como los trabajos de
+apps.jobs, así que se pueden ejecutar varias réplicas; el límite es por
+proceso, con varias réplicas hay que repartirlo entre ellas.
+Un proveedor con CONNECTIONS > 1 envía cada lote por varias conexiones a la
+vez con el transporte asíncrono de apps.mailer.transport.
+Los fallos se reintentan con backoff exponencial hasta MAX_ATTEMPTS; los
+permanentes (destinatarios rechazados, adjunto inexistente) pasan a FAILED.
+"""
+import asyncio
+import smtplib
+import time
+from datetime import timedelta
+
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.core import metrics
+from .models import OutboundEmail
+from .outbox import build_message, get_setting, retry_delay
+from .transport import PERMANENT_ERRORS as ASYNC_PERMANENT_ERRORS, AsyncTransport
+
+# Errores que no se arreglan reintentando
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, FileNotFoundError) + ASYNC_PERMANENT_ERRORS
+
+
+class RateLimiter:
+    """Cubo de fichas: `rate_per_minute` envíos por minuto, con ráfagas de hasta `burst`."""
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def available(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return int(self.tokens)
+
+    def consume(self, count):
+        self.tokens -= count
+
+
+class Provider:
+    """Conexión (o conexiones, con el transporte asíncrono) reutilizable y límite de envíos de un proveedor."""
+
+    def __init__(self, name, config, batch_size):
+        self.name = name
+        self.backend = config.get('BACKEND')  # None: EMAIL_BACKEND
+        self.options = config.get('OPTIONS', {})
+        rate = config.get('RATE_PER_MINUTE', 0)
+        self.limiter = RateLimiter(rate, burst=batch_size) if rate else None
+        self.connection = None
+        self.last_used = None
+        connections = config.get('CONNECTIONS', 1)
+        self.transport = AsyncTransport(self.backend, self.options, connections) if connections > 1 else None
+        self.loop = None  # Bucle propio: las conexiones de aiosmtplib viven en él entre lotes
+
+    def get_connection(self):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False, **self.options)
+            self.connection.open()
+        self.last_used = time.monotonic()
+        return self.connection
+
+    def send_concurrently(self, messages):
+        """Envía los mensajes con el transporte asíncrono. Devuelve el error de cada uno (None si se envió)."""
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        errors = self.loop.run_until_complete(self.transport.send(messages))
+        self.last_used = time.monotonic()
+        return errors
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass  # La conexión ya estaba rota
+            self.connection = None
+        if self.loop is not None:
+            self.loop.run_until_complete(self.transport.close())
+
+
+class OutboxSender:
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or get_setting('BATCH_SIZE')
+        self.providers = [Provider(name, config, self.batch_size)
+                          for name, config in get_setting('PROVIDERS').items()]
+
+    def claim_batch(self, provider, limit):
+        """Reclama hasta `limit` emails listos del proveedor (o abandonados por un sender caído)."""
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=get_setting('LOCK_TIMEOUT_SECONDS'))
+        with transaction.atomic():
+            emails = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='PENDING', next_attempt_at__lte=now) | Q(status='SENDING', locked_at__lt=stale_before),
+                        provider=provider.name)
+                .order_by('next_attempt_at', 'id')[:limit]
+            )
+            if emails:
+                OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                    status='SENDING', locked_at=now, attempts=F('attempts') + 1,
+                )
+        for email in emails:
+            email.attempts += 1
+        return emails
+
+    def send_batch(self, provider, emails):
+        """Envía los emails por la conexión del proveedor. Devuelve (enviados, [(email, error)])."""
+        sent, failed = [], []
+        if provider.transport is not None:
+            ready = []
+            for email in emails:
+                try:
+                    ready.append((email, build_message(email)))
+                except FileNotFoundError as e:
+                    failed.append((email, e))
+            errors = provider.send_concurrently([message for _, message in ready]) if ready else []
+            for (email, _), error in zip(ready, errors):
+                if error is None:
+                    sent.append(email)
+                else:
+                    failed.append((email, error))
+            return sent, failed
+
+        for email in emails:
+            try:
+                message = build_message(email)
+            except FileNotFoundError as e:
+                failed.append((email, e))
+                continue
+            try:
+                if not provider.get_connection().send_messages([message]):
+                    raise smtplib.SMTPException("El servidor no aceptó el mensaje.")
+                sent.append(email)
+            except Exception as e:
+                failed.append((email, e))
+                # La conexión puede haber quedado rota: el siguiente email abre otra
+                provider.close()
+        return sent, failed
+
+    def record_results(self, sent, failed):
+        now = timezone.now()
+        if sent:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in sent]).update(
+                status='SENT', sent_at=now, locked_at=None, last_error='',
+            )
+            metrics.observe('mailer.delivery_lag_seconds', [(now - email.created_at).total_seconds() for email in sent])
+        for email, error in failed:
+            last_error = f"{type(error).__name__}: {error}"
+            if isinstance(error, PERMANENT_ERRORS) or email.attempts >= email.max_attempts:
+                OutboundEmail.objects.filter(pk=email.pk).update(status='FAILED', locked_at=None, last_error=last_error)
+                print(f"Email {email.pk} a {', '.join(email.to)} fallido tras {email.attempts} intento(s): {last_error}")
+            else:
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status='PENDING', next_attempt_at=now + retry_delay(email.attempts), locked_at=None, last_error=last_error,
+                )
+                print(f"Email {email.pk} falló en el intento {email.attempts}/{email.max_attempts}; se reintentará")
+        if failed:
+            metrics.observe('mailer.failures', len(failed))
+
+    def run_once(self):
+        """Envía un lote por proveedor (respetando su límite). Devuelve el número de emails procesados."""
+        processed = 0
+        for provider in self.providers:
+            limit = self.batch_size if provider.limiter is None else min(self.batch_size, provider.limiter.available())
+            if not limit:
+                continue
+            emails = self.claim_batch(provider, limit)
+            if not emails:
+                continue
+            if provider.limiter is not None:
+                provider.limiter.consume(len(emails))
+            self.record_results(*self.send_batch(provider, emails))
+            processed += len(emails)
+        return processed
+
+    def close_idle(self, max_idle_seconds):
+        """Cierra las conexiones sin uso desde hace más de `max_idle_seconds` (los servidores SMTP las cortan)."""
+        for provider in self.providers:
+            if provider.last_used is not None and time.monotonic() - provider.last_used > max_idle_seconds:
+                provider.close()
+
+    def close(self):
+        for provider in self.providers:
+            provider.close()
@@ -0,0 +1,82 @@
+"""
+Servidor SMTP local para pruebas y benchmarks (en la línea de aiosmtpd, sin dependencias).
+
+Acepta cualquier mensaje sin entregarlo, simula la latencia de un proveedor
+real (al conectar y al aceptar cada mensaje) y cuenta conexiones y mensajes.
+Los destinatarios de `reject_recipients` se rechazan con 550, como un buzón
+inexistente (tests de apps/mailer).
+Corre en un hilo propio con su bucle de eventos:
+
+    with LocalSMTPServer(connect_delay=0.1, message_delay=0.01) as server:
+        ... EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.port, EMAIL_USE_TLS=False ...
+"""
+import asyncio
+import threading
+
+
+class LocalSMTPServer:
+    def __init__(self, connect_delay=0.0, message_delay=0.0, reject_recipients=()):
+        self.connect_delay = connect_delay
+        self.message_delay = message_delay
+        self.reject_recipients = {address.lower() for address in reject_recipients}
+        self.port = None
+        self.connections = 0
+        self.accepted = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.connect_delay)  # DNS, TCP y TLS de un proveedor remoto
+        writer.write(b'220 localhost ESMTP stub\r\n')
+        await writer.drain()
+        in_data = False
+        while line := await reader.readline():
+            if in_data:
+                if line == b'.\r\n':
+                    in_data = False
+                    await asyncio.sleep(self.message_delay)
+                    self.accepted += 1
+                    writer.write(b'250 OK\r\n')
+                    await writer.drain()
+                continue
+            command = line[:4].upper()
+            if command == b'DATA':
+                in_data = True
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+            elif command == b'RCPT' and self._recipient(line) in self.reject_recipients:
+                writer.write(b'550 No such user\r\n')
+            elif command == b'QUIT':
+                writer.write(b'221 Bye\r\n')
+                await writer.drain()
+                break
+            else:
+                writer.write(b'250 OK\r\n')
+            await writer.drain()
+        writer.close()
+
+    @staticmethod
+    def _recipient(line):
+        # RCPT TO:<dirección> [parámetros]
+        return line.decode(errors='replace').partition('<')[2].partition('>')[0].lower()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, '127.0.0.1', 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,134 @@
+import socket
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import OutboundEmail
+from .outbox import queue_mail
+from .sender import OutboxSender
+from .smtp_stub import LocalSMTPServer
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+REFUSED = 'inexistente@example.com'
+
+
+def mailer_settings(port, **provider):
+    return {
+        'BATCH_SIZE': 10,
+        'MAX_ATTEMPTS': 3,
+        'RETRY_BACKOFF_SECONDS': 60,
+        'LOCK_TIMEOUT_SECONDS': 600,
+        'PROVIDERS': {'test': {
+            'BACKEND': SMTP_BACKEND,
+            'OPTIONS': {'host': '127.0.0.1', 'port': port, 'use_tls': False, 'username': '', 'password': '', 'timeout': 5},
+            **provider,
+        }},
+    }
+
+
+def closed_port():
+    """Puerto local sin nadie escuchando: la conexión SMTP falla al abrirse."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class OutboxSenderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = LocalSMTPServer(reject_recipients=[REFUSED]).start()
+        cls.addClassCleanup(cls.server.stop)
+
+    def queue(self, count=1, to='cliente@example.com', **kwargs):
+        return [queue_mail(f"Prueba {i}", "Cuerpo.", [to], provider='test', **kwargs) for i in range(count)]
+
+    def run_sender(self, port=None, **provider):
+        with override_settings(MAILER=mailer_settings(port or self.server.port, **provider)):
+            sender = OutboxSender()
+            try:
+                return sender.run_once()
+            finally:
+                sender.close()
+
+    def test_sends_batch_over_one_connection(self):
+        emails = self.queue(3)
+        connections, accepted = self.server.connections, self.server.accepted
+        self.assertEqual(self.run_sender(), 3)
+        self.assertEqual(self.server.connections - connections, 1)
+        self.assertEqual(self.server.accepted - accepted, 3)
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.locked_at), ('SENT', 1, None))
+            self.assertIsNotNone(email.sent_at)
+        self.assertEqual(self.run_sender(), 0)  # Nada pendiente
+
+    def test_async_transport_spreads_batch_over_connections(self):
+        self.queue(6)
+        connections = self.server.connections
+        with override_settings(EMAIL_BACKEND=SMTP_BACKEND):
+            self.assertEqual(self.run_sender(CONNECTIONS=3), 6)
+        self.assertEqual(self.server.connections - connections, 3)
+        self.assertEqual(OutboundEmail.objects.filter(provider='test', status='SENT').count(), 6)
+
+    def test_connection_failure_retries_with_backoff(self):
+        email, = self.queue()
+        port = closed_port()
+        started = timezone.now()
+        self.assertEqual(self.run_sender(port), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('PENDING', 1))
+        self.assertIn('ConnectionRefusedError', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=60))
+        self.assertLessEqual(email.next_attempt_at, timezone.now() + timedelta(seconds=60))
+
+        self.assertEqual(self.run_sender(port), 0)  # Aún no toca reintentar
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        started = timezone.now()
+        self.run_sender(port)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('PENDING', 2))
+        self.assertGreaterEqual(email.next_attempt_at, started + timedelta(seconds=120))  # Backoff exponencial
+
+    def test_fails_after_max_attempts(self):
+        email, = self.queue()
+        OutboundEmail.objects.filter(pk=email.pk).update(attempts=2, max_attempts=3)
+        self.run_sender(closed_port())
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.locked_at), ('FAILED', 3, None))
+
+    def test_permanent_errors_fail_at_once(self):
+        refused, = self.queue(to=REFUSED)
+        missing, = self.queue(attachments=[{'filename': 'factura.pdf', 'mimetype': 'application/pdf',
+                                            'path': '/nonexistent/factura.pdf'}])
+        ok, = self.queue()
+        self.assertEqual(self.run_sender(), 3)
+        for email, status in ((refused, 'FAILED'), (missing, 'FAILED'), (ok, 'SENT')):
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (status, 1))
+        self.assertIn('SMTPRecipientsRefused', refused.last_error)
+        self.assertIn('FileNotFoundError', missing.last_error)
+
+    def test_reclaims_only_stale_sending_emails(self):
+        stale, recent = self.queue(2)
+        OutboundEmail.objects.filter(pk=stale.pk).update(status='SENDING', attempts=1,
+                                                          locked_at=timezone.now() - timedelta(seconds=700))
+        OutboundEmail.objects.filter(pk=recent.pk).update(status='SENDING', attempts=1, locked_at=timezone.now())
+        self.assertEqual(self.run_sender(), 1)
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual((stale.status, stale.attempts), ('SENT', 2))
+        self.assertEqual(recent.status, 'SENDING')  # Otro sender lo está enviando
+
+    def test_rate_limit_caps_emails_per_run(self):
+        self.queue(5)
+        with override_settings(MAILER={**mailer_settings(self.server.port, RATE_PER_MINUTE=2), 'BATCH_SIZE': 2}):
+            sender = OutboxSender()
+            try:
+                self.assertEqual(sender.run_once(), 2)
+                self.assertEqual(sender.run_once(), 0)  # Sin fichas hasta que pase medio minuto
+            finally:
+                sender.close()
+        self.assertEqual(OutboundEmail.objects.filter(provider='test', status='PENDING').count(), 3)
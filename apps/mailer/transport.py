@@ -0,0 +1,127 @@
+"""
+Transporte asíncrono del sender (proveedores con CONNECTIONS > 1).
+
+Cada lote se reparte entre varias conexiones SMTP simultáneas del proveedor:
+mientras el servidor responde a un mensaje, las demás conexiones siguen
+enviando. Con el backend SMTP y aiosmtplib instalado (requirements.txt)
+las conexiones son de aiosmtplib y comparten el bucle de eventos del sender;
+con cualquier otro backend (consola, locmem en desarrollo) o sin aiosmtplib,
+cada conexión es una del backend de Django usada desde un hilo aparte.
+"""
+import asyncio
+import smtplib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import get_connection
+
+try:
+    import aiosmtplib
+except ImportError:  # Solo se instala en producción
+    aiosmtplib = None
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+# Errores de aiosmtplib que tampoco se arreglan reintentando (ver sender.PERMANENT_ERRORS)
+PERMANENT_ERRORS = (aiosmtplib.SMTPRecipientsRefused,) if aiosmtplib is not None else ()
+
+
+class ThreadLane:
+    """Conexión del backend de Django; cada envío se ejecuta en un hilo aparte."""
+
+    def __init__(self, backend, options):
+        self.backend = backend
+        self.options = options
+        self.connection = None
+
+    def _send(self, message):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False, **self.options)
+            self.connection.open()
+        if not self.connection.send_messages([message]):
+            raise smtplib.SMTPException("El servidor no aceptó el mensaje.")
+
+    def _close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass  # La conexión ya estaba rota
+            self.connection = None
+
+    async def send(self, message):
+        # thread_sensitive=False: las conexiones esperan en paralelo, cada una en su hilo
+        await sync_to_async(self._send, thread_sensitive=False)(message)
+
+    async def close(self):
+        await sync_to_async(self._close, thread_sensitive=False)()
+
+
+class AioSMTPLane:
+    """Conexión de aiosmtplib con las mismas opciones que el backend SMTP de Django."""
+
+    def __init__(self, options):
+        self.options = options
+        self.client = None
+
+    def _option(self, name, setting):
+        value = self.options.get(name)
+        return value if value is not None else getattr(settings, setting, None)
+
+    async def _connect(self):
+        client = aiosmtplib.SMTP(
+            hostname=self._option('host', 'EMAIL_HOST'),
+            port=self._option('port', 'EMAIL_PORT'),
+            use_tls=bool(self._option('use_ssl', 'EMAIL_USE_SSL')),
+            start_tls=bool(self._option('use_tls', 'EMAIL_USE_TLS')),
+            timeout=self._option('timeout', 'EMAIL_TIMEOUT'),
+        )
+        await client.connect()
+        username = self._option('username', 'EMAIL_HOST_USER')
+        if username:
+            await client.login(username, self._option('password', 'EMAIL_HOST_PASSWORD') or '')
+        return client
+
+    async def send(self, message):
+        if self.client is None:
+            self.client = await self._connect()
+        # Mismos bytes que envía el backend SMTP de Django (cuerpo UTF-8 en 8 bits)
+        await self.client.sendmail(message.from_email, message.recipients(),
+                                   message.message().as_bytes(linesep='\r\n'))
+
+    async def close(self):
+        if self.client is not None:
+            try:
+                await self.client.quit()
+            except Exception:
+                pass  # La conexión ya estaba rota
+            self.client = None
+
+
+class AsyncTransport:
+    """`connections` conexiones de un proveedor que envían un lote a la vez."""
+
+    def __init__(self, backend, options, connections):
+        use_aiosmtplib = aiosmtplib is not None and (backend or settings.EMAIL_BACKEND) == SMTP_BACKEND
+        self.lanes = [AioSMTPLane(options) if use_aiosmtplib else ThreadLane(backend, options)
+                      for _ in range(connections)]
+
+    async def send(self, messages):
+        """Envía los mensajes repartidos entre las conexiones. Devuelve el error de cada uno (None si se envió)."""
+        errors = [None] * len(messages)
+        pending = iter(range(len(messages)))  # Compartido: cada conexión toma el siguiente al quedar libre
+
+        async def drain(lane):
+            for index in pending:
+                try:
+                    await lane.send(messages[index])
+                except Exception as e:
+                    errors[index] = e
+                    # La conexión puede haber quedado rota: el siguiente email abre otra
+                    await lane.close()
+
+        await asyncio.gather(*(drain(lane) for lane in self.lanes))
+        return errors
+
+    async def close(self):
+        await asyncio.gather(*(lane.close() for lane in self.lanes))
@@ -21,13 +21,21 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category', 'price', 'image_preview', 'is_available', 'average_rating', 'created_at')
+    list_display = ('name', 'category', 'price', 'image_preview', 'stock', 'is_available', 'average_rating', 'created_at')
     list_filter = ('is_available', 'category', 'created_at')
     search_fields = ('name', 'description', 'category__name')
-    list_editable = ('price', 'is_available') # Permite editar estos campos en la lista
+    # is_available no se edita en la lista: con stock controlado Product.save lo deriva del stock
+    # y el cambio se perdería sin avisar (en el formulario solo es editable si stock está vacío)
+    list_editable = ('price', 'stock') # Permite editar estos campos en la lista
     prepopulated_fields = {'slug': ('name',)}
-    readonly_fields = ('average_rating',) # La calificación promedio no se edita manualmente
-    fields = ('category', 'name', 'slug', 'description', 'price', 'image', 'is_available')
+    readonly_fields = ('average_rating', 'rating_count') # La calificación promedio no se edita manualmente
+    fields = ('category', 'name', 'slug', 'description', 'price', 'image', 'stock', 'is_available')
+
+    def get_readonly_fields(self, request, obj=None):
+        readonly = super().get_readonly_fields(request, obj)
+        if obj is not None and obj.stock is not None:
+            readonly = (*readonly, 'is_available')  # Se deriva del stock al guardar
+        return readonly
     
     def image_preview(self, obj):
         if obj.image:
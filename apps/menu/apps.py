@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.menu'
-    verbose_name = "Gestión del Menú"
\ No newline at end of file
+    verbose_name = "Gestión del Menú"
+
+    def ready(self):
+        # Importar señales cuando la app esté lista
+        import apps.menu.signals
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_approved_review_count(apps, schema_editor):
+    Product = apps.get_model('menu', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    approved = (Review.objects.filter(product=OuterRef('pk'), is_approved=True)
+                .order_by().values('product').annotate(n=Count('id')).values('n'))
+    Product.objects.update(approved_review_count=Coalesce(Subquery(approved), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_alter_category_options_category_order'),
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='approved_review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas Aprobadas'),
+        ),
+        migrations.RunPython(backfill_approved_review_count, migrations.RunPython.noop),
+    ]
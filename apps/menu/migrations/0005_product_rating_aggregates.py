@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:40
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+RATING_FIELDS = ['rating_count', 'rating_sum'] + [f'rating_{stars}' for stars in range(1, 6)]
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('menu', 'Product')
+    Review = apps.get_model('reviews', 'Review')
+    star_counts = {f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    rows = (Review.objects.filter(is_approved=True).order_by().values('product_id')
+            .annotate(rating_count=Count('id'), rating_sum=Sum('rating'), **star_counts))
+    for row in rows:
+        Product.objects.filter(pk=row.pop('product_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_product_approved_review_count'),
+        ('reviews', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='product',
+            old_name='approved_review_count',
+            new_name='rating_count',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Suma de Calificaciones'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas de 1 estrella'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas de 2 estrellas'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas de 3 estrellas'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas de 4 estrellas'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reseñas de 5 estrellas'),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
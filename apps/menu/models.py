@@ -1,6 +1,9 @@
 from django.db import models
 from django.core.validators import MinValueValidator
-from django.db.models import Avg # Para calcular el promedio de calificación
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from apps.core.tracking import FieldTrackerMixin
 
 # Función para definir la ruta de subida de imágenes de categorías
 def category_image_path(instance, filename):
@@ -37,7 +40,10 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
-class Product(models.Model):
+class Product(FieldTrackerMixin, models.Model):
+    # Campos cuyo cambio se puede consultar sin recargar el producto
+    tracked_fields = ('category', 'name', 'price', 'is_available', 'stock')
+
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE, verbose_name="Categoría")
     name = models.CharField(max_length=200, verbose_name="Nombre del Producto")
     slug = models.SlugField(max_length=220, unique=True, blank=True, help_text="Versión amigable para URL (se genera automáticamente si se deja en blanco)")
@@ -45,11 +51,21 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0.01)], verbose_name="Precio")
     image = models.ImageField(upload_to=product_image_path, blank=True, null=True, verbose_name="Imagen")
     is_available = models.BooleanField(default=True, verbose_name="Disponible")
+    # Unidades en inventario; vacío = sin control de stock. Si se controla, is_available se deriva de él
+    stock = models.PositiveIntegerField(null=True, blank=True, verbose_name="Stock", help_text="Dejar vacío si no se limita. Con 0 el producto deja de estar disponible.")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    # Campo para calificación promedio (calculado)
+    # Campo para calificación promedio (calculado a partir de rating_sum / rating_count)
     average_rating = models.FloatField(default=0.0, editable=False, verbose_name="Calificación Promedio")
+    # Agregados de reseñas aprobadas, mantenidos de forma incremental por las señales de Review
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reseñas Aprobadas")
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name="Suma de Calificaciones")
+    rating_1 = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reseñas de 1 estrella")
+    rating_2 = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reseñas de 2 estrellas")
+    rating_3 = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reseñas de 3 estrellas")
+    rating_4 = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reseñas de 4 estrellas")
+    rating_5 = models.PositiveIntegerField(default=0, editable=False, verbose_name="Reseñas de 5 estrellas")
 
     class Meta:
         verbose_name = "Producto"
@@ -70,12 +86,54 @@ class Product(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
+        if self.stock is not None:
+            self.is_available = self.stock > 0
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'stock' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'is_available'}
         super().save(*args, **kwargs)
 
+    @property
+    def rating_histogram(self):
+        """Número de reseñas aprobadas por estrella: {1: n, ..., 5: n}."""
+        return {stars: getattr(self, f'rating_{stars}') for stars in range(1, 6)}
+
+    @classmethod
+    def apply_rating_delta(cls, product_id, rating, sign):
+        """
+        Suma (sign=1) o resta (sign=-1) una reseña aprobada a los agregados del
+        producto con un UPDATE atómico; no lee ninguna otra reseña.
+        """
+        star_field = f'rating_{rating}'
+        cls.objects.filter(pk=product_id).update(
+            rating_count=F('rating_count') + sign,
+            rating_sum=F('rating_sum') + sign * rating,
+            **{star_field: F(star_field) + sign},
+        )
+
+    @classmethod
+    def refresh_average_rating(cls, product_ids):
+        """
+        Recalcula average_rating a partir de rating_sum/rating_count.
+        Va en un UPDATE aparte: MySQL evalúa el SET de izquierda a derecha y
+        PostgreSQL con los valores anteriores, así que no se puede mezclar con el incremento.
+        """
+        cls.objects.filter(pk__in=product_ids).update(average_rating=Case(
+            When(rating_count__gt=0, then=Cast('rating_sum', FloatField()) / F('rating_count')),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
+
     def update_average_rating(self):
-        """Calcula y actualiza la calificación promedio del producto."""
+        """Recalcula desde cero los agregados de calificación del producto (reparación, no se usa en cada reseña)."""
         # Importación local para evitar dependencia circular
-        from apps.reviews.models import Review
-        avg = Review.objects.filter(product=self, is_approved=True).aggregate(Avg('rating'))['rating__avg']
-        self.average_rating = avg if avg is not None else 0.0
-        self.save(update_fields=['average_rating']) # Guardar solo este campo para eficiencia
\ No newline at end of file
+        from apps.reviews.models import compute_rating_aggregates
+        aggregates = compute_rating_aggregates([self.pk]).get(self.pk, {})
+        for field in RATING_AGGREGATE_FIELDS:
+            setattr(self, field, aggregates.get(field, 0))
+        self.average_rating = self.rating_sum / self.rating_count if self.rating_count else 0.0
+        self.save(update_fields=RATING_AGGREGATE_FIELDS + ['average_rating']) # Guardar solo estos campos para eficiencia
+
+
+# Columnas de Product con los agregados de reseñas aprobadas
+RATING_AGGREGATE_FIELDS = ['rating_count', 'rating_sum'] + [f'rating_{stars}' for stars in range(1, 6)]
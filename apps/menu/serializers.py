@@ -15,7 +15,8 @@ class ProductSerializer(serializers.ModelSerializer):
         queryset=Category.objects.all(), source='category', write_only=True, label="Categoría"
     )
     # reviews = ReviewSerializer(many=True, read_only=True) # Opcional: Anidar reseñas aprobadas
-    review_count = serializers.SerializerMethodField()
+    # Contador desnormalizado de reseñas aprobadas (sin consulta extra por producto)
+    review_count = serializers.IntegerField(source='rating_count', read_only=True)
 
     class Meta:
         model = Product
@@ -26,10 +27,6 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['slug', 'average_rating', 'review_count', 'created_at', 'updated_at']
 
-    def get_review_count(self, obj):
-        # Contar solo reseñas aprobadas
-        return obj.reviews.filter(is_approved=True).count()
-
     # Opcional: Validar que el precio sea positivo
     def validate_price(self, value):
         if value <= 0:
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.reviews.models import Review
+from .models import Category, Product
+from .snapshot import bump_version
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_menu_snapshot(sender, instance, **kwargs):
+    """
+    Cualquier cambio en categorías, productos o reseñas (calificación media)
+    invalida el snapshot del menú cuando la transacción se confirma.
+    """
+    transaction.on_commit(bump_version)
@@ -0,0 +1,75 @@
+import hashlib
+import time
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.cache import get_cache
+
+from .models import Category, Product
+from .serializers import CategorySerializer, ProductSerializer
+
+VERSION_KEY = 'snapshot:version'
+cache = get_cache('menu')
+
+
+def get_version():
+    """Versión actual del menú. Se inicializa con la hora para no reutilizar versiones tras vaciar la caché."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = int(time.time() * 1000)
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_version():
+    """Invalida el snapshot: la próxima petición lo reconstruye con la nueva versión."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # La clave no existía (caché vaciada o expulsada)
+        get_version()
+
+
+def build_snapshot(version):
+    """Serializa las categorías activas con sus productos disponibles en un único documento JSON."""
+    available_products = Product.objects.filter(is_available=True).order_by('name')
+    categories = (Category.objects.filter(is_active=True).order_by('order', 'name')
+                  .prefetch_related(Prefetch('products', queryset=available_products)))
+
+    menu = {
+        'version': version,
+        'categories': [
+            {
+                **CategorySerializer(category).data,
+                # Sin request en el contexto las imágenes van como rutas relativas a MEDIA_URL
+                'products': ProductSerializer(category.products.all(), many=True).data,
+            }
+            for category in categories
+        ],
+    }
+    # El ETag sale solo de los datos: la versión sube con cualquier guardado aunque
+    # no cambie nada visible, y generated_at cambia en cada reconstrucción; con
+    # ellos cada worker daría un ETag distinto para el mismo menú
+    renderer = JSONRenderer()
+    etag = hashlib.sha256(renderer.render(menu['categories'])).hexdigest()
+    content = renderer.render({**menu, 'generated_at': timezone.now().isoformat()})
+    return {'content': content, 'etag': etag}
+
+
+def get_snapshot():
+    """
+    Devuelve {'content': bytes, 'etag': sha256} del menú completo.
+    Se guarda en caché por versión, así que un cambio en el menú genera otra
+    clave y nunca se sirve una mezcla de datos antiguos y nuevos. El TTL
+    acota lo que puede tardar en verse un cambio si la caché es por proceso.
+    """
+    version = get_version()
+    key = f'snapshot:{version}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(version)
+        cache.set(key, snapshot)  # TTL del espacio 'menu'
+    return snapshot
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.reviews.models import Review
+from .models import Category, Product
+from .snapshot import bump_version
+
+User = get_user_model()
+
+
+class MenuQueryCountTests(APITestCase):
+    """
+    El número de consultas del menú no debe crecer con el catálogo ni con las
+    reseñas: review_count sale de Product.rating_count, sin una consulta por producto.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Principales")
+        cls.users = [
+            User.objects.create_user(email=f"cliente{i}@example.com", password="Secreta123!",
+                                     first_name="Cliente", last_name=str(i), is_active=True)
+            for i in range(3)
+        ]
+
+    def add_products(self, count, reviews_per_product=3):
+        start = Product.objects.count()
+        for i in range(start, start + count):
+            product = Product.objects.create(category=self.category, name=f"Plato {i}",
+                                             description="Descripción", price=Decimal('9.50'))
+            for user in self.users[:reviews_per_product]:
+                Review.objects.create(product=product, user=user, rating=4, is_approved=True)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_product_list_is_constant(self):
+        self.add_products(2)
+        with self.assertNumQueries(2):  # COUNT de la paginación + página con su categoría
+            response = self.client.get('/api/menu/products/')
+        self.assertEqual(response.data['results'][0]['review_count'], 3)
+
+        self.add_products(6)
+        self.assertEqual(self.count_queries('/api/menu/products/'), 2)
+
+    def test_product_detail(self):
+        self.add_products(1)
+        product = Product.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/menu/products/{product.slug}/')
+        self.assertEqual(response.data['review_count'], 3)
+        self.assertEqual(response.data['average_rating'], 4.0)
+
+    def test_review_list_is_constant(self):
+        self.add_products(1)
+        url = f'/api/reviews/reviews/?product={Product.objects.get().slug}'
+        with self.assertNumQueries(3):  # Producto por slug + COUNT + página con usuario y producto
+            self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get('/api/reviews/reviews/')
+
+        self.add_products(3)
+        self.assertEqual(self.count_queries(url), 3)
+        self.assertEqual(self.count_queries('/api/reviews/reviews/'), 2)
+
+
+class MenuSnapshotETagTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Principales")
+        self.product = Product.objects.create(category=category, name="Plato", description="Descripción",
+                                              price=Decimal('9.50'))
+
+    def etag(self):
+        response = self.client.get('/api/menu/snapshot/')
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_etag_only_changes_with_the_menu(self):
+        etag = self.etag()
+        bump_version()  # Un guardado sin cambios visibles: otra versión, mismo menú
+        self.assertEqual(self.etag(), etag)
+        self.assertEqual(self.client.get('/api/menu/snapshot/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.product.price = Decimal('10.50')
+        self.product.save()
+        bump_version()  # on_commit no se ejecuta dentro de la transacción del test
+        self.assertNotEqual(self.etag(), etag)
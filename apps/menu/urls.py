@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, ProductViewSet
+from .views import CategoryViewSet, ProductViewSet, MenuSnapshotView
 
 # Crear un router y registrar nuestros viewsets
 router = DefaultRouter()
@@ -9,5 +9,7 @@ router.register(r'products', ProductViewSet, basename='product')
 
 # Las URLs de la API son determinadas automáticamente por el router.
 urlpatterns = [
+    # Menú completo en un solo documento (con ETag), antes que las rutas del router
+    path('snapshot/', MenuSnapshotView.as_view(), name='menu-snapshot'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,7 +1,13 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from rest_framework import viewsets, permissions, filters
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Category, Product
 from .serializers import CategorySerializer, ProductSerializer
+from .snapshot import get_snapshot
 from .permissions import IsAdminOrReadOnly # Permiso personalizado
 
 # Permiso personalizado (opcional, puedes usar IsAdminUser directamente)
@@ -48,7 +54,7 @@ class ProductViewSet(viewsets.ModelViewSet):
     Los administradores pueden gestionar productos.
     Los usuarios pueden ver la lista y detalles.
     """
-    queryset = Product.objects.select_related('category').prefetch_related('reviews').all() # Optimización
+    queryset = Product.objects.select_related('category').all() # Optimización (review_count es una columna, no hace falta traer las reseñas)
     serializer_class = ProductSerializer
     permission_classes = [IsAdminOrReadOnly] # Solo admins pueden modificar
     lookup_field = 'slug'
@@ -68,4 +74,25 @@ class ProductViewSet(viewsets.ModelViewSet):
     #    return queryset
 
     # El perform_create, perform_update, perform_destroy ya están manejados
-    # por ModelViewSet y los permisos controlan quién puede ejecutarlos.
\ No newline at end of file
+    # por ModelViewSet y los permisos controlan quién puede ejecutarlos.
+
+
+class MenuSnapshotView(APIView):
+    """
+    Menú completo (categorías activas con sus productos disponibles) en un solo
+    documento JSON precalculado. Se sirve con ETag fuerte y Cache-Control para
+    que el navegador y nginx revaliden con un 304 barato.
+    """
+    authentication_classes = []  # Datos públicos, no hace falta validar el JWT
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        etag = quote_etag(snapshot['etag'])
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(snapshot['content'], content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.MENU_SNAPSHOT_MAX_AGE, must_revalidate=True)
+        return response
@@ -4,7 +4,8 @@ from django.contrib import admin
 from django.conf import settings  # <--- IMPORTACIÓN AÑADIDA
 from django.contrib.auth import get_user_model # <--- IMPORTACIÓN AÑADIDA para mejor práctica
 
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, CartItem, KitchenSlot, Order, OrderItem, SlotBooking, StockReservation
+from .pricing import annotate_cart_subtotals, priced_cart_items, quote_cart
 
 # Obtener el modelo de Usuario activo (mejor práctica que settings.AUTH_USER_MODEL directamente)
 User = get_user_model()
@@ -14,6 +15,10 @@ class CartItemInline(admin.TabularInline):
     raw_id_fields = ['product'] # Para buscar productos eficientemente
     extra = 0
     readonly_fields = ('get_item_total',)
+
+    def get_queryset(self, request):
+        # line_total calculado en la misma consulta que carga los items
+        return priced_cart_items(super().get_queryset(request))
     # Opcional: Añadir campos si quieres ver más info del producto aquí
     # fields = ('product', 'quantity', 'get_item_total')
 
@@ -36,15 +41,20 @@ class CartAdmin(admin.ModelAdmin):
     readonly_fields = ('get_cart_total', 'created_at', 'updated_at') # Hacer fechas readonly también
     date_hierarchy = 'created_at' # Navegación por fechas
 
+    def get_queryset(self, request):
+        # Subtotal de cada carrito en la misma consulta del listado (sin N+1)
+        return annotate_cart_subtotals(super().get_queryset(request).select_related('user'))
+
     def get_cart_total(self, obj):
          # Asegurarse que get_total_price existe y maneja errores si es necesario
         try:
             # Considerar formatear el precio aquí si es necesario (ej: con f-string)
-            return obj.get_total_price()
+            return quote_cart(obj).total
         except Exception as e:
             print(f"Error calculating Cart total: {e}") # Log de error
             return "Error"
     get_cart_total.short_description = 'Total Carrito'
+    get_cart_total.admin_order_field = 'items_subtotal'
 
 
 class OrderItemInline(admin.TabularInline):
@@ -71,6 +81,30 @@ class OrderItemInline(admin.TabularInline):
     can_delete = False
     # def has_add_permission(self, request, obj=None): return False
 
+class StockReservationInline(admin.TabularInline):
+    model = StockReservation
+    extra = 0
+    can_delete = False
+    # Solo lectura: las reservas las crea el checkout y las libera la cancelación
+    fields = ('product', 'quantity', 'created_at', 'released_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class SlotBookingInline(admin.TabularInline):
+    model = SlotBooking
+    extra = 0
+    can_delete = False
+    # Solo lectura: la plaza en la franja de cocina la ocupa el checkout y la libera la cancelación
+    fields = ('start', 'created_at', 'released_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = (
@@ -87,7 +121,7 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'is_scheduled', 'created_at', 'scheduled_datetime', 'assigned_to')
     search_fields = ('order_number', 'user__email', 'delivery_address', 'phone_number', 'assigned_to__email', 'user__username')
     readonly_fields = ('order_number', 'user', 'total_price', 'created_at', 'updated_at', 'total_price_display')
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, StockReservationInline, SlotBookingInline]
     # Ahora 'assigned_to' está en list_display, por lo que puede estar en list_editable
     list_editable = ('status', 'assigned_to')
     date_hierarchy = 'created_at'
@@ -95,7 +129,7 @@ class OrderAdmin(admin.ModelAdmin):
 
     fieldsets = (
         (None, {'fields': ('order_number', 'user', 'status', 'total_price_display')}),
-        ('Detalles Cliente y Entrega', {'fields': ('delivery_address', 'phone_number', 'notes')}),
+        ('Detalles Cliente y Entrega', {'fields': ('delivery_address', 'phone_number', 'notes', 'delivery_latitude', 'delivery_longitude')}),
         ('Programación', {'fields': ('is_scheduled', 'scheduled_datetime'), 'classes': ('collapse',)}),
         ('Logística', {'fields': ('assigned_to',)}), # 'assigned_to' ya estaba aquí, correcto
         ('Fechas Importantes', {'fields': ('created_at', 'updated_at'), 'classes': ('collapse',)}),
@@ -129,4 +163,12 @@ class OrderAdmin(admin.ModelAdmin):
                  print("Advertencia: El modelo User no tiene el campo 'is_deliverer'.")
             except Exception as e:
                  print(f"Error al filtrar queryset para 'assigned_to': {e}")
-        return kwargs
\ No newline at end of file
+        return kwargs
+
+
+@admin.register(KitchenSlot)
+class KitchenSlotAdmin(admin.ModelAdmin):
+    list_display = ('start', 'booked', 'capacity')
+    list_editable = ('capacity',)  # Capacidad propia de una franja (ej: viernes a las 13:00)
+    readonly_fields = ('booked',)  # Lo mantienen el checkout y las cancelaciones
+    date_hierarchy = 'start'
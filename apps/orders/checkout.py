@@ -0,0 +1,114 @@
+"""
+Creación de pedidos a partir del carrito.
+
+El número de consultas no depende del número de líneas: leer el carrito,
+bloquear sus productos, insertar el pedido, insertar las líneas en bloque y
+vaciar el carrito. Los productos se bloquean con SELECT ... FOR UPDATE en
+orden de id, así dos checkouts que comparten productos nunca se bloquean
+mutuamente, y solo durante esta transacción corta; los emails y la factura
+se encolan para después del commit (apps.jobs). Los productos con stock se
+descuentan en la misma transacción (apps/orders/inventory.py), igual que la
+plaza en la franja de cocina de los pedidos programados (apps/orders/slots.py).
+"""
+from django.db import transaction
+
+from apps.menu.models import Product
+from .inventory import InsufficientStock, reserve_stock
+from .models import CartItem, Order, OrderItem, SlotBooking
+from .pricing import build_quote
+from .slots import SlotUnavailable, book_slot
+
+
+class CheckoutError(Exception):
+    """El carrito no se puede convertir en pedido (vacío, productos no disponibles...)."""
+
+    def __init__(self, message, product_ids=None, suggested_slots=None):
+        super().__init__(message)
+        self.message = message
+        self.product_ids = product_ids or []
+        self.suggested_slots = suggested_slots or []
+
+
+def _raise_insufficient_stock(products, product_ids):
+    details = ', '.join(f"{products[pk].name} (quedan {products[pk].stock})" for pk in product_ids)
+    raise CheckoutError(f"Stock insuficiente: {details}.", product_ids=list(product_ids))
+
+
+def checkout(user, delivery_address, phone_number, notes=None, is_scheduled=False, scheduled_datetime=None,
+             delivery_latitude=None, delivery_longitude=None):
+    """Convierte el carrito del usuario en un pedido y lo vacía. Devuelve el pedido creado."""
+    with transaction.atomic():
+        # Las líneas del carrito se bloquean para que no cambien entre la lectura y el vaciado
+        lines = list(CartItem.objects.select_for_update(of=('self',))
+                     .filter(cart__user=user).order_by('product_id')
+                     .values_list('id', 'product_id', 'quantity'))
+        if not lines:
+            raise CheckoutError("El carrito está vacío.")
+
+        # Solo los productos del carrito, en orden determinista
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update(skip_locked=False)
+            .filter(pk__in=[product_id for _, product_id, _ in lines])
+            .order_by('pk').only('id', 'name', 'price', 'is_available', 'stock')
+        }
+        unavailable = [product_id for _, product_id, _ in lines
+                       if product_id not in products or not products[product_id].is_available]
+        if unavailable:
+            names = ', '.join(products[pk].name for pk in unavailable if pk in products)
+            raise CheckoutError(f"Productos no disponibles: {names}." if names else "Algún producto ya no existe.",
+                                product_ids=unavailable)
+
+        # Comprobación previa con las filas bloqueadas; el UPDATE condicional de reserve_stock es la garantía
+        quantities = {}
+        for _, product_id, quantity in lines:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        tracked = {product_id: quantity for product_id, quantity in quantities.items()
+                   if products[product_id].stock is not None}
+        short = [product_id for product_id, quantity in tracked.items() if products[product_id].stock < quantity]
+        if short:
+            _raise_insufficient_stock(products, short)
+
+        booked_slot = None
+        if is_scheduled and scheduled_datetime:
+            try:
+                booked_slot = book_slot(scheduled_datetime)
+            except SlotUnavailable as e:
+                raise CheckoutError(e.message, suggested_slots=e.suggestions)
+
+        # Precio congelado con los valores bloqueados (no los que viera el cliente)
+        subtotal = sum(products[product_id].price * quantity for _, product_id, quantity in lines)
+        order = Order(
+            user=user,
+            total_price=build_quote(subtotal).total,
+            delivery_address=delivery_address,
+            phone_number=phone_number,
+            delivery_latitude=delivery_latitude,
+            delivery_longitude=delivery_longitude,
+            notes=notes,
+            is_scheduled=is_scheduled,
+            scheduled_datetime=scheduled_datetime,
+            # El estado se establecerá en PENDING o SCHEDULED en el save() del modelo
+        )
+        order.save()
+        if booked_slot is not None:
+            SlotBooking.objects.create(order=order, start=booked_slot)
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=product_id,
+                product_name=products[product_id].name,  # Guardar nombre actual
+                price=products[product_id].price,  # Guardar precio actual
+                quantity=quantity,
+            )
+            for _, product_id, quantity in lines
+        ])
+
+        try:
+            reserve_stock(order, tracked)
+        except InsufficientStock as e:
+            _raise_insufficient_stock(products, e.product_ids)
+
+        CartItem.objects.filter(id__in=[item_id for item_id, _, _ in lines]).delete()
+    return order
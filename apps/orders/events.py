@@ -0,0 +1,269 @@
+"""
+Canal en vivo de cambios de pedidos (Server-Sent Events).
+
+Cada cambio de estado o de repartidor se guarda en OrderEvent y, al
+confirmarse la transacción, se avisa al hub del proceso. El hub solo
+despierta a los streams abiertos en este proceso; la base de datos es la
+fuente de los eventos, así que los streams de otros workers los ven en la
+siguiente consulta (cada ORDER_EVENTS_POLL_SECONDS como máximo) y un cliente
+que se reconecta con Last-Event-ID recibe lo que se perdió.
+
+Los streams duran ORDER_EVENTS_STREAM_SECONDS y luego se cierran (el
+navegador se reconecta solo). En despliegue se sirven desde su propio
+proceso ASGI (restaurant_backend_events.service, ver nginx.conf) con la
+versión asíncrona, que no ocupa ningún hilo mientras espera. Bajo WSGI cada
+stream retiene un hilo del worker y su conexión a la BD, así que cada proceso
+admite como mucho ORDER_EVENTS_WSGI_MAX_STREAMS a la vez (el resto, 503).
+
+Los ids de OrderEvent se asignan al INSERT pero las filas se ven al COMMIT,
+así que no aparecen en orden de id: una transacción larga (dispatch) puede
+tener el id N sin confirmar mientras otra con N+1 ya es visible. EventCursor
+recuerda esos huecos y los vuelve a consultar durante
+ORDER_EVENTS_COMMIT_GRACE_SECONDS; el id que se envía al cliente (el
+Last-Event-ID con el que reanuda) no pasa de un hueco pendiente, así que un
+evento puede llegar dos veces (se distingue por event_id) pero no perderse.
+
+EventSource no permite cabeceras propias: el cliente pide un ticket
+(issue_stream_ticket, firmado y válido ORDER_EVENTS_TICKET_SECONDS) y lo pasa
+en ?ticket=, en lugar del JWT, que quedaría en los logs de acceso.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Order, OrderEvent
+
+STATUS_LABELS = dict(Order.ORDER_STATUS_CHOICES)
+BATCH_SIZE = 100
+RETRY_MS = 3000
+TICKET_SALT = 'apps.orders.events.ticket'
+
+
+class OrderEventHub:
+    """Pub/sub en memoria: un contador de secuencia y una condición para despertar a los streams."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._sequence = 0
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def publish(self):
+        with self._condition:
+            self._sequence += 1
+            self._condition.notify_all()
+
+    def wait(self, sequence, timeout):
+        """Espera hasta que haya una publicación posterior a `sequence` o pase `timeout`."""
+        with self._condition:
+            if self._sequence == sequence:
+                self._condition.wait(timeout)
+            return self._sequence
+
+
+hub = OrderEventHub()
+
+
+def issue_stream_ticket(user):
+    """Ticket para abrir el canal con EventSource. Solo sirve para este canal, no para la API."""
+    return signing.dumps({'user': str(user.pk), 'ver': user.token_version}, salt=TICKET_SALT)
+
+
+def user_from_ticket(ticket):
+    """Usuario del ticket, o None si es inválido, ha caducado o la contraseña cambió después."""
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.ORDER_EVENTS_TICKET_SECONDS)
+    except signing.BadSignature:
+        return None
+    user = get_user_model().objects.filter(pk=data['user'], is_active=True).first()
+    if user is None or user.token_version != data['ver']:
+        return None
+    return user
+
+
+_wsgi_streams_lock = threading.Lock()
+_wsgi_streams = 0
+
+
+def acquire_wsgi_stream():
+    """Reserva uno de los ORDER_EVENTS_WSGI_MAX_STREAMS streams del proceso. False si no quedan."""
+    global _wsgi_streams
+    with _wsgi_streams_lock:
+        if _wsgi_streams >= settings.ORDER_EVENTS_WSGI_MAX_STREAMS:
+            return False
+        _wsgi_streams += 1
+        return True
+
+
+def release_wsgi_stream():
+    global _wsgi_streams
+    with _wsgi_streams_lock:
+        _wsgi_streams -= 1
+
+
+class WSGIStream:
+    """Iterador de stream_events que libera su reserva al terminar o al cerrarse la respuesta."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.chunks.close()
+            release_wsgi_stream()
+
+
+def record_order_events(rows):
+    """
+    Registra eventos a partir de tuplas (order_id, user_id, deliverer_id, status)
+    y avisa al hub cuando la transacción se confirma.
+    """
+    events = [OrderEvent(order_id=order_id, user_id=user_id, deliverer_id=deliverer_id, status=status)
+              for order_id, user_id, deliverer_id, status in rows]
+    if events:
+        OrderEvent.objects.bulk_create(events)
+        transaction.on_commit(hub.publish)
+
+
+def visible_events(user):
+    """Eventos que puede ver el usuario: los de sus pedidos y, si es repartidor, los de sus asignaciones."""
+    if user.is_staff:
+        return OrderEvent.objects.all()
+    scope = Q(user=user)
+    if getattr(user, 'is_deliverer', False):
+        scope |= Q(deliverer=user)
+    return OrderEvent.objects.filter(scope)
+
+
+def latest_event_id():
+    return OrderEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+class EventCursor:
+    """
+    Posición de un stream: el mayor id revisado (`high`) y los huecos por debajo
+    de él, ids que aún no eran visibles (transacción sin confirmar o deshecha),
+    con el momento en que se dejan de esperar.
+    """
+
+    def __init__(self, queryset, after_id):
+        self.queryset = queryset
+        self.high = after_id
+        self.gaps = {}
+
+    @property
+    def resume_id(self):
+        """Id desde el que reanudar sin perder eventos: justo antes del primer hueco pendiente."""
+        return min(self.gaps) - 1 if self.gaps else self.high
+
+    def fetch(self):
+        """Eventos nuevos del usuario y los de huecos que ya se han confirmado. Devuelve (eventos, quedan_más)."""
+        now = time.monotonic()
+        # Primero los ids confirmados de toda la tabla: todo lo que se vea aquí lo verá también la consulta del usuario
+        visible = list(
+            OrderEvent.objects.filter(Q(id__gt=self.high) | Q(id__in=list(self.gaps)))
+            .order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        filled = [event_id for event_id in visible if event_id in self.gaps]
+        new_ids = [event_id for event_id in visible if event_id > self.high]
+        previous_high = self.high
+        for event_id in filled:
+            del self.gaps[event_id]
+        if new_ids:
+            deadline = now + settings.ORDER_EVENTS_COMMIT_GRACE_SECONDS
+            seen = set(new_ids)
+            for missing in range(previous_high + 1, new_ids[-1]):
+                if missing not in seen:
+                    self.gaps[missing] = deadline
+            self.high = new_ids[-1]
+        for event_id, deadline in list(self.gaps.items()):
+            if deadline <= now:
+                del self.gaps[event_id]  # Transacción deshecha (o id saltado por la secuencia)
+
+        if not filled and not new_ids:
+            return [], False
+        events = list(
+            self.queryset.filter(Q(id__in=filled) | Q(id__gt=previous_high, id__lte=self.high))
+            .order_by('id').values('id', 'order_id', 'order__order_number', 'status', 'deliverer_id', 'created_at')
+        )
+        return events, len(visible) == BATCH_SIZE
+
+
+def format_event(event, resume_id):
+    data = {
+        'event_id': event['id'],
+        'order_id': str(event['order_id']),
+        'order_number': event['order__order_number'],
+        'status': event['status'],
+        'status_display': STATUS_LABELS.get(event['status'], event['status']),
+        'assigned_to': str(event['deliverer_id']) if event['deliverer_id'] else None,
+        'created_at': event['created_at'].isoformat(),
+    }
+    return f"id: {resume_id}\nevent: order\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events(queryset, after_id):
+    """Generador SSE para WSGI: espera en el hub entre consultas."""
+    yield f"retry: {RETRY_MS}\n\n"
+    deadline = time.monotonic() + settings.ORDER_EVENTS_STREAM_SECONDS
+    last_write = time.monotonic()
+    sequence = hub.sequence
+    cursor = EventCursor(queryset, after_id)
+    while time.monotonic() < deadline:
+        events, more = cursor.fetch()
+        for event in events:
+            yield format_event(event, cursor.resume_id)
+        if more:
+            continue  # Quedan más eventos atrasados
+        if events:
+            last_write = time.monotonic()
+        elif time.monotonic() - last_write >= settings.ORDER_EVENTS_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"  # Evita que proxies cierren la conexión inactiva
+            last_write = time.monotonic()
+        sequence = hub.wait(sequence, timeout=settings.ORDER_EVENTS_POLL_SECONDS)
+
+
+async def astream_events(queryset, after_id):
+    """Generador SSE para ASGI: solo consulta la base de datos si el hub publicó o vence el intervalo."""
+    yield f"retry: {RETRY_MS}\n\n"
+    cursor = EventCursor(queryset, after_id)
+    fetch = sync_to_async(cursor.fetch)
+    deadline = time.monotonic() + settings.ORDER_EVENTS_STREAM_SECONDS
+    last_write = time.monotonic()
+    while time.monotonic() < deadline:
+        sequence = hub.sequence
+        events, more = await fetch()
+        for event in events:
+            yield format_event(event, cursor.resume_id)
+        if more:
+            continue
+        if events:
+            last_write = time.monotonic()
+        elif time.monotonic() - last_write >= settings.ORDER_EVENTS_KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_write = time.monotonic()
+        next_poll = time.monotonic() + settings.ORDER_EVENTS_POLL_SECONDS
+        while hub.sequence == sequence and time.monotonic() < next_poll:
+            await asyncio.sleep(0.25)
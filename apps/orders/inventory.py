@@ -0,0 +1,89 @@
+"""
+Reserva de stock de productos.
+
+Los productos con `stock` definido se descuentan en el checkout con un único
+UPDATE condicional para todas las líneas (stock = stock - n WHERE stock >= n);
+si el número de filas actualizadas no coincide, algún producto se agotó y la
+transacción del checkout se deshace. Cada descuento queda registrado en
+StockReservation para devolverlo si el pedido se cancela o falla.
+is_available se deriva del stock en el mismo UPDATE.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from apps.menu.models import Product
+from apps.menu.snapshot import bump_version
+from .models import StockReservation
+
+# Estados en los que las unidades reservadas vuelven al inventario
+RELEASE_STATUSES = ('CANCELLED', 'FAILED')
+
+
+class InsufficientStock(Exception):
+    """No quedan unidades suficientes de alguno de los productos."""
+
+    def __init__(self, product_ids):
+        super().__init__(product_ids)
+        self.product_ids = sorted(product_ids)
+
+
+def _per_product(quantities):
+    return Case(*[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+                output_field=IntegerField())
+
+
+def reserve_stock(order, quantities):
+    """
+    Descuenta {product_id: cantidad} (solo productos con stock) y registra las reservas.
+    Debe ejecutarse dentro de la transacción que crea el pedido.
+    """
+    if not quantities:
+        return
+    needed = _per_product(quantities)
+    # is_available va primero: MySQL evalúa el SET de izquierda a derecha y debe ver el stock anterior
+    updated = Product.objects.filter(pk__in=quantities, stock__gte=needed).update(
+        is_available=Case(When(stock=needed, then=Value(False)), default=F('is_available')),
+        stock=F('stock') - needed,
+    )
+    if updated != len(quantities):
+        short = Product.objects.filter(pk__in=quantities).exclude(stock__gte=needed).values_list('id', flat=True)
+        raise InsufficientStock(short)
+
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, product_id=product_id, quantity=quantity)
+        for product_id, quantity in quantities.items()
+    ])
+    if Product.objects.filter(pk__in=quantities, stock=0).exists():
+        # Algún producto se agotó: el menú publicado debe dejar de mostrarlo
+        transaction.on_commit(bump_version)
+
+
+def release_reservations(order):
+    """Devuelve al inventario las unidades reservadas por el pedido. Devuelve el número de reservas liberadas."""
+    with transaction.atomic():
+        reservations = list(StockReservation.objects.select_for_update()
+                            .filter(order=order, released_at__isnull=True)
+                            .values_list('id', 'product_id', 'quantity'))
+        if not reservations:
+            return 0
+        quantities = defaultdict(int)
+        for _, product_id, quantity in reservations:
+            quantities[product_id] += quantity
+
+        # Mismo orden de bloqueo que el checkout (por id) para no provocar interbloqueos
+        sold_out = [product_id for product_id, stock in Product.objects.select_for_update()
+                    .filter(pk__in=quantities, stock__isnull=False).order_by('pk').values_list('id', 'stock')
+                    if stock == 0]
+        returned = _per_product(quantities)
+        Product.objects.filter(pk__in=quantities, stock__isnull=False).update(
+            is_available=Case(When(stock=0, then=Value(True)), default=F('is_available')),
+            stock=F('stock') + returned,
+        )
+        StockReservation.objects.filter(id__in=[reservation_id for reservation_id, _, _ in reservations]).update(
+            released_at=timezone.now())
+        if sold_out:
+            transaction.on_commit(bump_version)
+    return len(reservations)
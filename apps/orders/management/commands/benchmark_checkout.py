@@ -0,0 +1,72 @@
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.menu.models import Category, Product
+from apps.orders.checkout import checkout
+from apps.orders.models import Cart, CartItem
+
+LINE_COUNTS = (1, 20, 100)
+
+
+class _Rollback(Exception):
+    """Deshace todos los datos creados por el benchmark."""
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia (p50/p99) y las consultas del checkout con carritos de 1, 20 y 100 líneas. No deja datos en la base de datos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Checkouts medidos por caso.")
+
+    def _fixtures(self):
+        suffix = uuid.uuid4().hex[:8]
+        user = get_user_model().objects.create_user(
+            email=f"bench-{suffix}@example.com", password=None, first_name='Bench', last_name='Checkout',
+        )
+        category = Category.objects.create(name=f"Benchmark {suffix}", slug=f"benchmark-{suffix}")
+        products = Product.objects.bulk_create([
+            Product(category=category, name=f"Producto {i}", slug=f"bench-{suffix}-{i}",
+                    description='', price=Decimal('4.50') + i)
+            for i in range(max(LINE_COUNTS))
+        ])
+        cart = Cart.objects.create(user=user)
+        return user, cart, products
+
+    def _run_once(self, user, cart, products, lines):
+        # Cada checkout va en un savepoint que se deshace, así el carrito vuelve a estar lleno
+        sid = transaction.savepoint()
+        try:
+            CartItem.objects.bulk_create([CartItem(cart=cart, product=p, quantity=2) for p in products[:lines]])
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                checkout(user, 'Calle Falsa 123', '600000000')
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            return elapsed_ms, len(queries)
+        finally:
+            transaction.savepoint_rollback(sid)
+
+    def handle(self, *args, **options):
+        iterations = max(options['iterations'], 2)
+        self.stdout.write(f"{'Líneas':>6} {'p50 ms':>9} {'p99 ms':>9} {'Consultas':>10}")
+        try:
+            with transaction.atomic():
+                user, cart, products = self._fixtures()
+                for lines in LINE_COUNTS:
+                    # Calentamiento
+                    self._run_once(user, cart, products, lines)
+                    timings, query_count = [], 0
+                    for _ in range(iterations):
+                        elapsed_ms, query_count = self._run_once(user, cart, products, lines)
+                        timings.append(elapsed_ms)
+                    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+                    self.stdout.write(f"{lines:>6} {cuts[49]:>9.2f} {cuts[98]:>9.2f} {query_count:>10}")
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from apps.menu.models import Category, Product
+from apps.orders.checkout import CheckoutError, checkout
+from apps.orders.models import Cart, CartItem, Order, StockReservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Lanza checkouts concurrentes sobre un producto con stock limitado y comprueba que no se vende "
+        "más de lo disponible. Crea datos temporales y los borra al terminar (usar contra PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=10, help="Unidades iniciales del producto.")
+        parser.add_argument('--clients', type=int, default=30, help="Checkouts simultáneos (un usuario por hilo).")
+        parser.add_argument('--quantity', type=int, default=1, help="Unidades por carrito.")
+
+    def handle(self, *args, **options):
+        stock, clients, quantity = options['stock'], options['clients'], options['quantity']
+        suffix = uuid.uuid4().hex[:8]
+        User = get_user_model()
+
+        category = Category.objects.create(name=f"Loadtest {suffix}", slug=f"loadtest-{suffix}")
+        product = Product.objects.create(category=category, name=f"Plato limitado {suffix}", description='',
+                                         price=Decimal('9.90'), stock=stock)
+        users = [User.objects.create_user(email=f"loadtest-{suffix}-{i}@example.com", password=None,
+                                          first_name='Load', last_name='Test') for i in range(clients)]
+        carts = Cart.objects.bulk_create([Cart(user=user) for user in users])
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=quantity) for cart in carts])
+
+        results = {'ok': 0, 'rejected': 0, 'errors': []}
+        lock = threading.Lock()
+        barrier = threading.Barrier(clients)
+
+        def run(user):
+            try:
+                barrier.wait()
+                checkout(user, 'Calle Falsa 123', '600000000')
+                outcome = 'ok'
+            except CheckoutError:
+                outcome = 'rejected'
+            except Exception as e:  # Bloqueos de SQLite, timeouts...
+                outcome = repr(e)
+            finally:
+                connection.close()
+            with lock:
+                if outcome in ('ok', 'rejected'):
+                    results[outcome] += 1
+                else:
+                    results['errors'].append(outcome)
+
+        try:
+            start = time.perf_counter()
+            threads = [threading.Thread(target=run, args=(user,)) for user in users]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            product.refresh_from_db()
+            reserved = StockReservation.objects.filter(product=product, released_at__isnull=True).aggregate(
+                total=Sum('quantity'))['total'] or 0
+            self.stdout.write(
+                f"{clients} checkouts en {elapsed:.2f}s: {results['ok']} aceptados, {results['rejected']} "
+                f"rechazados por stock, {len(results['errors'])} errores"
+            )
+            self.stdout.write(f"Stock inicial {stock}, reservado {reserved}, restante {product.stock}, "
+                              f"disponible={product.is_available}")
+            for error in sorted(set(results['errors'])):
+                self.stdout.write(f"  error: {error}")
+
+            if reserved > stock or product.stock != stock - reserved or results['ok'] * quantity != reserved:
+                raise CommandError("Sobreventa o inventario inconsistente.")
+            self.stdout.write(self.style.SUCCESS("Sin sobreventa."))
+        finally:
+            Order.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+            category.delete()
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.orders.models import OrderEvent
+
+
+class Command(BaseCommand):
+    help = "Elimina los eventos del canal en vivo más antiguos que ORDER_EVENT_RETENTION_HOURS (ejecutar periódicamente con cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Eventos eliminados por consulta.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=settings.ORDER_EVENT_RETENTION_HOURS)
+        total = 0
+        while True:
+            # Por lotes para no mantener un bloqueo largo sobre la tabla
+            ids = list(OrderEvent.objects.filter(created_at__lt=cutoff)
+                       .values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            total += OrderEvent.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(f"{total} evento(s) de pedido eliminado(s)")
@@ -0,0 +1,43 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.scheduler import release_due_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa a PROCESSING los pedidos programados cuya hora se acerca (SCHEDULED_ORDER_LEAD_MINUTES). "
+        "Se pueden ejecutar varias réplicas a la vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Libera los pedidos vencidos y termina.")
+        parser.add_argument('--batch-size', type=int, default=100, help="Pedidos reclamados por transacción.")
+        parser.add_argument('--interval', type=float, default=30.0, help="Segundos entre comprobaciones.")
+
+    def handle(self, *args, **options):
+        self._stop = False
+        # Terminar la pasada en curso antes de salir (systemd envía SIGTERM)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write("Liberador de pedidos programados iniciado")
+        while not self._stop:
+            started = time.monotonic()
+            lags = release_due_orders(batch_size=options['batch_size'])
+            if lags:
+                self.stdout.write(
+                    f"{len(lags)} pedido(s) liberado(s); retraso medio {sum(lags) / len(lags):.1f}s, máximo {max(lags):.1f}s"
+                )
+            if options['once']:
+                break
+            # Intervalo fijo entre comienzos de pasada, despertando a tiempo si llega una señal
+            deadline = started + options['interval']
+            while not self._stop and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+        self.stdout.write("Liberador de pedidos programados detenido")
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_stockreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KitchenSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(unique=True, verbose_name='Inicio de la Franja')),
+                ('booked', models.PositiveIntegerField(default=0, verbose_name='Pedidos Programados')),
+                ('capacity', models.PositiveIntegerField(blank=True, help_text='Vacío = capacidad por defecto (KITCHEN_SLOT_CAPACITY).', null=True, verbose_name='Capacidad')),
+            ],
+            options={
+                'verbose_name': 'Franja de Cocina',
+                'verbose_name_plural': 'Franjas de Cocina',
+                'ordering': ['start'],
+            },
+        ),
+    ]
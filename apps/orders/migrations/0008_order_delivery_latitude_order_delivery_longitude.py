@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_order_status_scheduled_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivery_latitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Latitud de Entrega'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_longitude',
+            field=models.FloatField(blank=True, null=True, verbose_name='Longitud de Entrega'),
+        ),
+    ]
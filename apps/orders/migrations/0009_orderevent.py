@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_delivery_latitude_order_delivery_longitude'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('PROCESSING', 'Procesando'), ('SCHEDULED', 'Programado'), ('OUT_FOR_DELIVERY', 'En Reparto'), ('DELIVERED', 'Entregado'), ('CANCELLED', 'Cancelado'), ('FAILED', 'Fallido')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('deliverer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='orders.order')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Evento de Pedido',
+                'verbose_name_plural': 'Eventos de Pedido',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='orderevent_user_id_idx'), models.Index(fields=['deliverer', 'id'], name='orderevent_deliverer_id_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_bookings(apps, schema_editor):
+    """
+    Crea las reservas de los pedidos programados que ya ocupan plaza, hasta el
+    número contado en cada KitchenSlot.booked (misma franja que slots.slot_start).
+    """
+    KitchenSlot = apps.get_model('orders', 'KitchenSlot')
+    Order = apps.get_model('orders', 'Order')
+    SlotBooking = apps.get_model('orders', 'SlotBooking')
+    remaining = dict(KitchenSlot.objects.filter(booked__gt=0).values_list('start', 'booked'))
+    if not remaining:
+        return
+    bookings = []
+    orders = (Order.objects.filter(scheduled_datetime__isnull=False)
+              .exclude(status__in=('CANCELLED', 'FAILED')).order_by('created_at'))
+    for order_id, moment in orders.values_list('id', 'scheduled_datetime'):
+        local = timezone.localtime(moment)
+        minutes = local.hour * 60 + local.minute
+        minutes -= minutes % settings.KITCHEN_SLOT_MINUTES
+        start = local.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+        if remaining.get(start, 0) > 0:
+            remaining[start] -= 1
+            bookings.append(SlotBooking(order_id=order_id, start=start))
+    SlotBooking.objects.bulk_create(bookings)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_orderevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(verbose_name='Inicio de la Franja')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('released_at', models.DateTimeField(blank=True, null=True, verbose_name='Liberada')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_bookings', to='orders.order')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Franja',
+                'verbose_name_plural': 'Reservas de Franja',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('released_at__isnull', True)), fields=('order',), name='slot_booking_one_active_per_order')],
+            },
+        ),
+        migrations.RunPython(backfill_bookings, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,13 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from datetime import timedelta
 import uuid
 
+from apps.core.tracking import FieldTrackerMixin
 from apps.menu.models import Product
+from .numbering import generate_order_number
 
 class Cart(models.Model):
     """Carrito de compras asociado a un usuario."""
@@ -18,10 +20,14 @@ class Cart(models.Model):
         return f"Carrito de {self.user.email}"
 
     def get_total_price(self):
-        return sum(item.get_total_price() for item in self.items.all())
+        # Calculado en SQL y memorizado (ver apps/orders/pricing.py)
+        from .pricing import quote_cart
+        return quote_cart(self).total
 
     def clear(self):
         self.items.all().delete()
+        from .pricing import invalidate_quote
+        invalidate_quote(self)
 
 
 class CartItem(models.Model):
@@ -38,10 +44,14 @@ class CartItem(models.Model):
         return f"{self.quantity} x {self.product.name} en {self.cart}"
 
     def get_total_price(self):
+        # Usa la anotación line_total si el item se cargó con pricing.priced_cart_items()
+        line_total = getattr(self, 'line_total', None)
+        if line_total is not None:
+            return line_total
         return self.quantity * self.product.price
 
 
-class Order(models.Model):
+class Order(FieldTrackerMixin, models.Model):
     """Representa un pedido realizado por un usuario."""
     ORDER_STATUS_CHOICES = [
         ('PENDING', 'Pendiente'),
@@ -52,6 +62,8 @@ class Order(models.Model):
         ('CANCELLED', 'Cancelado'),
         ('FAILED', 'Fallido'), # Por si falla el pago u otro motivo
     ]
+    # Campos cuyo cambio se consulta sin volver a leer el pedido (ver apps/orders/signals.py)
+    tracked_fields = ('status', 'assigned_to', 'scheduled_datetime')
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders') # Null si el usuario se elimina
@@ -64,6 +76,9 @@ class Order(models.Model):
     # Campos para dirección de entrega (puedes normalizar esto en un modelo Address si es complejo)
     delivery_address = models.TextField(blank=True, null=True) # O campos separados: street, city, postal_code...
     phone_number = models.CharField(max_length=20, blank=True, null=True) # Teléfono de contacto para la entrega
+    # Coordenadas de entrega (opcionales) para el reparto automático (apps/delivery/dispatch.py)
+    delivery_latitude = models.FloatField(blank=True, null=True, verbose_name="Latitud de Entrega")
+    delivery_longitude = models.FloatField(blank=True, null=True, verbose_name="Longitud de Entrega")
 
     # Campos para pedidos programados
     is_scheduled = models.BooleanField(default=False, verbose_name="Es Programado")
@@ -79,26 +94,28 @@ class Order(models.Model):
         ordering = ['-created_at'] # Pedidos más recientes primero
         verbose_name = "Pedido"
         verbose_name_plural = "Pedidos"
+        indexes = [
+            # Historial ordenado y paginación por cursor (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+            # "Mis pedidos" y pedidos asignados a un repartidor, ya ordenados
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            models.Index(fields=['assigned_to', '-created_at'], name='order_assigned_created_idx'),
+            # Liberador de pedidos programados: SCHEDULED con fecha vencida (release_scheduled_orders)
+            models.Index(fields=['status', 'scheduled_datetime'], name='order_status_scheduled_idx'),
+        ]
 
     def __str__(self):
         return f"Pedido {self.order_number} ({self.user.email if self.user else 'Usuario eliminado'})"
 
     def _generate_order_number(self):
-        # Genera un número de pedido único basado en timestamp y UUID corto
-        ts = timezone.now().strftime('%Y%m%d%H%M%S')
-        unique_id = str(uuid.uuid4())[:6].upper()
-        return f"ORD-{ts}-{unique_id}"
+        # Número único y ordenable sin consultar la BD (ver apps/orders/numbering.py)
+        return generate_order_number()
 
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            self.order_number = self._generate_order_number()
-            # Asegurar unicidad (muy improbable colisión, pero por si acaso)
-            while Order.objects.filter(order_number=self.order_number).exists():
-                self.order_number = self._generate_order_number()
-
-        # Validar fecha programada si aplica
+        # Validar fecha programada si aplica (solo al crear o al cambiarla: un pedido
+        # programado ya vencido debe poder seguir guardándose, ej. al cambiar su estado)
         if self.is_scheduled and self.scheduled_datetime:
-            if self.scheduled_datetime <= timezone.now():
+            if self.has_changed('scheduled_datetime') and self.scheduled_datetime <= timezone.now():
                  raise ValueError("La fecha programada debe ser en el futuro.")
             if self.status == 'PENDING': # Cambiar estado si está programado
                 self.status = 'SCHEDULED'
@@ -107,7 +124,24 @@ class Order(models.Model):
         elif not self.is_scheduled:
             self.scheduled_datetime = None # Limpiar fecha si no es programado
 
-        super().save(*args, **kwargs)
+        if self.order_number:
+            super().save(*args, **kwargs)
+            return
+
+        # La restricción UNIQUE garantiza la unicidad; solo se reintenta si hay colisión
+        for attempt in range(settings.ORDER_NUMBER_MAX_ATTEMPTS):
+            self.order_number = self._generate_order_number()
+            try:
+                with transaction.atomic():  # Savepoint: la transacción exterior sigue usable
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                # El texto del error depende del motor: se comprueba si el número ya existe.
+                # El savepoint ya se ha deshecho, así que la consulta es válida
+                collision = type(self)._base_manager.filter(order_number=self.order_number).exists()
+                if not collision or attempt == settings.ORDER_NUMBER_MAX_ATTEMPTS - 1:
+                    self.order_number = ''
+                    raise
 
     def can_cancel(self):
         """Verifica si el pedido puede ser cancelado según el tiempo límite."""
@@ -138,6 +172,94 @@ class OrderItem(models.Model):
     def get_total_price(self):
         return self.quantity * self.price
 
+class StockReservation(models.Model):
+    """
+    Unidades de un producto con stock descontadas por un pedido.
+    Se devuelven al inventario si el pedido se cancela o falla (ver apps/orders/inventory.py).
+    """
+    order = models.ForeignKey(Order, related_name='stock_reservations', on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, related_name='stock_reservations', on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True, verbose_name="Liberada")
+
+    class Meta:
+        verbose_name = "Reserva de Stock"
+        verbose_name_plural = "Reservas de Stock"
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} (Pedido {self.order_id})"
+
+class OrderEvent(models.Model):
+    """
+    Registro de cambios de un pedido (estado o repartidor) para el canal en vivo
+    (/api/orders/events/). El id es el Last-Event-ID con el que el cliente reanuda.
+    Guarda el cliente y el repartidor del momento para filtrar sin JOIN.
+    """
+    order = models.ForeignKey(Order, related_name='events', on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    deliverer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=Order.ORDER_STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Evento de Pedido"
+        verbose_name_plural = "Eventos de Pedido"
+        indexes = [
+            # Reanudación por usuario o repartidor: id > Last-Event-ID
+            models.Index(fields=['user', 'id'], name='orderevent_user_id_idx'),
+            models.Index(fields=['deliverer', 'id'], name='orderevent_deliverer_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.status}"
+
+
+class KitchenSlot(models.Model):
+    """
+    Contador de pedidos programados por franja de cocina (KITCHEN_SLOT_MINUTES).
+    Solo existen filas para franjas con reservas o con capacidad propia; el resto
+    tiene la capacidad por defecto (KITCHEN_SLOT_CAPACITY). Ver apps/orders/slots.py.
+    """
+    start = models.DateTimeField(unique=True, verbose_name="Inicio de la Franja")
+    booked = models.PositiveIntegerField(default=0, verbose_name="Pedidos Programados")
+    capacity = models.PositiveIntegerField(null=True, blank=True, verbose_name="Capacidad", help_text="Vacío = capacidad por defecto (KITCHEN_SLOT_CAPACITY).")
+
+    class Meta:
+        ordering = ['start']
+        verbose_name = "Franja de Cocina"
+        verbose_name_plural = "Franjas de Cocina"
+
+    def __str__(self):
+        return f"{timezone.localtime(self.start):%Y-%m-%d %H:%M} ({self.booked}/{self.get_capacity()})"
+
+    def get_capacity(self):
+        return self.capacity if self.capacity is not None else settings.KITCHEN_SLOT_CAPACITY
+
+
+class SlotBooking(models.Model):
+    """
+    Plaza que ocupa un pedido programado en KitchenSlot.booked. Se libera una
+    sola vez (released_at) aunque el pedido se cancele desde dos sitios a la vez.
+    Cada pedido tiene como mucho una reserva activa (ver apps/orders/slots.py).
+    """
+    order = models.ForeignKey(Order, related_name='slot_bookings', on_delete=models.CASCADE)
+    start = models.DateTimeField(verbose_name="Inicio de la Franja")
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True, verbose_name="Liberada")
+
+    class Meta:
+        verbose_name = "Reserva de Franja"
+        verbose_name_plural = "Reservas de Franja"
+        constraints = [
+            models.UniqueConstraint(fields=['order'], condition=models.Q(released_at__isnull=True),
+                                    name='slot_booking_one_active_per_order'),
+        ]
+
+    def __str__(self):
+        return f"{timezone.localtime(self.start):%Y-%m-%d %H:%M} (Pedido {self.order_id})"
+
 # Añadir campo is_deliverer al modelo User (ejecuta makemigrations y migrate después)
 # Añade esto a tu apps/users/models.py y crea la migración:
 # class User(...):
@@ -0,0 +1,99 @@
+"""
+Generador de números de pedido al estilo Snowflake, sin consultar la base de datos.
+
+Cada número es ORD-AAAAMMDD-XXXXXXXXXXXXX, donde la parte final es un entero de
+63 bits en base32 (Crockford, 13 caracteres con ceros a la izquierda):
+
+    41 bits  milisegundos desde ORDER_NUMBER_EPOCH_MS (~69 años)
+    10 bits  identificador de worker (0-1023)
+    12 bits  secuencia dentro del mismo milisegundo (4096 por ms y worker)
+
+Los números son únicos por worker, crecen con el tiempo y se ordenan como texto.
+Si dos procesos comparten worker id la restricción UNIQUE lo detecta y
+Order.save reintenta con otro número.
+"""
+import hashlib
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def _encode_base32(value, length=13):
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 32)
+        chars.append(CROCKFORD_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def _default_worker_id():
+    """ORDER_NUMBER_WORKER_ID si está configurado; si no, derivado de máquina + pid."""
+    if settings.ORDER_NUMBER_WORKER_ID is not None:
+        return settings.ORDER_NUMBER_WORKER_ID & MAX_WORKER_ID
+    seed = f"{socket.gethostname()}:{os.getpid()}".encode()
+    return int.from_bytes(hashlib.sha256(seed).digest()[:2], 'big') & MAX_WORKER_ID
+
+
+class OrderNumberGenerator:
+    """Generador seguro entre hilos; se usa una instancia por proceso."""
+
+    def __init__(self, worker_id=None, epoch_ms=None):
+        self.worker_id = (worker_id if worker_id is not None else _default_worker_id()) & MAX_WORKER_ID
+        self.epoch_ms = epoch_ms if epoch_ms is not None else settings.ORDER_NUMBER_EPOCH_MS
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _next_id(self):
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms < self._last_ms:
+                # El reloj ha retrocedido: seguir en el último milisegundo emitido
+                now_ms = self._last_ms
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Secuencia agotada en este milisegundo: esperar al siguiente
+                    while now_ms <= self._last_ms:
+                        now_ms = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            elapsed = now_ms - self.epoch_ms
+            return (elapsed << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence, now_ms
+
+    def generate(self):
+        value, now_ms = self._next_id()
+        day = datetime.fromtimestamp(now_ms / 1000, tz=dt_timezone.utc).strftime('%Y%m%d')
+        return f"ORD-{day}-{_encode_base32(value)}"
+
+
+_generator = None
+_generator_pid = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """Generador del proceso. Tras un fork (gunicorn) el hijo crea el suyo con otro worker id."""
+    global _generator, _generator_pid
+    if _generator is None or _generator_pid != os.getpid():
+        with _generator_lock:
+            if _generator is None or _generator_pid != os.getpid():
+                _generator = OrderNumberGenerator()
+                _generator_pid = os.getpid()
+    return _generator
+
+
+def generate_order_number():
+    """Devuelve un número de pedido nuevo."""
+    return get_generator().generate()
@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """
+    Paginación por cursor sobre (created_at, id), sin COUNT(*) ni OFFSET: cada
+    página cuesta lo mismo que la primera. La recorre el índice
+    order_created_id_idx (o los compuestos por usuario/repartidor).
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def wants_cursor_pagination(request):
+    """El cliente la elige con ?pagination=cursor; los enlaces next/previous llevan ?cursor=."""
+    params = request.query_params
+    return params.get('pagination') == 'cursor' or 'cursor' in params
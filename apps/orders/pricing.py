@@ -0,0 +1,101 @@
+"""
+Precio del carrito calculado en SQL.
+
+Las líneas se anotan con line_total = quantity * product.price en la misma
+consulta que carga los items, y el subtotal del carrito sale de esas
+anotaciones, de un Sum() anotado sobre el carrito o, si no hay nada
+precargado, de un único aggregate(). CartQuote desglosa el total para poder
+añadir impuestos, descuentos y gastos de envío sin tocar a los consumidores.
+"""
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+from .models import CartItem
+
+CENT = Decimal('0.01')
+
+
+def line_total_expression(prefix=''):
+    """quantity * product.price; `prefix` permite usarla desde el carrito ('items__')."""
+    return ExpressionWrapper(
+        F(f'{prefix}quantity') * F(f'{prefix}product__price'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def priced_cart_items(queryset=None):
+    """Items del carrito con su producto y la anotación line_total."""
+    queryset = queryset if queryset is not None else CartItem.objects.all()
+    return queryset.select_related('product__category').annotate(line_total=line_total_expression())
+
+
+def annotate_cart_subtotals(queryset):
+    """Anota items_subtotal en un queryset de carritos (un solo GROUP BY para todo el listado)."""
+    return queryset.annotate(items_subtotal=Sum(line_total_expression('items__')))
+
+
+@dataclass(frozen=True)
+class CartQuote:
+    subtotal: Decimal
+    taxes: Decimal
+    discounts: Decimal
+    delivery_fee: Decimal
+    total: Decimal
+
+    def as_dict(self):
+        return {
+            'subtotal': self.subtotal,
+            'taxes': self.taxes,
+            'discounts': self.discounts,
+            'delivery_fee': self.delivery_fee,
+            'total': self.total,
+        }
+
+
+def _money(value):
+    return (value or Decimal('0')).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _cart_subtotal(cart):
+    if hasattr(cart, 'items_subtotal'):
+        return cart.items_subtotal
+    prefetched = getattr(cart, '_prefetched_objects_cache', {}).get('items')
+    if prefetched is not None and all(hasattr(item, 'line_total') for item in prefetched):
+        return sum((item.line_total for item in prefetched), Decimal('0'))
+    return CartItem.objects.filter(cart=cart).aggregate(subtotal=Sum(line_total_expression()))['subtotal']
+
+
+def quote_cart(cart):
+    """
+    Desglose del precio del carrito. Se memoriza en la instancia, así que
+    serializer, vista y admin comparten el mismo cálculo dentro de una petición.
+    """
+    quote = getattr(cart, '_pricing_quote', None)
+    if quote is None:
+        quote = build_quote(_cart_subtotal(cart))
+        cart._pricing_quote = quote
+    return quote
+
+
+def build_quote(subtotal):
+    """Aplica impuestos, descuentos y gastos de envío a un subtotal de líneas."""
+    subtotal = _money(subtotal)
+    # Los precios del menú ya incluyen impuestos; CART_TAX_RATE solo se usa si se publican sin ellos
+    taxes = _money(subtotal * Decimal(str(settings.CART_TAX_RATE)))
+    discounts = Decimal('0.00')  # Punto de extensión para cupones/promociones
+    delivery_fee = _money(Decimal(str(settings.CART_DELIVERY_FEE))) if subtotal else Decimal('0.00')
+    return CartQuote(
+        subtotal=subtotal,
+        taxes=taxes,
+        discounts=discounts,
+        delivery_fee=delivery_fee,
+        total=subtotal + taxes - discounts + delivery_fee,
+    )
+
+
+def invalidate_quote(cart):
+    """Olvida el precio memorizado (tras modificar los items en la misma petición)."""
+    cart.__dict__.pop('_pricing_quote', None)
@@ -0,0 +1,63 @@
+"""
+Liberación de pedidos programados.
+
+Los pedidos SCHEDULED pasan a PROCESSING cuando faltan
+SCHEDULED_ORDER_LEAD_MINUTES para su hora. Cada lote se reclama con
+SELECT ... FOR UPDATE SKIP LOCKED sobre el índice (status, scheduled_datetime),
+así varias réplicas de release_scheduled_orders se reparten los pedidos sin
+procesar dos veces el mismo, y se actualiza con un único UPDATE.
+El cambio a PROCESSING no envía notificaciones (ver STATUS_NOTIFICATIONS);
+sí se registra en el canal en vivo (apps/orders/events.py).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core import metrics
+from .events import record_order_events
+from .models import Order
+
+
+def release_cutoff(now=None):
+    """Los pedidos programados hasta este instante ya deben ir a cocina."""
+    return (now or timezone.now()) + timedelta(minutes=settings.SCHEDULED_ORDER_LEAD_MINUTES)
+
+
+def due_orders(now=None):
+    return Order.objects.filter(status='SCHEDULED', scheduled_datetime__lte=release_cutoff(now))
+
+
+def release_batch(batch_size=100, now=None):
+    """
+    Pasa a PROCESSING un lote de pedidos vencidos. Devuelve la lista de
+    retrasos (segundos entre el momento en que debían liberarse y ahora).
+    """
+    now = now or timezone.now()
+    lead = timedelta(minutes=settings.SCHEDULED_ORDER_LEAD_MINUTES)
+    with transaction.atomic():
+        claimed = list(due_orders(now).select_for_update(skip_locked=True)
+                       .order_by('scheduled_datetime')
+                       .values_list('id', 'scheduled_datetime', 'user_id', 'assigned_to_id')[:batch_size])
+        if not claimed:
+            return []
+        Order.objects.filter(id__in=[row[0] for row in claimed]).update(status='PROCESSING', updated_at=now)
+        # El UPDATE masivo no dispara post_save: los eventos del canal en vivo se registran aquí
+        record_order_events([(order_id, user_id, deliverer_id, 'PROCESSING')
+                             for order_id, _, user_id, deliverer_id in claimed])
+    return [max((now - (scheduled - lead)).total_seconds(), 0.0) for _, scheduled, _, _ in claimed]
+
+
+def release_due_orders(batch_size=100):
+    """Libera todos los pedidos vencidos por lotes y registra las métricas. Devuelve los retrasos."""
+    lags = []
+    while True:
+        batch = release_batch(batch_size)
+        lags.extend(batch)
+        if len(batch) < batch_size:
+            break
+    metrics.observe('scheduler.release_lag_seconds', lags)
+    metrics.gauge('scheduler.released_last_run', len(lags))
+    metrics.gauge('scheduler.last_run_at', timezone.now().isoformat())
+    return lags
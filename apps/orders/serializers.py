@@ -7,6 +7,8 @@ from django.utils import timezone
 from django.conf import settings # Importar settings
 
 from .models import Cart, CartItem, Order, OrderItem
+from .pricing import quote_cart
+from .slots import MIN_LEAD_TIME, SlotUnavailable, check_slot
 from apps.menu.serializers import ProductSerializer
 from apps.menu.models import Product
 
@@ -34,11 +36,56 @@ class CartItemSerializer(serializers.ModelSerializer):
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total_price = serializers.DecimalField(source='get_total_price', max_digits=10, decimal_places=2, read_only=True)
+    pricing = serializers.SerializerMethodField()
     user = serializers.StringRelatedField()
 
     class Meta:
         model = Cart
-        fields = ['id', 'user', 'items', 'total_price', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'items', 'total_price', 'pricing', 'created_at', 'updated_at']
+
+    def get_pricing(self, obj):
+        # Mismo cálculo memorizado que total_price (sin consulta adicional)
+        return {key: str(value) for key, value in quote_cart(obj).as_dict().items()}
+
+
+class CartSyncOperationSerializer(serializers.Serializer):
+    """Una operación encolada por el cliente, referida al producto (el item puede no existir aún)."""
+    OP_CHOICES = [('add', 'Sumar cantidad'), ('set', 'Fijar cantidad'), ('remove', 'Eliminar')]
+    op = serializers.ChoiceField(choices=OP_CHOICES)
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(required=False, min_value=0)
+
+    def validate(self, data):
+        if data['op'] == 'add' and not data.get('quantity'):
+            raise serializers.ValidationError({"quantity": "La cantidad a sumar debe ser al menos 1."})
+        if data['op'] == 'set' and data.get('quantity') is None:
+            raise serializers.ValidationError({"quantity": "Debe indicar la cantidad."})
+        return data
+
+
+class CartSyncItemSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CartSyncSerializer(serializers.Serializer):
+    """
+    Sincronización por lotes del carrito: o bien una lista de operaciones
+    (`operations`), o bien el estado final deseado (`items`), no ambas.
+    """
+    operations = CartSyncOperationSerializer(many=True, required=False)
+    items = CartSyncItemSerializer(many=True, required=False)
+
+    def validate(self, data):
+        if ('operations' in data) == ('items' in data):
+            raise serializers.ValidationError("Envíe 'operations' o 'items', pero no ambos.")
+        if len(data.get('operations') or data.get('items') or []) > 200:
+            raise serializers.ValidationError("Demasiados elementos en una sola sincronización (máximo 200).")
+        if 'items' in data:
+            product_ids = [item['product_id'] for item in data['items']]
+            if len(product_ids) != len(set(product_ids)):
+                raise serializers.ValidationError({"items": "Cada producto solo puede aparecer una vez."})
+        return data
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -65,6 +112,7 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'order_number', 'user', 'items', 'total_price', 'status', 'status_display',
             'delivery_address', 'phone_number', 'notes',
+            'delivery_latitude', 'delivery_longitude',
             'is_scheduled', 'scheduled_datetime',
             'assigned_to', # ID para asignación (write-only si usas otra vista/serializer para asignar)
             'assigned_to_info', # Info legible del repartidor (read-only)
@@ -115,12 +163,24 @@ class CreateOrderSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True, allow_null=True) # Permitir null también
     is_scheduled = serializers.BooleanField(default=False)
     scheduled_datetime = serializers.DateTimeField(required=False, allow_null=True)
+    # Opcionales: permiten al reparto automático elegir el repartidor más cercano
+    delivery_latitude = serializers.FloatField(required=False, allow_null=True, min_value=-90, max_value=90)
+    delivery_longitude = serializers.FloatField(required=False, allow_null=True, min_value=-180, max_value=180)
 
     def validate_scheduled_datetime(self, value):
          """Validación específica para la fecha programada."""
          # Se llama solo si 'scheduled_datetime' se proporciona en la data
-         if value and value <= timezone.now() + timedelta(hours=1): # Añadir margen mínimo
+         if value and value <= timezone.now() + MIN_LEAD_TIME: # Añadir margen mínimo
              raise serializers.ValidationError(f"La fecha programada debe ser al menos una hora en el futuro.")
+         if value:
+             # Horario y capacidad de cocina; el checkout vuelve a comprobarlo al reservar la franja
+             try:
+                 check_slot(value)
+             except SlotUnavailable as e:
+                 raise serializers.ValidationError({
+                     'message': e.message,
+                     'suggested_slots': [start.isoformat() for start in e.suggestions],
+                 })
          return value
 
     def validate(self, data):
@@ -135,21 +195,8 @@ class CreateOrderSerializer(serializers.Serializer):
              # Si se proporciona fecha pero no está marcado como programado
             raise serializers.ValidationError({"is_scheduled": "Marque como 'pedido programado' si proporciona una fecha."})
 
-        # Validar que el carrito no esté vacío (contexto debe pasarse desde la vista)
-        request = self.context.get('request')
-        if not request or not hasattr(request, 'user'):
-             # Esto no debería pasar si la vista requiere autenticación
-             raise serializers.ValidationError("Error interno: No se pudo determinar el usuario.")
-
-        user = request.user
-        try:
-            # Usar select_related para optimizar un poco si accedes a campos del producto aquí
-            cart = Cart.objects.prefetch_related('items__product').get(user=user)
-            if not cart.items.exists():
-                 raise serializers.ValidationError({"cart": "El carrito está vacío. Añade productos antes de crear un pedido."}) # Error a nivel de carrito
-        except Cart.DoesNotExist:
-             raise serializers.ValidationError({"cart": "No se encontró un carrito activo para este usuario."})
-
+        # El carrito (vacío, productos disponibles) lo valida el checkout en la
+        # misma transacción que crea el pedido, sin cargarlo aquí otra vez
         return data
 
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,209 @@
+"""
+Mutaciones del carrito.
+
+add_to_cart hace un upsert atómico: dos peticiones simultáneas sobre el mismo
+producto suman sus cantidades en lugar de perder una. En PostgreSQL y SQLite
+es un único INSERT ... SELECT ... ON CONFLICT DO UPDATE ... RETURNING; en el
+resto de backends se usa un UPDATE con F() y un INSERT de respaldo.
+
+sync_cart aplica en una transacción un lote de cambios (o el estado final
+deseado). Las mutaciones de un solo item no bloquean el carrito, así que sus
+escrituras están condicionadas a lo leído: si una mutación simultánea cambió
+el carrito entretanto, se deshace y se vuelve a intentar (o 412 con If-Match).
+"""
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Prefetch, Q
+
+from apps.menu.models import Product
+from .models import Cart, CartItem
+from .pricing import priced_cart_items
+
+
+def get_cart_id(user):
+    """Id del carrito del usuario, creándolo si no existe."""
+    cart_id = Cart.objects.filter(user=user).values_list('id', flat=True).first()
+    if cart_id is None:
+        cart_id = Cart.objects.get_or_create(user=user)[0].id
+    return cart_id
+
+
+def _supports_upsert_returning():
+    return connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert
+
+
+def _upsert_sql():
+    qn = connection.ops.quote_name
+    item_table = qn(CartItem._meta.db_table)
+    product_table = qn(Product._meta.db_table)
+    # El SELECT sobre el producto hace que no se inserte nada si no existe o no está disponible
+    return (
+        f"INSERT INTO {item_table} ({qn('cart_id')}, {qn('product_id')}, {qn('quantity')}) "
+        f"SELECT %s, {qn('id')}, %s FROM {product_table} WHERE {qn('id')} = %s AND {qn('is_available')} = %s "
+        f"ON CONFLICT ({qn('cart_id')}, {qn('product_id')}) "
+        f"DO UPDATE SET {qn('quantity')} = {item_table}.{qn('quantity')} + excluded.{qn('quantity')} "
+        f"RETURNING {qn('id')}, {qn('quantity')}"
+    )
+
+
+def _add_with_f_expression(cart_id, product_id, quantity):
+    with transaction.atomic():
+        if not Product.objects.filter(pk=product_id, is_available=True).exists():
+            return None
+        items = CartItem.objects.filter(cart_id=cart_id, product_id=product_id)
+        if not items.update(quantity=F('quantity') + quantity):
+            try:
+                with transaction.atomic():
+                    item = CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                return item.id, item.quantity
+            except IntegrityError:
+                # Otra petición lo insertó entre el UPDATE y el INSERT
+                items.update(quantity=F('quantity') + quantity)
+        return items.values_list('id', 'quantity').get()
+
+
+def add_to_cart(cart_id, product_id, quantity):
+    """
+    Suma `quantity` unidades del producto al carrito de forma atómica.
+    Devuelve (item_id, cantidad_resultante) o None si el producto no existe o no está disponible.
+    """
+    if not _supports_upsert_returning():
+        return _add_with_f_expression(cart_id, product_id, quantity)
+    with connection.cursor() as cursor:
+        db_cart_id = CartItem._meta.get_field('cart').get_db_prep_value(cart_id, connection)
+        cursor.execute(_upsert_sql(), [db_cart_id, quantity, product_id, True])
+        row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def set_cart_item_quantity(user, item_id, quantity):
+    """Fija la cantidad de un item del carrito del usuario. Devuelve False si no existe."""
+    return CartItem.objects.filter(id=item_id, cart__user=user).update(quantity=quantity) > 0
+
+
+def remove_cart_item(user, item_id):
+    """Elimina un item del carrito del usuario. Devuelve False si no existe."""
+    deleted, _ = CartItem.objects.filter(id=item_id, cart__user=user).delete()
+    return deleted > 0
+
+
+def cart_version(lines):
+    """ETag del contenido del carrito a partir de pares (product_id, quantity)."""
+    payload = '\n'.join(f"{product_id}:{quantity}" for product_id, quantity in sorted(lines))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_cart_for_response(cart_id):
+    """Carrito con items (y su line_total), productos y categorías precargados para CartSerializer."""
+    items = priced_cart_items()
+    return Cart.objects.select_related('user').prefetch_related(Prefetch('items', queryset=items)).get(pk=cart_id)
+
+
+class CartVersionMismatch(Exception):
+    """El carrito cambió desde la versión indicada en If-Match."""
+
+    def __init__(self, current_version):
+        super().__init__(current_version)
+        self.current_version = current_version
+
+
+class CartConflict(Exception):
+    """Una mutación simultánea (add-item, update-item...) cambió el carrito durante la sincronización."""
+
+
+class UnavailableProducts(Exception):
+    """Alguno de los productos del lote no existe o no está disponible."""
+
+    def __init__(self, product_ids):
+        super().__init__(product_ids)
+        self.product_ids = sorted(product_ids)
+
+
+def _apply_operations(current, operations):
+    desired = dict(current)
+    for operation in operations:
+        product_id, quantity = operation['product_id'], operation.get('quantity')
+        if operation['op'] == 'add':
+            desired[product_id] = desired.get(product_id, 0) + quantity
+        elif operation['op'] == 'set':
+            desired[product_id] = quantity
+        else:
+            desired[product_id] = 0
+    return {product_id: quantity for product_id, quantity in desired.items() if quantity > 0}
+
+
+# Intentos de sync_cart sin If-Match antes de responder 409
+SYNC_ATTEMPTS = 3
+
+
+def sync_cart(user, operations=None, items=None, expected_version=None):
+    """
+    Lleva el carrito del usuario al estado resultante de `operations` o al estado
+    final `items` en una única transacción. El carrito se bloquea (SELECT FOR
+    UPDATE) para que dos sincronizaciones del mismo usuario no se intercalen; si
+    una mutación de un item se cuela entretanto, la transacción se deshace y se
+    repite sobre el carrito nuevo. Con `expected_version` no se repite: el
+    carrito ya no es el que el cliente conocía (CartVersionMismatch).
+    Devuelve el id del carrito.
+    """
+    cart_id = get_cart_id(user)
+    for _ in range(SYNC_ATTEMPTS):
+        try:
+            _sync_cart_once(cart_id, operations, items, expected_version)
+            return cart_id
+        except CartConflict:
+            if expected_version is not None:
+                lines = CartItem.objects.filter(cart_id=cart_id).values_list('product_id', 'quantity')
+                raise CartVersionMismatch(cart_version(lines))
+    raise CartConflict()
+
+
+def _locked_cart_items(cart_id):
+    """Bloquea el carrito frente a otras sincronizaciones y devuelve sus items por producto."""
+    Cart.objects.select_for_update().filter(pk=cart_id).values_list('id', flat=True).get()
+    return {item.product_id: item for item in CartItem.objects.filter(cart_id=cart_id).only('id', 'product_id', 'quantity')}
+
+
+def _sync_cart_once(cart_id, operations, items, expected_version):
+    with transaction.atomic():
+        existing = _locked_cart_items(cart_id)
+        current = {product_id: item.quantity for product_id, item in existing.items()}
+
+        if expected_version is not None and expected_version != cart_version(current.items()):
+            raise CartVersionMismatch(cart_version(current.items()))
+
+        if items is not None:
+            desired = {item['product_id']: item['quantity'] for item in items}
+        else:
+            desired = _apply_operations(current, operations or [])
+
+        # Solo se validan los productos que se añaden o cuya cantidad aumenta
+        growing = {product_id for product_id, quantity in desired.items() if quantity > current.get(product_id, 0)}
+        if growing:
+            available = set(Product.objects.filter(pk__in=growing, is_available=True).values_list('id', flat=True))
+            if growing - available:
+                raise UnavailableProducts(growing - available)
+
+        to_create = [CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity)
+                     for product_id, quantity in desired.items() if product_id not in existing]
+        to_update = [(item, desired[product_id]) for product_id, item in existing.items()
+                     if product_id in desired and desired[product_id] != item.quantity]
+        to_delete = [item for product_id, item in existing.items() if product_id not in desired]
+
+        # Cada escritura exige que el item siga como se leyó; si no, otra petición lo cambió
+        if to_create:
+            try:
+                CartItem.objects.bulk_create(to_create)
+            except IntegrityError:
+                raise CartConflict()  # Un add-item insertó el mismo producto
+        for item, quantity in to_update:
+            if not CartItem.objects.filter(id=item.id, quantity=item.quantity).update(quantity=quantity):
+                raise CartConflict()
+        if to_delete:
+            matching = reduce(or_, (Q(id=item.id, quantity=item.quantity) for item in to_delete))
+            _, deleted = CartItem.objects.filter(matching).delete()
+            if deleted.get(CartItem._meta.label, 0) != len(to_delete):
+                raise CartConflict()
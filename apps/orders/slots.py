@@ -0,0 +1,149 @@
+"""
+Capacidad de cocina para pedidos programados.
+
+El día se divide en franjas de KITCHEN_SLOT_MINUTES entre KITCHEN_OPENING_TIME
+y KITCHEN_CLOSING_TIME (hora local). Cada franja admite KITCHEN_SLOT_CAPACITY
+pedidos, salvo que KitchenSlot.capacity indique otra cosa. La ocupación se
+guarda agregada en KitchenSlot.booked: reservar es un UPDATE condicional
+(booked < capacidad) y la disponibilidad de un día es una sola consulta.
+Cada plaza ocupada queda registrada en SlotBooking, que es lo que se libera:
+así una plaza se devuelve una sola vez aunque el pedido se cancele dos veces
+a la vez (cliente y administrador, por ejemplo).
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import KitchenSlot, SlotBooking
+
+# Antelación mínima de un pedido programado
+MIN_LEAD_TIME = timedelta(hours=1)
+
+
+class SlotUnavailable(Exception):
+    """La franja está completa o fuera del horario de cocina."""
+
+    def __init__(self, message, suggestions=None):
+        super().__init__(message)
+        self.message = message
+        self.suggestions = suggestions or []
+
+
+def slot_length():
+    return timedelta(minutes=settings.KITCHEN_SLOT_MINUTES)
+
+
+def slot_start(moment):
+    """Inicio (hora local) de la franja que contiene `moment`."""
+    local = timezone.localtime(moment)
+    minutes = local.hour * 60 + local.minute
+    minutes -= minutes % settings.KITCHEN_SLOT_MINUTES
+    return local.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def day_slot_starts(day):
+    """Inicios de todas las franjas del día (fecha local) dentro del horario de cocina."""
+    current = timezone.make_aware(datetime.combine(day, time.fromisoformat(settings.KITCHEN_OPENING_TIME)))
+    closing = timezone.make_aware(datetime.combine(day, time.fromisoformat(settings.KITCHEN_CLOSING_TIME)))
+    starts = []
+    while current + slot_length() <= closing:
+        starts.append(current)
+        current += slot_length()
+    return starts
+
+
+def get_day_availability(day, now=None):
+    """Ocupación de cada franja del día con una única consulta a KitchenSlot."""
+    starts = day_slot_starts(day)
+    if not starts:
+        return []
+    rows = {slot.start: slot for slot in KitchenSlot.objects.filter(start__gte=starts[0], start__lte=starts[-1])}
+    earliest = (now or timezone.now()) + MIN_LEAD_TIME
+    availability = []
+    for start in starts:
+        slot = rows.get(start)
+        capacity = slot.get_capacity() if slot else settings.KITCHEN_SLOT_CAPACITY
+        booked = slot.booked if slot else 0
+        availability.append({
+            'start': start,
+            'end': start + slot_length(),
+            'capacity': capacity,
+            'booked': booked,
+            'remaining': max(capacity - booked, 0),
+            'available': booked < capacity and start >= earliest,
+        })
+    return availability
+
+
+def suggest_slots(moment, limit=3):
+    """Franjas libres del mismo día más cercanas a `moment`."""
+    free = [slot['start'] for slot in get_day_availability(timezone.localtime(moment).date()) if slot['available']]
+    return sorted(sorted(free, key=lambda start: abs(start - moment))[:limit])
+
+
+def check_slot(moment):
+    """Lanza SlotUnavailable si `moment` cae fuera de horario o en una franja completa (sin reservar)."""
+    start = slot_start(moment)
+    slot = next((s for s in get_day_availability(start.date()) if s['start'] == start), None)
+    if slot is None:
+        raise SlotUnavailable("La hora elegida está fuera del horario de cocina.", suggest_slots(moment))
+    if slot['remaining'] == 0:
+        raise SlotUnavailable("La franja elegida está completa.", suggest_slots(moment))
+
+
+def book_slot(moment, force=False):
+    """
+    Ocupa una plaza en la franja de `moment` y devuelve su inicio. Sin `force`,
+    solo si queda capacidad (UPDATE condicional, seguro ante reservas simultáneas);
+    si no, SlotUnavailable.
+    """
+    start = slot_start(moment)
+    if not force and start not in day_slot_starts(start.date()):
+        raise SlotUnavailable("La hora elegida está fuera del horario de cocina.", suggest_slots(moment))
+    KitchenSlot.objects.bulk_create([KitchenSlot(start=start)], ignore_conflicts=True)
+    slots = KitchenSlot.objects.filter(start=start)
+    if not force:
+        slots = slots.filter(booked__lt=Coalesce('capacity', Value(settings.KITCHEN_SLOT_CAPACITY)))
+    if not slots.update(booked=F('booked') + 1):
+        raise SlotUnavailable("La franja elegida está completa.", suggest_slots(moment))
+    return start
+
+
+def _release_slot(start):
+    KitchenSlot.objects.filter(start=start, booked__gt=0).update(booked=F('booked') - 1)
+
+
+def book_order_slot(order, force=False):
+    """
+    Ocupa una plaza en la franja de order.scheduled_datetime y la registra a
+    nombre del pedido. Si otra petición ya le reservó una entretanto (solo se
+    permite una activa por pedido), se devuelve la plaza recién ocupada.
+    """
+    start = book_slot(order.scheduled_datetime, force=force)
+    try:
+        with transaction.atomic():
+            SlotBooking.objects.create(order=order, start=start)
+    except IntegrityError:
+        _release_slot(start)
+
+
+def release_order_slot(order):
+    """
+    Libera la plaza que ocupa el pedido, si tiene alguna. Marcar la reserva como
+    liberada es un UPDATE condicional (released_at IS NULL): de dos cancelaciones
+    simultáneas solo una descuenta booked. Devuelve True si se liberó.
+    """
+    with transaction.atomic():
+        booking = (SlotBooking.objects.select_for_update()
+                   .filter(order=order, released_at__isnull=True).values_list('id', 'start').first())
+        if booking is None:
+            return False
+        booking_id, start = booking
+        if not SlotBooking.objects.filter(id=booking_id, released_at__isnull=True).update(released_at=timezone.now()):
+            return False
+        _release_slot(start)
+    return True
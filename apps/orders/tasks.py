@@ -0,0 +1,73 @@
+# Tareas en segundo plano de la app de pedidos (ejecutadas por apps.jobs)
+
+from django.conf import settings
+
+from apps.jobs.registry import task
+from apps.mailer.rendering import render_email
+from apps.invoices.services import get_or_render_invoice
+from apps.invoices.storage import InvoiceStore
+from .models import Order
+from .utils import send_order_email, send_order_email_with_attachment
+
+# Plantilla (emails/<nombre>.html y .txt) y asunto de las notificaciones por cambio de estado
+STATUS_NOTIFICATIONS = {
+    'OUT_FOR_DELIVERY': ('order_out_for_delivery', "¡Tu pedido #{number} está en camino! - {restaurant}"),
+    'DELIVERED': ('order_delivered', "¡Tu pedido #{number} ha sido entregado! - {restaurant}"),
+}
+
+
+def _load_order(order_id):
+    try:
+        return Order.objects.select_related('user').prefetch_related('items').get(pk=order_id)
+    except Order.DoesNotExist:
+        # El pedido se borró antes de procesar la tarea: nada que hacer
+        print(f"Pedido {order_id} no encontrado; se omite la notificación")
+        return None
+
+
+@task('orders.send_order_confirmation')
+def send_order_confirmation(order_id):
+    """Envía el email de confirmación de un pedido nuevo con la factura adjunta."""
+    order = _load_order(order_id)
+    if order is None or not order.user:
+        return
+
+    user = order.user
+    subject = f"Confirmación de tu pedido #{order.order_number} en {settings.RESTAURANT_NAME}"
+    message_txt, message_html = render_email('order_confirmation', {'order': order, 'user': user})
+
+    try:
+        # La factura se renderiza una única vez y queda almacenada para las descargas
+        store = InvoiceStore()
+        invoice = get_or_render_invoice(order, store=store)
+    except Exception as e:
+        # Enviar solo confirmación si falla la factura (se puede descargar más tarde)
+        print(f"Error generando factura para pedido {order.order_number}: {e}")
+        send_order_email(subject, message_txt, user.email, html_message=message_html)
+        print(f"Email de confirmación (sin factura) encolado para pedido {order.order_number}")
+        return
+
+    # El PDF se adjunta desde el almacén (direccionado por contenido, no cambia)
+    send_order_email_with_attachment(
+        subject, message_txt, user.email,
+        attachment_path=store.path(invoice.sha256),
+        attachment_filename=f"factura_{order.order_number}.pdf",
+        html_message=message_html
+    )
+    print(f"Email de confirmación y factura encolados para pedido {order.order_number}")
+
+
+@task('orders.send_order_status_email')
+def send_order_status_email(order_id, status):
+    """Envía la notificación asociada a un cambio de estado del pedido."""
+    if status not in STATUS_NOTIFICATIONS:
+        return
+    order = _load_order(order_id)
+    if order is None or not order.user:
+        return
+
+    template_name, subject_template = STATUS_NOTIFICATIONS[status]
+    subject = subject_template.format(number=order.order_number, restaurant=settings.RESTAURANT_NAME)
+    message_txt, message_html = render_email(template_name, {'order': order, 'user': order.user})
+    send_order_email(subject, message_txt, order.user.email, html_message=message_html)
+    print(f"Email de '{status}' encolado para pedido {order.order_number}")
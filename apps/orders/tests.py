@@ -0,0 +1,449 @@
+import json
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.idempotency import _reserve
+from apps.core.models import IdempotencyRecord
+from apps.menu.models import Category, Product
+from .events import EventCursor, visible_events
+from .inventory import RELEASE_STATUSES, InsufficientStock, release_reservations, reserve_stock
+from .models import CartItem, KitchenSlot, Order, OrderEvent, SlotBooking, StockReservation
+from .numbering import generate_order_number
+from .scheduler import release_due_orders
+from .services import SYNC_ATTEMPTS, _locked_cart_items
+from .slots import book_order_slot, slot_start
+
+User = get_user_model()
+
+
+def run_in_threads(target, count):
+    """Ejecuta target(índice) en `count` hilos a la vez. Devuelve las excepciones que hayan escapado."""
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker(index):
+        try:
+            barrier.wait()
+            target(index)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()  # Cada hilo abre su propia conexión
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class OrderNumberConcurrencyTests(TransactionTestCase):
+    THREADS = 8
+    ORDERS_PER_THREAD = 250
+
+    def test_concurrent_orders_get_unique_sortable_numbers(self):
+        created = {}
+
+        def create_orders(index):
+            created[index] = [Order.objects.create(total_price=Decimal('10.00')).order_number
+                              for _ in range(self.ORDERS_PER_THREAD)]
+
+        self.assertEqual(run_in_threads(create_orders, self.THREADS), [])
+
+        numbers = [number for thread_numbers in created.values() for number in thread_numbers]
+        self.assertEqual(len(numbers), self.THREADS * self.ORDERS_PER_THREAD)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(Order.objects.values('order_number').distinct().count(), len(numbers))
+        for thread_numbers in created.values():
+            # Cada hilo recibe números crecientes: el orden de texto es el de creación
+            self.assertEqual(thread_numbers, sorted(thread_numbers))
+            self.assertEqual(len(thread_numbers[0]), len('ORD-AAAAMMDD-') + 13)
+
+    def test_collision_is_retried(self):
+        existing = Order.objects.create(total_price=Decimal('10.00'))
+        fresh = generate_order_number()
+        with mock.patch('apps.orders.models.generate_order_number',
+                        side_effect=[existing.order_number, fresh]) as generator:
+            order = Order.objects.create(total_price=Decimal('12.00'))
+        self.assertEqual(generator.call_count, 2)
+        self.assertEqual(order.order_number, fresh)
+        self.assertEqual(Order.objects.count(), 2)
+
+
+class CartConcurrencyTests(TransactionTestCase):
+    THREADS = 8
+    ADDS_PER_THREAD = 25
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="cliente@example.com", password="Secreta123!",
+                                             first_name="Cliente", last_name="Prueba", is_active=True)
+        category = Category.objects.create(name="Principales")
+        self.product = Product.objects.create(category=category, name="Plato", description="Descripción",
+                                              price=Decimal('9.50'))
+
+    def hammer_add_item(self):
+        """Todos los hilos suman al mismo producto del mismo carrito (que aún no existe)."""
+        statuses = []
+
+        def add_items(index):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            for _ in range(self.ADDS_PER_THREAD):
+                response = client.post('/api/orders/cart/add-item/',
+                                       {'product_id': self.product.id, 'quantity': index + 1}, format='json')
+                statuses.append(response.status_code)
+
+        self.assertEqual(run_in_threads(add_items, self.THREADS), [])
+        self.assertEqual(len(statuses), self.THREADS * self.ADDS_PER_THREAD)
+        self.assertTrue(all(code in (200, 201) for code in statuses), set(statuses))
+        self.assertEqual(statuses.count(201), 1)  # Solo la primera suma crea la línea
+
+        item = CartItem.objects.get(cart__user=self.user, product=self.product)
+        expected = sum(index + 1 for index in range(self.THREADS)) * self.ADDS_PER_THREAD
+        self.assertEqual(item.quantity, expected)
+
+    def test_concurrent_add_item_upsert(self):
+        self.hammer_add_item()
+
+    def test_concurrent_add_item_f_expression_fallback(self):
+        # Backends sin INSERT ... ON CONFLICT ... RETURNING
+        with mock.patch('apps.orders.services._supports_upsert_returning', return_value=False):
+            self.hammer_add_item()
+
+
+
+class CartSyncConflictTests(TestCase):
+    """Un add-item que se cuela entre la lectura y las escrituras de /sync/ (las mutaciones no bloquean el carrito)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="cliente@example.com", password="Secreta123!",
+                                             first_name="Cliente", last_name="Prueba", is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name="Principales")
+        self.first, self.second = (Product.objects.create(category=category, name=name, description="Descripción",
+                                                          price=Decimal('9.50')) for name in ("Plato", "Postre"))
+        self.add_item(self.first, 1)
+        self.version = self.client.get('/api/orders/cart/my-cart/')['ETag']
+
+    def add_item(self, product, quantity):
+        response = self.client.post('/api/orders/cart/add-item/', {'product_id': product.id, 'quantity': quantity},
+                                    format='json')
+        self.assertIn(response.status_code, (200, 201))
+
+    def sync_with_concurrent_add(self, payload, stale_reads=1, **headers):
+        """La sincronización lee el carrito antes de que lleguen dos add-item ya confirmados."""
+        stale = _locked_cart_items(CartItem.objects.get(product=self.first).cart_id)
+        self.add_item(self.first, 2)
+        self.add_item(self.second, 1)
+        reads = iter([stale] * stale_reads)
+        with mock.patch('apps.orders.services._locked_cart_items',
+                        side_effect=lambda cart_id: next(reads, None) or _locked_cart_items(cart_id)):
+            return self.client.post('/api/orders/cart/sync/', payload, format='json', **headers)
+
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list('product_id', 'quantity'))
+
+    def test_retries_over_concurrent_add_item(self):
+        operations = [{'op': 'add', 'product_id': product.id, 'quantity': 1} for product in (self.first, self.second)]
+        response = self.sync_with_concurrent_add({'operations': operations})
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.quantities(), {self.first.id: 4, self.second.id: 2})  # Ninguna suma se pierde
+
+    def test_if_match_rejects_concurrent_add_item(self):
+        response = self.sync_with_concurrent_add({'items': [{'product_id': self.first.id, 'quantity': 5}]},
+                                                 HTTP_IF_MATCH=self.version)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(self.quantities(), {self.first.id: 3, self.second.id: 1})
+        self.assertEqual(response['ETag'], self.client.get('/api/orders/cart/my-cart/')['ETag'])
+
+    def test_persistent_conflict_is_409(self):
+        response = self.sync_with_concurrent_add({'items': []}, stale_reads=SYNC_ATTEMPTS)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.quantities(), {self.first.id: 3, self.second.id: 1})
+
+class SlotReleaseTests(TestCase):
+    def setUp(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        scheduled = timezone.make_aware(datetime.combine(tomorrow, time(13, 0)))
+        self.order = Order.objects.create(total_price=Decimal('10.00'), is_scheduled=True, scheduled_datetime=scheduled)
+        KitchenSlot.objects.create(start=slot_start(scheduled), booked=1)  # Otro pedido en la misma franja
+        book_order_slot(self.order)
+        self.slot = KitchenSlot.objects.get(start=slot_start(scheduled))
+        self.assertEqual(self.slot.booked, 2)
+
+    def test_concurrent_cancellations_release_once(self):
+        # Cliente y administrador cargan el pedido programado y lo cancelan los dos
+        customer_copy = Order.objects.get(pk=self.order.pk)
+        admin_copy = Order.objects.get(pk=self.order.pk)
+        for copy in (customer_copy, admin_copy):
+            copy.status = 'CANCELLED'
+            copy.save()
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked, 1)
+        self.assertFalse(SlotBooking.objects.filter(order=self.order, released_at__isnull=True).exists())
+
+    def test_reschedule_moves_the_booking(self):
+        new_time = self.order.scheduled_datetime + timedelta(days=1)
+        self.order.scheduled_datetime = new_time
+        self.order.save()
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked, 1)
+        self.assertEqual(KitchenSlot.objects.get(start=slot_start(new_time)).booked, 1)
+        self.assertEqual(SlotBooking.objects.get(order=self.order, released_at__isnull=True).start, slot_start(new_time))
+
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Principales")
+        self.limited = Product.objects.create(category=category, name="Plato del día", description="Descripción",
+                                              price=Decimal('9.50'), stock=2)
+        self.plenty = Product.objects.create(category=category, name="Postre", description="Descripción",
+                                             price=Decimal('4.00'), stock=5)
+
+    def reserve(self, quantities):
+        order = Order.objects.create(total_price=Decimal('10.00'))
+        with transaction.atomic():  # Como la transacción del checkout
+            reserve_stock(order, quantities)
+        return order
+
+    def assertStock(self, product, stock, is_available):
+        product.refresh_from_db()
+        self.assertEqual((product.stock, product.is_available), (stock, is_available))
+
+    def test_oversell_is_rejected(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            self.reserve({self.plenty.id: 1, self.limited.id: 3})
+        self.assertEqual(raised.exception.product_ids, [self.limited.id])
+        # Nada se descuenta ni se reserva: la transacción se deshace entera
+        self.assertStock(self.limited, 2, True)
+        self.assertStock(self.plenty, 5, True)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_last_units_make_the_product_unavailable(self):
+        self.reserve({self.limited.id: 1, self.plenty.id: 1})
+        self.assertStock(self.limited, 1, True)
+        self.reserve({self.limited.id: 1})
+        self.assertStock(self.limited, 0, False)
+        self.assertStock(self.plenty, 4, True)
+        with self.assertRaises(InsufficientStock):
+            self.reserve({self.limited.id: 1})
+
+    def test_cancelled_or_failed_order_releases_once(self):
+        for status in RELEASE_STATUSES:
+            with self.subTest(status=status):
+                order = self.reserve({self.limited.id: 2, self.plenty.id: 1})
+                self.assertStock(self.limited, 0, False)
+                # Cliente y administrador cargan el pedido y lo cierran los dos
+                copies = [Order.objects.get(pk=order.pk) for _ in range(2)]
+                for copy in copies:
+                    copy.status = status
+                    copy.save()
+                self.assertStock(self.limited, 2, True)
+                self.assertStock(self.plenty, 5, True)
+                self.assertFalse(StockReservation.objects.filter(order=order, released_at__isnull=True).exists())
+                self.assertEqual(release_reservations(order), 0)
+
+
+@override_settings(SCHEDULED_ORDER_LEAD_MINUTES=30)
+class ScheduledReleaseTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="cliente@example.com", password="Secreta123!",
+                                             first_name="Cliente", last_name="Prueba", is_active=True)
+
+    def schedule(self, minutes):
+        order = Order.objects.create(user=self.user, total_price=Decimal('10.00'), status='SCHEDULED',
+                                     is_scheduled=True, scheduled_datetime=timezone.now() + timedelta(days=1))
+        # save() no admite fechas pasadas: se mueve sin señales, como si hubiera pasado el tiempo
+        Order.objects.filter(pk=order.pk).update(scheduled_datetime=timezone.now() + timedelta(minutes=minutes))
+        return order
+
+    def test_only_due_orders_go_to_the_kitchen(self):
+        due = [self.schedule(minutes) for minutes in (-10, 5, 25)]  # Ya vencido o dentro del margen
+        later = [self.schedule(minutes) for minutes in (40, 120)]
+        cancelled = self.schedule(5)
+        Order.objects.filter(pk=cancelled.pk).update(status='CANCELLED')
+
+        lags = release_due_orders(batch_size=2)  # Dos lotes
+        self.assertEqual(len(lags), len(due))
+        self.assertEqual(lags[0], max(lags))  # El más atrasado sale primero
+
+        statuses = dict(Order.objects.values_list('id', 'status'))
+        self.assertEqual({statuses[order.pk] for order in due}, {'PROCESSING'})
+        self.assertEqual({statuses[order.pk] for order in later}, {'SCHEDULED'})
+        self.assertEqual(statuses[cancelled.pk], 'CANCELLED')
+
+        # El UPDATE masivo no pasa por post_save: los eventos se registran a mano, uno por pedido
+        released = OrderEvent.objects.filter(status='PROCESSING')
+        self.assertEqual(sorted(released.values_list('order_id', flat=True)), sorted(order.pk for order in due))
+        self.assertEqual(set(released.values_list('user_id', flat=True)), {self.user.pk})
+
+        self.assertEqual(release_due_orders(), [])
+
+@override_settings(ORDER_EVENTS_STREAM_SECONDS=0.3, ORDER_EVENTS_POLL_SECONDS=0.05)
+class OrderEventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="cliente@example.com", password="Secreta123!",
+                                             first_name="Cliente", last_name="Prueba", is_active=True)
+        self.other = User.objects.create_user(email="otro@example.com", password="Secreta123!",
+                                              first_name="Otro", last_name="Cliente", is_active=True)
+        self.order = Order.objects.create(user=self.user, total_price=Decimal('10.00'))
+
+    def ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/orders/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['ticket']
+
+    def read_stream(self, **params):
+        response = self.client.get('/api/orders/events/', params)
+        self.assertEqual(response.status_code, 200)
+        # Leer hasta el final cierra la respuesta y libera el stream WSGI reservado
+        body = b''.join(response.streaming_content).decode()
+        events = []
+        for block in body.split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line)
+            if fields.get('event') == 'order':
+                events.append((int(fields['id']), json.loads(fields['data'])))
+        return events
+
+    def test_stream_delivers_own_events_and_resumes(self):
+        Order.objects.create(user=self.other, total_price=Decimal('12.00'))  # No debe verse
+        self.order.status = 'PROCESSING'
+        self.order.save()
+
+        events = self.read_stream(ticket=self.ticket(), last_event_id=0)
+        self.assertEqual([data['status'] for _, data in events], ['PENDING', 'PROCESSING'])
+        self.assertTrue(all(data['order_id'] == str(self.order.pk) for _, data in events))
+
+        # Reanudar desde el último id recibido solo trae lo nuevo
+        last_id = events[-1][0]
+        self.assertEqual(self.read_stream(ticket=self.ticket(), last_event_id=last_id), [])
+        self.order.status = 'OUT_FOR_DELIVERY'
+        self.order.save()
+        resumed = self.read_stream(ticket=self.ticket(), last_event_id=last_id)
+        self.assertEqual([data['status'] for _, data in resumed], ['OUT_FOR_DELIVERY'])
+
+    def test_ticket_is_required_and_revoked_by_password_change(self):
+        self.assertEqual(self.client.get('/api/orders/events/').status_code, 401)
+        self.assertEqual(self.client.get('/api/orders/events/', {'ticket': 'falso'}).status_code, 401)
+        self.assertEqual(self.client.get('/api/orders/events/', {'token': 'jwt'}).status_code, 401)
+
+        ticket = self.ticket()
+        self.user.set_password("OtraSecreta456!")
+        self.user.save()
+        self.assertEqual(self.client.get('/api/orders/events/', {'ticket': ticket}).status_code, 401)
+
+    def test_cursor_waits_for_uncommitted_ids(self):
+        # Tres eventos; el del medio aún no es visible (su transacción no se ha confirmado)
+        first = OrderEvent.objects.get(order=self.order)
+        pending = OrderEvent.objects.create(order=self.order, user=self.user, status='PROCESSING')
+        last = OrderEvent.objects.create(order=self.order, user=self.user, status='OUT_FOR_DELIVERY')
+        pending_id = pending.id
+        pending.delete()
+
+        cursor = EventCursor(visible_events(self.user), first.id - 1)
+        events, _ = cursor.fetch()
+        self.assertEqual([event['id'] for event in events], [first.id, last.id])
+        self.assertEqual(cursor.resume_id, first.id)  # Reanudar no puede saltarse el hueco
+
+        # Se confirma la transacción: el evento llega aunque su id sea menor que el último enviado
+        OrderEvent.objects.create(id=pending_id, order=self.order, user=self.user, status='PROCESSING')
+        events, _ = cursor.fetch()
+        self.assertEqual([event['id'] for event in events], [pending_id])
+        self.assertEqual(cursor.resume_id, last.id)
+
+    def test_cursor_gives_up_on_rolled_back_ids(self):
+        first = OrderEvent.objects.get(order=self.order)
+        OrderEvent.objects.create(order=self.order, user=self.user, status='PROCESSING').delete()
+        last = OrderEvent.objects.create(order=self.order, user=self.user, status='CANCELLED')
+
+        cursor = EventCursor(visible_events(self.user), first.id)
+        with override_settings(ORDER_EVENTS_COMMIT_GRACE_SECONDS=0):
+            events, _ = cursor.fetch()
+        self.assertEqual([event['id'] for event in events], [last.id])
+        self.assertEqual(cursor.resume_id, last.id)
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="cliente@example.com", password="Secreta123!",
+                                             first_name="Cliente", last_name="Prueba", is_active=True)
+        category = Category.objects.create(name="Principales")
+        self.product = Product.objects.create(category=category, name="Plato", description="Descripción",
+                                              price=Decimal('9.50'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_item(self, key='clave-1', quantity=1):
+        return self.client.post('/api/orders/cart/add-item/', {'product_id': self.product.id, 'quantity': quantity},
+                                format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def quantity(self):
+        item = CartItem.objects.filter(cart__user=self.user, product=self.product).first()
+        return item.quantity if item else 0
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.add_item()
+        self.assertEqual(first.status_code, 201)
+        retry = self.add_item()
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(self.quantity(), 1)
+
+    def test_key_reused_with_another_request_is_rejected(self):
+        self.add_item(quantity=1)
+        self.assertEqual(self.add_item(quantity=2).status_code, 422)
+        self.assertEqual(self.quantity(), 1)
+
+    def test_in_progress_key_conflicts_until_abandoned(self):
+        self.add_item()
+        record = IdempotencyRecord.objects.get(user=self.user, key='clave-1')
+        # La petición original sigue en curso (su transacción aún no ha hecho nada visible)
+        IdempotencyRecord.objects.filter(pk=record.pk).update(status='IN_PROGRESS', response_status=None,
+                                                               response_body=None, locked_at=timezone.now())
+        response = self.add_item()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # Pasado IDEMPOTENCY_LOCK_TIMEOUT_SECONDS el reintento se hace cargo y la completa
+        IdempotencyRecord.objects.filter(pk=record.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.add_item().status_code, 200)
+        record.refresh_from_db()
+        self.assertEqual(record.status, 'COMPLETED')
+        self.assertEqual(self.add_item()['Idempotent-Replayed'], 'true')
+
+    def test_slow_request_overtaken_rolls_back_and_keeps_new_owner(self):
+        taken_over_at = timezone.now() + timedelta(seconds=5)
+
+        def reserve_then_lose(*args):
+            record, created = _reserve(*args)
+            # Mientras esta petición trabaja, otro reintento da la clave por abandonada y la reclama
+            IdempotencyRecord.objects.filter(pk=record.pk).update(locked_at=taken_over_at)
+            return record, created
+
+        with mock.patch('apps.core.idempotency._reserve', side_effect=reserve_then_lose):
+            response = self.add_item()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.quantity(), 0)  # Su trabajo se deshizo: lo hace el nuevo dueño
+        record = IdempotencyRecord.objects.get(user=self.user, key='clave-1')
+        self.assertEqual((record.status, record.locked_at), ('IN_PROGRESS', taken_over_at))
+
+    def test_failed_request_releases_only_its_own_claim(self):
+        with mock.patch('apps.orders.views.add_to_cart', side_effect=RuntimeError("caída")):
+            with self.assertRaises(RuntimeError):
+                self.add_item()
+        self.assertFalse(IdempotencyRecord.objects.filter(user=self.user, key='clave-1').exists())
+        self.assertEqual(self.add_item().status_code, 201)  # El cliente puede reintentar
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CartViewSet, OrderViewSet
+from .views import CartViewSet, OrderViewSet, OrderEventStreamView, OrderEventTicketView, SlotAvailabilityView
 
 # Router para Carrito (no es un ModelViewSet típico)
 cart_router = DefaultRouter()
@@ -11,6 +11,9 @@ order_router = DefaultRouter()
 order_router.register(r'orders', OrderViewSet, basename='order')
 
 urlpatterns = [
+    path('slots/', SlotAvailabilityView.as_view(), name='kitchen-slots'),
+    path('events/', OrderEventStreamView.as_view(), name='order-events'),
+    path('events/ticket/', OrderEventTicketView.as_view(), name='order-events-ticket'),
     path('', include(cart_router.urls)),
     path('', include(order_router.urls)),
     # Las URLs específicas (@action) se generan automáticamente por los routers.
@@ -0,0 +1,18 @@
+from apps.mailer.outbox import attachment_from_path, queue_mail
+
+
+# --- Funciones Helper para enviar emails ---
+# Encolan el email en la bandeja de salida (apps.mailer); el comando send_outbox
+# lo entrega y reintenta si el servidor SMTP falla.
+
+def send_order_email(subject, message_txt, recipient_email, html_message=None):
+    """Función helper para enviar emails simples."""
+    return queue_mail(subject, message_txt, [recipient_email], html_message=html_message)
+
+
+def send_order_email_with_attachment(subject, message_txt, recipient_email, attachment_path, attachment_filename, html_message=None):
+    """Función helper para enviar emails con adjuntos (el fichero debe seguir en disco hasta el envío)."""
+    return queue_mail(
+        subject, message_txt, [recipient_email], html_message=html_message,
+        attachments=[attachment_from_path(attachment_path, attachment_filename, 'application/pdf')],
+    )
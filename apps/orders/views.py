@@ -1,17 +1,40 @@
+import uuid
+from datetime import date
+
 from rest_framework import viewsets, status, generics, views
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django.shortcuts import get_object_or_404
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from django.views import View
+from rest_framework_simplejwt.exceptions import InvalidToken
 
-from .models import Cart, CartItem, Order, OrderItem
+from .models import Cart, Order
 from .serializers import (
-    CartSerializer, CartItemSerializer, OrderSerializer, CreateOrderSerializer,
+    CartSerializer, CartItemSerializer, CartSyncSerializer, OrderSerializer, CreateOrderSerializer,
     OrderStatusUpdateSerializer, AssignDelivererSerializer
 )
-from apps.menu.models import Product
+from .services import (
+    add_to_cart, get_cart_id, set_cart_item_quantity, remove_cart_item,
+    sync_cart, cart_version, load_cart_for_response, CartVersionMismatch, CartConflict,
+    UnavailableProducts
+)
+from .checkout import checkout, CheckoutError
+from .slots import get_day_availability
+from .events import (
+    WSGIStream, acquire_wsgi_stream, astream_events, issue_stream_ticket, latest_event_id, stream_events,
+    user_from_ticket, visible_events,
+)
+from apps.core.idempotency import idempotent
+from apps.users.authentication import CachedJWTAuthentication
+from .pagination import OrderCursorPagination, wants_cursor_pagination
 from .permissions import IsOwnerOrAdmin, IsAdminOrDeliverer, IsAssignedDelivererOrAdmin  # Añadido nuevo permiso
 
 
@@ -60,73 +83,113 @@ class CartViewSet(viewsets.ViewSet):
         cart, created = Cart.objects.get_or_create(user=user)
         return cart
 
+    def full_cart_response(self, request, cart_id, status_code=status.HTTP_200_OK):
+        """Carrito completo con su versión en el ETag (para usarla en If-Match de /sync/)."""
+        data = CartSerializer(load_cart_for_response(cart_id), context={'request': request}).data
+        response = Response(data, status=status_code)
+        response['ETag'] = quote_etag(cart_version((item['product']['id'], item['quantity']) for item in data['items']))
+        return response
+
     @action(detail=False, methods=['get'], url_path='my-cart')
     def my_cart(self, request):
         """Obtiene el carrito del usuario actual."""
-        cart = self.get_cart(request.user)
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data)
+        return self.full_cart_response(request, get_cart_id(request.user))
+
+    @action(detail=False, methods=['post'], url_path='sync')
+    def sync(self, request):
+        """
+        Aplica en una transacción los cambios acumulados por el cliente:
+        {"operations": [{"op": "add"|"set"|"remove", "product_id": 1, "quantity": 2}, ...]}
+        o el estado final {"items": [{"product_id": 1, "quantity": 2}, ...]}.
+        Con If-Match (ETag de my-cart) se rechaza con 412 si el carrito cambió entretanto.
+        Devuelve el carrito resultante una sola vez.
+        """
+        serializer = CartSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        expected_version = None
+        if_match = request.headers.get('If-Match')
+        if if_match and if_match.strip() != '*':
+            etags = parse_etags(if_match)
+            expected_version = etags[0].strip('"') if etags else if_match.strip('" ')
+
+        try:
+            cart_id = sync_cart(
+                request.user,
+                operations=serializer.validated_data.get('operations'),
+                items=serializer.validated_data.get('items'),
+                expected_version=expected_version,
+            )
+        except CartVersionMismatch as e:
+            response = Response({"error": "El carrito ha cambiado. Vuelva a cargarlo y reintente."}, status=status.HTTP_412_PRECONDITION_FAILED)
+            response['ETag'] = quote_etag(e.current_version)
+            return response
+        except CartConflict:
+            return Response({"error": "El carrito se está modificando desde otra petición. Reintente."}, status=status.HTTP_409_CONFLICT)
+        except UnavailableProducts as e:
+            return Response({"error": "Productos no encontrados o no disponibles.", "product_ids": e.product_ids}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.full_cart_response(request, cart_id)
+
+    def cart_response(self, request, delta, status_code=status.HTTP_200_OK):
+        """
+        Respuesta de las mutaciones: solo el cambio aplicado. Con ?include=cart
+        se devuelve además el carrito completo (formato anterior).
+        """
+        if request.query_params.get('include') == 'cart':
+            delta['cart'] = CartSerializer(load_cart_for_response(get_cart_id(request.user)), context={'request': request}).data
+        return Response(delta, status=status_code)
 
     @action(detail=False, methods=['post'], url_path='add-item')
+    @idempotent
     def add_item(self, request):
-        """Añade un producto al carrito o actualiza la cantidad."""
-        cart = self.get_cart(request.user)
+        """Añade un producto al carrito o suma la cantidad (upsert atómico)."""
         product_id = request.data.get('product_id')
-        quantity = int(request.data.get('quantity', 1))
+        try:
+            quantity = int(request.data.get('quantity', 1))
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return Response({"error": "Producto o cantidad inválidos."}, status=status.HTTP_400_BAD_REQUEST)
 
         if quantity <= 0:
             return Response({"error": "La cantidad debe ser positiva."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            product = Product.objects.get(id=product_id, is_available=True)
-        except Product.DoesNotExist:
+        result = add_to_cart(get_cart_id(request.user), product_id, quantity)
+        if result is None:
             return Response({"error": "Producto no encontrado o no disponible."}, status=status.HTTP_404_NOT_FOUND)
 
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-
-        if not created:
-            # Si ya existe, actualiza la cantidad
-            cart_item.quantity += quantity
-            cart_item.save()
-
-        serializer = CartSerializer(cart, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK if not created else status.HTTP_201_CREATED)
+        item_id, new_quantity = result
+        created = new_quantity == quantity  # Ninguna fila puede tener cantidad 0, así que solo ocurre al insertar
+        delta = {"item": {"id": item_id, "product_id": product_id, "quantity": new_quantity}, "added": quantity, "created": created}
+        return self.cart_response(request, delta, status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
     @action(detail=False, methods=['patch'], url_path='update-item/(?P<item_id>[^/.]+)')
     def update_item(self, request, item_id=None):
         """Actualiza la cantidad de un item en el carrito."""
-        cart = self.get_cart(request.user)
-        quantity = int(request.data.get('quantity'))
+        try:
+            quantity = int(request.data.get('quantity'))
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return Response({"error": "Cantidad inválida."}, status=status.HTTP_400_BAD_REQUEST)
 
         if quantity <= 0:
             return Response({"error": "La cantidad debe ser al menos 1."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-            cart_item.quantity = quantity
-            cart_item.save()
-            serializer = CartSerializer(cart, context={'request': request})
-            return Response(serializer.data)
-        except CartItem.DoesNotExist:
+        if not set_cart_item_quantity(request.user, item_id, quantity):
             return Response({"error": "Item no encontrado en el carrito."}, status=status.HTTP_404_NOT_FOUND)
-        except ValueError:
-            return Response({"error": "Cantidad inválida."}, status=status.HTTP_400_BAD_REQUEST)
+        return self.cart_response(request, {"item": {"id": item_id, "quantity": quantity}})
 
     @action(detail=False, methods=['delete'], url_path='remove-item/(?P<item_id>[^/.]+)')
     def remove_item(self, request, item_id=None):
         """Elimina un item del carrito."""
-        cart = self.get_cart(request.user)
         try:
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-            cart_item.delete()
-            serializer = CartSerializer(cart, context={'request': request})
-            return Response(serializer.data)
-        except CartItem.DoesNotExist:
+            item_id = int(item_id)
+        except ValueError:
+            return Response({"error": "Item no encontrado en el carrito."}, status=status.HTTP_404_NOT_FOUND)
+
+        if not remove_cart_item(request.user, item_id):
             return Response({"error": "Item no encontrado en el carrito."}, status=status.HTTP_404_NOT_FOUND)
+        return self.cart_response(request, {"removed": item_id})
 
     @action(detail=False, methods=['delete'], url_path='clear-cart')
     def clear_cart(self, request):
@@ -148,6 +211,20 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     # queryset = Order.objects.all() # Sobrescribir get_queryset para filtrar
 
+    @property
+    def paginator(self):
+        """
+        Paginación por número de página por defecto; por cursor si el cliente
+        la pide (?pagination=cursor), para historiales largos sin COUNT/OFFSET.
+        """
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)  # None al generar el esquema de Swagger
+            if request is not None and wants_cursor_pagination(request):
+                self._paginator = OrderCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
     def get_permissions(self):
         """Permisos basados en la acción."""
         if self.action == 'create':
@@ -182,67 +259,37 @@ class OrderViewSet(viewsets.ModelViewSet):
             # Usuarios normales ven solo sus propios pedidos
             return Order.objects.filter(user=user).prefetch_related('items')
 
-    @transaction.atomic  # Asegura que la creación del pedido y limpieza del carrito sean atómicas
+    @idempotent
     def create(self, request, *args, **kwargs):
-        """Crea un nuevo pedido a partir del carrito del usuario."""
+        """Crea un nuevo pedido a partir del carrito del usuario (ver apps/orders/checkout.py)."""
         serializer = CreateOrderSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         validated_data = serializer.validated_data
 
-        user = request.user
         try:
-            cart = Cart.objects.prefetch_related('items__product').get(user=user)
-        except Cart.DoesNotExist:
-            return Response({"error": "Carrito no encontrado."}, status=status.HTTP_404_NOT_FOUND)
-
-        if not cart.items.exists():
-            return Response({"error": "El carrito está vacío."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Calcular precio total desde el carrito (más seguro que confiar en el frontend)
-        total_price = cart.get_total_price()
-
-        # Crear el pedido
-        order_data = {
-            'user': user,
-            'total_price': total_price,
-            'delivery_address': validated_data['delivery_address'],
-            'phone_number': validated_data['phone_number'],
-            'notes': validated_data.get('notes'),
-            'is_scheduled': validated_data.get('is_scheduled', False),
-            'scheduled_datetime': validated_data.get('scheduled_datetime')
-            # El estado se establecerá en PENDING o SCHEDULED en el save() del modelo
-        }
-        order = Order(**order_data)
-        order.save()  # Llama al save personalizado que genera nº pedido y ajusta estado
-
-        # Crear los items del pedido desde el carrito
-        order_items = []
-        for cart_item in cart.items.all():
-            # Verificar disponibilidad de nuevo por si acaso
-            if not cart_item.product.is_available:
-                # Podrías lanzar error o simplemente omitir el item
-                transaction.set_rollback(True)  # Revertir la creación del pedido
-                return Response({"error": f"El producto '{cart_item.product.name}' ya no está disponible."},
-                                status=status.HTTP_400_BAD_REQUEST)
-
-            order_items.append(OrderItem(
-                order=order,
-                product=cart_item.product,
-                product_name=cart_item.product.name,  # Guardar nombre actual
-                price=cart_item.product.price,  # Guardar precio actual
-                quantity=cart_item.quantity
-            ))
-        OrderItem.objects.bulk_create(order_items)
-
-        # Vaciar el carrito
-        cart.clear()
+            order = checkout(
+                request.user,
+                delivery_address=validated_data['delivery_address'],
+                phone_number=validated_data['phone_number'],
+                notes=validated_data.get('notes'),
+                is_scheduled=validated_data.get('is_scheduled', False),
+                scheduled_datetime=validated_data.get('scheduled_datetime'),
+                delivery_latitude=validated_data.get('delivery_latitude'),
+                delivery_longitude=validated_data.get('delivery_longitude'),
+            )
+        except CheckoutError as e:
+            error = {"error": e.message}
+            if e.suggested_slots:
+                error["suggested_slots"] = [start.isoformat() for start in e.suggested_slots]
+            return Response(error, status=status.HTTP_400_BAD_REQUEST)
 
         # Devolver el pedido creado (usa el serializer de lectura)
         order_serializer = OrderSerializer(order, context={'request': request})
-        # La señal post_save se encargará de enviar email/generar factura si está configurada
+        # La señal post_save encola el email de confirmación y la factura para después del commit
         return Response(order_serializer.data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'], url_path='cancel')
+    @idempotent
     def cancel_order(self, request, pk=None):
         """Permite a un usuario (o admin) cancelar su pedido si está dentro del límite de tiempo."""
         order = self.get_object()  # Obtiene el pedido usando get_queryset y pk
@@ -254,9 +301,9 @@ class OrderViewSet(viewsets.ModelViewSet):
         if order.can_cancel():
             original_status = order.status
             order.status = 'CANCELLED'
-            order.save(update_fields=['status', 'updated_at'])
-            # Aquí podrías añadir lógica adicional (ej. revertir stock si lo gestionas)
-            # y enviar una notificación de cancelación.
+            with transaction.atomic():  # El cambio de estado y la devolución del stock van juntos
+                order.save(update_fields=['status', 'updated_at'])
+            # La señal post_save devuelve el stock reservado y notifica el cambio de estado
             print(
                 f"Pedido {order.order_number} cancelado por usuario {request.user.email}. Estado anterior: {original_status}")
             return Response({"message": "Pedido cancelado exitosamente."}, status=status.HTTP_200_OK)
@@ -320,6 +367,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'], url_path='mark-delivered')
+    @idempotent
     def mark_as_delivered(self, request, pk=None):
         """
         Permite al repartidor asignado (o a un admin) marcar el pedido como entregado.
@@ -347,4 +395,101 @@ class OrderViewSet(viewsets.ModelViewSet):
             f"Pedido {order.order_number} marcado como ENTREGADO por {'Admin' if request.user.is_staff else 'Repartidor'} {request.user.email}")
 
         serializer = OrderSerializer(order, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+# --- Franjas de cocina ---
+
+class SlotAvailabilityView(views.APIView):
+    """
+    Disponibilidad de las franjas de cocina para pedidos programados.
+    GET /api/orders/slots/?date=YYYY-MM-DD (por defecto, hoy).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        date_param = request.query_params.get('date')
+        try:
+            day = date.fromisoformat(date_param) if date_param else timezone.localdate()
+        except ValueError:
+            return Response({"error": "Fecha inválida. Use el formato YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+
+        slots = [
+            {**slot, 'start': slot['start'].isoformat(), 'end': slot['end'].isoformat()}
+            for slot in get_day_availability(day)
+        ]
+        return Response({"date": day.isoformat(), "slots": slots})
+
+
+# --- Canal en vivo (SSE) ---
+
+def authenticate_stream(request):
+    """
+    Usuario del JWT de la cabecera Authorization o, como EventSource no permite
+    cabeceras propias, del ticket de ?ticket= (ver OrderEventTicketView).
+    """
+    auth = CachedJWTAuthentication()
+    header = auth.get_header(request)
+    if header is None:
+        ticket = request.GET.get('ticket')
+        return user_from_ticket(ticket) if ticket else None
+    raw_token = auth.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+class OrderEventTicketView(views.APIView):
+    """
+    POST /api/orders/events/ticket/: ticket de corta duración para abrir
+    /api/orders/events/?ticket=... con EventSource. Se pide uno nuevo en cada
+    (re)conexión; caduca a los ORDER_EVENTS_TICKET_SECONDS.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({"ticket": issue_stream_ticket(request.user), "expires_in": settings.ORDER_EVENTS_TICKET_SECONDS})
+
+
+class OrderEventStreamView(View):
+    """
+    GET /api/orders/events/ (text/event-stream): cambios de estado y de repartidor
+    de los pedidos del usuario o, para repartidores, de sus asignaciones.
+    ?order=<id> limita a un pedido. Reanuda desde Last-Event-ID (o ?last_event_id=).
+    Sustituye al sondeo periódico de retrieve y my-assigned (ver apps/orders/events.py).
+    """
+
+    def get(self, request):
+        user = authenticate_stream(request)
+        if user is None or not user.is_active:
+            return JsonResponse({"detail": "Las credenciales de autenticación no se proveyeron o no son válidas."}, status=401)
+
+        queryset = visible_events(user)
+        if request.GET.get('order'):
+            try:
+                queryset = queryset.filter(order_id=uuid.UUID(request.GET['order']))
+            except ValueError:
+                return JsonResponse({"error": "Identificador de pedido inválido."}, status=400)
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        try:
+            after_id = int(last_event_id) if last_event_id else latest_event_id()
+        except ValueError:
+            return JsonResponse({"error": "Last-Event-ID inválido."}, status=400)
+
+        if isinstance(request, ASGIRequest):
+            stream = astream_events(queryset, after_id)
+        elif acquire_wsgi_stream():
+            stream = WSGIStream(stream_events(queryset, after_id))
+        else:
+            # Cada stream WSGI ocupa un hilo del worker: no se deja que bloqueen el resto de la API
+            response = JsonResponse({"error": "Demasiadas conexiones en vivo, reintente más tarde."}, status=503)
+            response['Retry-After'] = '30'
+            return response
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # nginx no debe acumular la respuesta
+        return response
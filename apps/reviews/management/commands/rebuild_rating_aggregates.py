@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.menu.models import Product, RATING_AGGREGATE_FIELDS
+from apps.reviews.models import compute_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde las reseñas aprobadas los agregados de calificación de los productos y corrige desviaciones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Productos procesados por lote.")
+        parser.add_argument('--dry-run', action='store_true', help="Solo informa de las desviaciones, no las corrige.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        checked = fixed = 0
+        last_pk = 0
+
+        while True:
+            products = list(Product.objects.filter(pk__gt=last_pk).order_by('pk')
+                            .only('pk', 'name', 'average_rating', *RATING_AGGREGATE_FIELDS)[:batch_size])
+            if not products:
+                break
+            last_pk = products[-1].pk
+            checked += len(products)
+
+            aggregates = compute_rating_aggregates([product.pk for product in products])
+            drifted = []
+            for product in products:
+                expected = aggregates.get(product.pk, {})
+                changes = {field: expected.get(field, 0) for field in RATING_AGGREGATE_FIELDS
+                           if getattr(product, field) != expected.get(field, 0)}
+                if changes:
+                    self.stdout.write(f"  {product.name} (id {product.pk}): {changes}")
+                    for field, value in changes.items():
+                        setattr(product, field, value)
+                    drifted.append(product)
+
+            if drifted and not dry_run:
+                with transaction.atomic():
+                    Product.objects.bulk_update(drifted, RATING_AGGREGATE_FIELDS)
+                    Product.refresh_average_rating([product.pk for product in drifted])
+            fixed += len(drifted)
+
+        action = "con desviaciones" if dry_run else "corregidos"
+        self.stdout.write(self.style.SUCCESS(f"{checked} productos revisados, {fixed} {action}"))
@@ -1,13 +1,18 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Q, Sum
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from apps.core.tracking import FieldTrackerMixin
 from apps.menu.models import Product
 
-class Review(models.Model):
+class Review(FieldTrackerMixin, models.Model):
     """Reseña de un producto hecha por un usuario."""
+    # Campos que afectan a los agregados de calificación del producto
+    tracked_fields = ('product', 'rating', 'is_approved')
+
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews', verbose_name="Producto")
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews', verbose_name="Usuario")
     rating = models.PositiveSmallIntegerField(
@@ -28,30 +33,61 @@ class Review(models.Model):
     def __str__(self):
         return f"Reseña de {self.user.email} para {self.product.name} ({self.rating} estrellas)"
 
-# --- Señales para actualizar calificación promedio del producto ---
+    def rating_state(self):
+        """(producto, calificación) si la reseña cuenta para los agregados, None si no está aprobada."""
+        if not self.is_approved:
+            return None
+        return (self.product_id, self.rating)
+
+    def original_rating_state(self):
+        """Igual que rating_state() pero con los valores con los que se cargó la reseña."""
+        if not self.get_original('is_approved'):
+            return None
+        return (self.get_original('product'), self.get_original('rating'))
+
+# --- Señales para mantener los agregados de calificación del producto ---
 
-@receiver([post_save, post_delete], sender=Review)
-def update_product_average_rating(sender, instance, **kwargs):
+def compute_rating_aggregates(product_ids):
     """
-    Actualiza la calificación promedio del producto cuando una reseña
-    se guarda (y está aprobada) o se elimina.
+    Agregados calculados desde las reseñas aprobadas, por producto:
+    {product_id: {'rating_count': n, 'rating_sum': n, 'rating_1': n, ...}}.
+    Solo se usa para reparar desviaciones (rebuild_rating_aggregates).
     """
-    # Solo recalcular si la reseña está aprobada o si se está eliminando
-    # (porque una reseña eliminada ya no cuenta, aprobada o no)
-    # El 'created' flag no es fiable con post_delete
-    # Usamos 'update_fields' para saber si is_approved cambió en un save
-    update_fields = kwargs.get('update_fields')
-    approved_changed = update_fields and 'is_approved' in update_fields
-    is_deletion = kwargs.get('signal') == post_delete
-
-    # Recalcular si:
-    # 1. Se está borrando la reseña.
-    # 2. Se está guardando Y (está aprobada O el campo 'is_approved' acaba de cambiar).
-    #    Esto cubre casos: nueva reseña aprobada, reseña existente aprobada, reseña desaprobada.
-    should_recalculate = is_deletion or (instance.is_approved or approved_changed)
-
-    if should_recalculate:
-        # instance.product.update_average_rating() # Llama al método en el modelo Product
-        # Necesitamos esperar a que la transacción termine, especialmente en deletes
-        from django.db import transaction
-        transaction.on_commit(lambda: instance.product.update_average_rating())
\ No newline at end of file
+    star_counts = {f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    rows = (Review.objects.filter(product_id__in=product_ids, is_approved=True)
+            .order_by().values('product_id')
+            .annotate(rating_count=Count('id'), rating_sum=Sum('rating'), **star_counts))
+    return {row.pop('product_id'): row for row in rows}
+
+
+def _apply_rating_change(old_state, new_state):
+    """Aplica la diferencia entre el estado anterior y el nuevo de una reseña. O(1) en reseñas."""
+    if old_state == new_state:
+        return  # Editar el comentario o una reseña no aprobada no afecta a los agregados
+    touched = set()
+    with transaction.atomic():
+        if old_state is not None:
+            Product.apply_rating_delta(old_state[0], old_state[1], -1)
+            touched.add(old_state[0])
+        if new_state is not None:
+            Product.apply_rating_delta(new_state[0], new_state[1], 1)
+            touched.add(new_state[0])
+        Product.refresh_average_rating(touched)
+
+
+@receiver(post_save, sender=Review)
+def update_product_rating_on_save(sender, instance, created, **kwargs):
+    """
+    Actualiza los agregados del producto con el delta entre el estado con el que
+    se cargó la reseña y el guardado: aprobarla suma, desaprobarla resta y
+    cambiar la calificación o el producto mueve la reseña de contador.
+    """
+    old_state = None if created else instance.original_rating_state()
+    _apply_rating_change(old_state, instance.rating_state())
+
+
+@receiver(post_delete, sender=Review)
+def update_product_rating_on_delete(sender, instance, **kwargs):
+    """Resta la reseña eliminada de los agregados si estaba aprobada."""
+    old_state = instance.original_rating_state() if instance.get_original('is_approved') is not None else instance.rating_state()
+    _apply_rating_change(old_state, None)
@@ -16,9 +16,6 @@ class UsersConfig(AppConfig):
     # Nombre legible que aparecerá en el panel de administración de Django
     verbose_name = "Gestión de Usuarios"
 
-    # No se necesita la función ready() aquí porque no estamos conectando
-    # señales directamente en este archivo para la app 'users'.
-    # Las señales para otros modelos (como Order) se conectan en sus respectivas
-    # apps.py o usando decoradores @receiver.
-    # def ready(self):
-    #     import apps.users.signals # Solo si tuvieras señales específicas de usuario aquí
\ No newline at end of file
+    def ready(self):
+        # Señales que invalidan la caché de autenticación (apps/users/authentication.py)
+        import apps.users.signals
@@ -0,0 +1,69 @@
+"""
+Autenticación JWT con el usuario en caché.
+
+JWTAuthentication consulta la tabla de usuarios en cada petición autenticada.
+CachedJWTAuthentication guarda en la caché 'auth' (CACHE_TTL_AUTH segundos) los
+campos del usuario salvo UNCACHED_USER_FIELDS (nunca el hash de la contraseña)
+y solo va a la base de datos si no están. request.user es un User con esos
+campos diferidos, como con .defer(): serializar el perfil no cuesta consultas,
+leer un campo diferido carga uno solo y save() guarda solo los cargados. La
+entrada se borra al guardar o eliminar el usuario (apps/users/signals.py).
+
+Los tokens llevan el claim 'ver' con User.token_version: cambiar la contraseña
+o desactivar la cuenta incrementa la versión y los tokens anteriores dejan de
+valer (los emitidos antes de existir el claim cuentan como versión 0).
+"""
+from django.db import router, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.core.cache import get_cache
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+# Campos que no van a la caché: el hash de la contraseña (la caché puede ser de ficheros) y
+# last_login, que se actualiza con UPDATE directo sin invalidar la entrada
+UNCACHED_USER_FIELDS = ('password', 'last_login')
+
+cache = get_cache('auth')
+
+
+def user_cache_key(user_id):
+    return f'user-fields:{user_id}'  # 'user:' guardaba el User entero; esas entradas caducan solas
+
+
+def invalidate_cached_user(user_id):
+    """
+    Borra el usuario de la caché ahora y otra vez al confirmarse la transacción,
+    por si otra petición lo volvió a cachear con los datos anteriores entretanto.
+    """
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def check_token_version(token, user):
+    """Los tokens emitidos antes del último cambio de contraseña o desactivación ya no valen."""
+    if token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+        raise AuthenticationFailed("El token ya no es válido para este usuario.", code='token_revoked')
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        key = user_cache_key(validated_token.get(api_settings.USER_ID_CLAIM))
+        fields = cache.get(key)
+        if fields is None:
+            # Sin claim de usuario, inexistente o inactivo: los errores de JWTAuthentication
+            user = super().get_user(validated_token)
+            fields = {f.attname: getattr(user, f.attname) for f in self.user_model._meta.concrete_fields
+                      if f.attname not in UNCACHED_USER_FIELDS}
+            cache.set(key, fields)
+        # Instancia sin la contraseña: ni el hash ni su original (FieldTrackerMixin) quedan en memoria.
+        # from_db espera los valores en el orden de los campos del modelo
+        names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in fields]
+        user = self.user_model.from_db(router.db_for_read(self.user_model), names, [fields[name] for name in names])
+        if not user.is_active:
+            raise AuthenticationFailed("El usuario está inactivo.", code='user_inactive')
+        check_token_version(validated_token, user)
+        return user
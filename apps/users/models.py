@@ -6,10 +6,11 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 
+from apps.core.tracking import FieldTrackerMixin
 from .managers import CustomUserManager  # Importa el manager personalizado
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(FieldTrackerMixin, AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(_('email address'), unique=True)
     first_name = models.CharField(_('first name'), max_length=150, blank=True)
@@ -22,15 +23,27 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=False)  # Inactivo hasta verificar email
     date_joined = models.DateTimeField(default=timezone.now)
+    # Va en el claim 'ver' de los JWT: al incrementarse, los tokens emitidos antes dejan de valer
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']  # Campos requeridos al crear superuser
 
     objects = CustomUserManager()  # Usa el manager personalizado
 
+    tracked_fields = ('password', 'is_active')
+
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        # Cambiar la contraseña o desactivar la cuenta revoca los JWT ya emitidos
+        if not self._state.adding and (self.has_changed('password') or (self.has_changed('is_active') and not self.is_active)):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
 
@@ -1,7 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import TOKEN_VERSION_CLAIM, check_token_version
 
 User = get_user_model()
 
@@ -60,4 +67,44 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
     def validate(self, attrs):
         if attrs['password'] != attrs['password2']:
             raise serializers.ValidationError({"password": "Password fields didn't match."})
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Login JWT: añade la versión de token del usuario (claim 'ver') y actualiza
+    last_login como mucho una vez cada LAST_LOGIN_UPDATE_INTERVAL, con un
+    UPDATE directo en lugar de guardar el usuario en cada login.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        now = timezone.now()
+        last_login = self.user.last_login
+        if last_login is None or now - last_login >= settings.LAST_LOGIN_UPDATE_INTERVAL:
+            User.objects.filter(pk=self.user.pk).update(last_login=now)
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresco JWT: rechaza los refresh tokens con una versión (claim 'ver') que ya
+    no es la del usuario, como CachedJWTAuthentication con los access tokens. Sin
+    esto, un refresh token anterior al cambio de contraseña seguiría dando access
+    tokens nuevos (que heredan su 'ver' y fallarían después en cada petición).
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).only('token_version').first()
+        if user is None:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        check_token_version(refresh, user)
+        return super().validate(attrs)
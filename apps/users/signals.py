@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Cualquier cambio en el usuario (datos, permisos, contraseña) invalida su entrada en la caché de autenticación."""
+    invalidate_cached_user(instance.pk)
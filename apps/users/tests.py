@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import TOKEN_VERSION_CLAIM, UNCACHED_USER_FIELDS, cache, user_cache_key
+from .serializers import UserSerializer
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="cliente@example.com", password="Secreta123!",
+                                             first_name="Cliente", last_name="Prueba", is_active=True)
+        cache.delete(user_cache_key(self.user.pk))
+        self.addCleanup(cache.delete, user_cache_key(self.user.pk))
+
+    def refresh_token(self):
+        refresh = RefreshToken.for_user(self.user)
+        refresh[TOKEN_VERSION_CLAIM] = self.user.token_version
+        return refresh
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh_token().access_token}')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return len(queries), response
+
+    def test_cache_never_holds_the_password(self):
+        self.authenticate()
+        self.count_queries('/api/users/profile/')  # Llena la caché
+        cached = cache.get(user_cache_key(self.user.pk))
+        self.assertFalse(set(UNCACHED_USER_FIELDS) & set(cached))
+        self.assertNotIn(self.user.password, repr(cached))
+
+        # Con la entrada en caché el perfil sale sin consultas y request.user no trae la contraseña
+        queries, response = self.count_queries('/api/users/profile/')
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.data['first_name'], "Cliente")
+        request_user = response.wsgi_request.user
+        self.assertEqual(request_user.get_deferred_fields(), set(UNCACHED_USER_FIELDS))
+        self.assertNotIn('password', request_user._original_values)
+        with self.assertNumQueries(0):
+            UserSerializer(request_user).data
+
+    def test_my_cart_saves_the_user_query(self):
+        self.authenticate()
+        self.count_queries('/api/orders/cart/my-cart/')  # Crea el carrito
+        cache.delete(user_cache_key(self.user.pk))
+        uncached, _ = self.count_queries('/api/orders/cart/my-cart/')  # Como JWTAuthentication: lee el usuario
+        cached, _ = self.count_queries('/api/orders/cart/my-cart/')
+        self.assertEqual(cached, uncached - 1)
+        self.assertEqual(cached, 3)  # Id del carrito + carrito + líneas con sus productos
+
+    def test_refresh_rejects_token_older_than_password_change(self):
+        refresh = self.refresh_token()
+        self.user.set_password("OtraSecreta456!")
+        self.user.save()
+
+        response = self.client.post('/api/users/login/refresh/', {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post('/api/users/login/refresh/', {'refresh': str(self.refresh_token())}, format='json')
+        self.assertEqual(response.status_code, 200)
@@ -1,14 +1,14 @@
 import os
 import traceback # Importar para mejor debugging si es necesario
 
-from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 
+from apps.mailer.outbox import aqueue_mail, queue_mail
+from apps.mailer.rendering import render_email
 
-def send_verification_email(user, token_obj):
-    """Envía el email de verificación al usuario usando plantilla HTML."""
+
+def build_verification_email(user, token_obj):
+    """Argumentos de queue_mail para el email de verificación (plantillas de texto plano y HTML)."""
     subject = f"Verifica tu cuenta en {os.getenv('RESTAURANT_NAME', 'Nuestro Restaurante')}"
     frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:3000')
     verification_url = f"{frontend_url}/verify-email/{token_obj.token}/"
@@ -19,40 +19,53 @@ def send_verification_email(user, token_obj):
         'restaurant_name': os.getenv('RESTAURANT_NAME', 'Nuestro Restaurante')
     }
 
+    plain_message, html_message = render_email('verify_email', context)
+
+    # ---- AÑADIR ESTAS LÍNEAS PARA DEBUG ----
+    print("--- DEBUG EMAIL CONTENT ---")
+    print(f"Subject Type: {type(subject)}, Content: {subject!r}") # !r muestra repr()
+    print(f"Plain Message Type: {type(plain_message)}, Snippet: {plain_message[:100]!r}...") # Primeros 100 chars
+    # print(f"HTML Message Type: {type(html_message)}") # El HTML suele ser largo
+    print("---------------------------")
+    # ---- FIN DEBUG ----
+
+    return {
+        'subject': subject,
+        'message': plain_message,
+        'from_email': settings.DEFAULT_FROM_EMAIL,
+        'recipient_list': [user.email],
+        'html_message': html_message,
+    }
+
+
+def send_verification_email(user, token_obj):
+    """Envía (vía la bandeja de salida) el email de verificación al usuario usando plantilla HTML."""
     try:
-        html_message = render_to_string('emails/verify_email.html', context)
-        plain_message = strip_tags(html_message)
-
-        # ---- AÑADIR ESTAS LÍNEAS PARA DEBUG ----
-        print("--- DEBUG EMAIL CONTENT ---")
-        print(f"Subject Type: {type(subject)}, Content: {subject!r}") # !r muestra repr()
-        print(f"Plain Message Type: {type(plain_message)}, Snippet: {plain_message[:100]!r}...") # Primeros 100 chars
-        # print(f"HTML Message Type: {type(html_message)}") # El HTML suele ser largo
-        print("---------------------------")
-        # ---- FIN DEBUG ----
-
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-            html_message=html_message
-        )
-        print(f"Email de verificación (HTML) enviado exitosamente a {user.email}")
+        queue_mail(**build_verification_email(user, token_obj))
+        print(f"Email de verificación (HTML) encolado para {user.email}")
         return True
 
     except Exception as e:
-        print(f"ERROR al enviar email de verificación a {user.email}: {e}")
+        print(f"ERROR al encolar email de verificación a {user.email}: {e}")
         # import traceback # Descomenta para ver error completo
         # print(traceback.format_exc())
         return False
 
 
-def send_password_reset_email(user, token_obj):
-    """
-    Envía el email de reseteo de contraseña al usuario usando la plantilla HTML.
-    """
+async def asend_verification_email(user, token_obj):
+    """Como send_verification_email, para las vistas asíncronas."""
+    try:
+        await aqueue_mail(**build_verification_email(user, token_obj))
+        print(f"Email de verificación (HTML) encolado para {user.email}")
+        return True
+
+    except Exception as e:
+        print(f"ERROR al encolar email de verificación a {user.email}: {e}")
+        return False
+
+
+def build_password_reset_email(user, token_obj):
+    """Argumentos de queue_mail para el email de reseteo de contraseña."""
     subject = f"Restablecimiento de contraseña para {os.getenv('RESTAURANT_NAME', 'Nuestro Restaurante')}"
     frontend_url = os.getenv('FRONTEND_URL', 'http://localhost:5173')
     # Construir la URL completa de reseteo que el frontend manejará
@@ -65,30 +78,45 @@ def send_password_reset_email(user, token_obj):
         'restaurant_name': os.getenv('RESTAURANT_NAME', 'Nuestro Restaurante')
     }
 
+    # Renderizar las plantillas de texto plano y HTML
+    plain_message, html_message = render_email('reset_password', context)
+    return {
+        'subject': subject,
+        'message': plain_message,
+        'from_email': settings.DEFAULT_FROM_EMAIL,
+        'recipient_list': [user.email],
+        'html_message': html_message,
+    }
+
+
+def send_password_reset_email(user, token_obj):
+    """
+    Envía (vía la bandeja de salida) el email de reseteo de contraseña al usuario usando la plantilla HTML.
+    """
     try:
-        # Renderizar la plantilla HTML
-        html_message = render_to_string('emails/reset_password.html', context)
-        # Crear versión de texto plano
-        plain_message = strip_tags(html_message)
-
-        # Enviar el correo
-        send_mail(
-            subject=subject,
-            message=plain_message, # Texto plano
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False, # Lanza errores
-            html_message=html_message # Versión HTML
-        )
+        # Encolar el correo (lo entrega send_outbox, con reintentos)
+        queue_mail(**build_password_reset_email(user, token_obj))
         # Log de éxito
-        print(f"Email de reseteo de contraseña (HTML) enviado exitosamente a {user.email}")
+        print(f"Email de reseteo de contraseña (HTML) encolado para {user.email}")
         return True # Éxito
 
     except Exception as e:
         # Loggear el error
-        print(f"ERROR al enviar email de reseteo de contraseña a {user.email}: {e}")
+        print(f"ERROR al encolar email de reseteo de contraseña a {user.email}: {e}")
         # Opcional: Imprimir traceback completo
         # print("--- Traceback Completo del Error de Email ---")
         # print(traceback.format_exc())
         # print("--------------------------------------------")
-        return False # Error
\ No newline at end of file
+        return False # Error
+
+
+async def asend_password_reset_email(user, token_obj):
+    """Como send_password_reset_email, para las vistas asíncronas."""
+    try:
+        await aqueue_mail(**build_password_reset_email(user, token_obj))
+        print(f"Email de reseteo de contraseña (HTML) encolado para {user.email}")
+        return True
+
+    except Exception as e:
+        print(f"ERROR al encolar email de reseteo de contraseña a {user.email}: {e}")
+        return False
@@ -1,4 +1,6 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
 from django.utils import timezone
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
@@ -8,10 +10,18 @@ from .serializers import (
     UserSerializer,
     PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer,
+    CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
 )
 from .models import VerificationToken
-from .utils import send_verification_email, send_password_reset_email
+from .utils import (
+    send_verification_email,
+    send_password_reset_email,
+    asend_verification_email,
+    asend_password_reset_email,
+)
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from apps.core.asyncviews import AsyncAPIView
 
 User = get_user_model()
 
@@ -28,6 +38,19 @@ class UserRegistrationView(generics.CreateAPIView):
         send_verification_email(user, token)
 
 
+class AsyncUserRegistrationView(AsyncAPIView):
+    """Variante asíncrona de UserRegistrationView (ASYNC_VIEWS)."""
+
+    async def post(self, request, *args, **kwargs):
+        serializer = UserRegistrationSerializer(data=self.get_data(request))
+        # El email único se valida contra la base de datos y create_user hashea la contraseña
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        user = await sync_to_async(serializer.save)()
+        token = await VerificationToken.objects.acreate(user=user, purpose='VERIFY')
+        await asend_verification_email(user, token)
+        return JsonResponse(serializer.data, status=status.HTTP_201_CREATED)
+
+
 # apps/users/views.py - Modificar la clase VerifyEmailView
 
 class VerifyEmailView(views.APIView):
@@ -80,12 +103,10 @@ class VerifyEmailView(views.APIView):
 
 # Usaremos las vistas de SimpleJWT para login y refresh
 class CustomTokenObtainPairView(TokenObtainPairView):
-    # Puedes personalizar el serializer aquí si necesitas añadir más datos al token
-    # serializer_class = MyTokenObtainPairSerializer
-    pass
+    serializer_class = CustomTokenObtainPairSerializer
 
 class CustomTokenRefreshView(TokenRefreshView):
-    pass
+    serializer_class = CustomTokenRefreshSerializer
 
 
 class PasswordResetRequestView(generics.GenericAPIView):
@@ -113,6 +134,26 @@ class PasswordResetRequestView(generics.GenericAPIView):
             return Response({"error": "No se pudo procesar la solicitud."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class AsyncPasswordResetRequestView(AsyncAPIView):
+    """Variante asíncrona de PasswordResetRequestView (ASYNC_VIEWS)."""
+
+    async def post(self, request, *args, **kwargs):
+        serializer = PasswordResetRequestSerializer(data=self.get_data(request))
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        email = serializer.validated_data['email']
+        try:
+            user = await User.objects.aget(email=email)
+            await VerificationToken.objects.filter(user=user, purpose='RESET', used=False).aupdate(used=True)
+            token = await VerificationToken.objects.acreate(user=user, purpose='RESET')
+            await asend_password_reset_email(user, token)
+            return JsonResponse({"message": "Se ha enviado un enlace de restablecimiento de contraseña a tu correo."}, status=status.HTTP_200_OK)
+        except User.DoesNotExist:
+            return JsonResponse({"error": "Usuario no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            print(f"Error en AsyncPasswordResetRequestView: {e}")
+            return JsonResponse({"error": "No se pudo procesar la solicitud."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class PasswordResetConfirmView(generics.GenericAPIView):
     serializer_class = PasswordResetConfirmSerializer
     permission_classes = [AllowAny]
@@ -0,0 +1,19 @@
+# restaurant_backend/restaurant_backend/asgi.py
+
+"""
+ASGI config for restaurant_backend project.
+
+Alternativa al despliegue WSGI (restaurant_backend.service con gunicorn):
+restaurant_backend_asgi.service sirve este módulo con uvicorn y ASYNC_VIEWS=True.
+En ese modo las vistas con E/S (registro, reseteo de contraseña, contacto,
+chatbot, descarga de facturas) son asíncronas y los streams de
+/api/orders/events/ esperan sin ocupar un hilo por conexión. Los emails no
+se envían en la petición: se encolan y los entrega send_outbox (apps.mailer).
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'restaurant_backend.settings')
+
+application = get_asgi_application()
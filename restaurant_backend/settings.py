@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
     'apps.contact.apps.ContactConfig',
     'apps.delivery.apps.DeliveryConfig',
     'apps.invoices.apps.InvoicesConfig',
+    'apps.jobs.apps.JobsConfig',
+    'apps.mailer.apps.MailerConfig',
+    'apps.core.apps.CoreConfig',
 ]
 
 MIDDLEWARE = [
@@ -80,6 +84,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'restaurant_backend.wsgi.application'
+ASGI_APPLICATION = 'restaurant_backend.asgi.application'
+# True al servir con uvicorn (restaurant_backend_asgi.service): registro, contacto, chatbot,
+# reseteo de contraseña y descarga de facturas usan sus variantes asíncronas (apps/core/asyncviews.py)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False') == 'True'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -95,6 +103,15 @@ DATABASES = {
     }
 }
 
+# Con SQLite la BD de tests va a un fichero: la de memoria compartida bloquea tablas
+# enteras y los tests con varios hilos (apps/orders/tests.py) fallarían en lugar de
+# esperar. Cada conexión espera hasta 20 s a que se libere la escritura, y las
+# transacciones la reservan al empezar (IMMEDIATE): si una transacción pasa de leer
+# a escribir, SQLite no espera y falla directamente con 'database is locked'.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = {'timeout': 20, 'transaction_mode': 'IMMEDIATE'}
+    DATABASES['default']['TEST'] = {'NAME': os.getenv('DB_TEST_NAME', os.path.join(BASE_DIR, 'test_db.sqlite3'))}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -159,10 +176,55 @@ SESSION_COOKIE_SECURE = not DEBUG
 CSRF_COOKIE_SAMESITE = 'Lax'
 SESSION_COOKIE_SAMESITE = 'Lax'
 
+# Caché (ver apps/core/cache.py)
+# CACHE_BACKEND: 'locmem' (por proceso, desarrollo), 'file' (compartida entre los
+# workers de una máquina) o 'redis' (compartida entre máquinas, requiere redis-py)
+CACHE_BACKENDS = {
+    'locmem': 'apps.core.backends.InstrumentedLocMemCache',
+    'file': 'apps.core.backends.InstrumentedFileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+# Espacios de nombres y su TTL por defecto en segundos
+CACHE_NAMESPACES = {
+    'default': int(os.getenv('CACHE_TTL_DEFAULT', 300)),
+    'menu': int(os.getenv('CACHE_TTL_MENU', 300)),
+    'sessions': int(os.getenv('CACHE_TTL_SESSIONS', 60 * 60 * 24 * 14)),  # = SESSION_COOKIE_AGE
+    'ratelimit': int(os.getenv('CACHE_TTL_RATELIMIT', 3600)),
+    'documents': int(os.getenv('CACHE_TTL_DOCUMENTS', 60 * 60 * 24)),
+    'auth': int(os.getenv('CACHE_TTL_AUTH', 60)),  # Usuarios autenticados por JWT (apps/users/authentication.py)
+}
+
+
+def build_caches(backend):
+    """Construye CACHES con un alias por espacio de nombres sobre el backend elegido."""
+    file_dir = os.getenv('CACHE_FILE_DIR', os.path.join(BASE_DIR, '.cache'))
+    caches = {}
+    for alias, timeout in CACHE_NAMESPACES.items():
+        config = {
+            'BACKEND': CACHE_BACKENDS[backend],
+            'KEY_PREFIX': f"{os.getenv('CACHE_KEY_PREFIX', 'restaurant')}:{alias}",
+            'VERSION': int(os.getenv('CACHE_VERSION', 1)),  # Incrementar para invalidar toda la caché
+            'TIMEOUT': timeout,
+        }
+        if backend == 'redis':
+            config['LOCATION'] = os.getenv('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/1')
+        else:
+            config['LOCATION'] = os.path.join(file_dir, alias) if backend == 'file' else f'restaurant-{alias}'
+            config['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 1000))}
+        caches[alias] = config
+    return caches
+
+
+CACHES = build_caches(os.getenv('CACHE_BACKEND', 'locmem'))
+
+# Sesiones (admin): caché con respaldo en base de datos
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
 # Django REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',  # JWTAuthentication con el usuario en caché
         # Puedes añadir SessionAuthentication si también usas el admin de Django
         # 'rest_framework.authentication.SessionAuthentication',
     ),
@@ -180,7 +242,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_LIFETIME_DAYS', 7))),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': False,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,  # Lo actualiza CustomTokenObtainPairSerializer, como mucho cada LAST_LOGIN_UPDATE_INTERVAL
 
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -207,6 +269,9 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),  # No aplica si ROTATE_REFRESH_TOKENS=False
 }
 
+# Intervalo mínimo entre escrituras de last_login al iniciar sesión (apps/users/serializers.py)
+LAST_LOGIN_UPDATE_INTERVAL = timedelta(minutes=int(os.getenv('LAST_LOGIN_UPDATE_INTERVAL_MINUTES', 15)))
+
 # Email Settings (configuradas desde .env)
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND',
                           'django.core.mail.backends.console.EmailBackend')  # Console para debug si no hay .env
@@ -215,6 +280,7 @@ EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 30))  # Segundos; una conexión colgada no bloquea el sender (apps.mailer)
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
 RESTAURANT_CONTACT_EMAIL = os.getenv('RESTAURANT_CONTACT_EMAIL')  # Para recibir mensajes de contacto
 
@@ -223,6 +289,8 @@ CORS_ALLOW_ALL_ORIGINS = os.getenv('CORS_ALLOW_ALL_ORIGINS', 'False') == 'True'
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') if not CORS_ALLOW_ALL_ORIGINS else []
 # Opcional: Si necesitas enviar cookies/auth headers
 CORS_ALLOW_CREDENTIALS = True
+# Cabeceras propias de la API además de las de django-cors-headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-match')
 
 
 # Swagger/Redoc Settings
@@ -245,6 +313,99 @@ REDOC_SETTINGS = {
 # Límite de tiempo para cancelar pedidos (en minutos)
 ORDER_CANCELLATION_LIMIT_MINUTES = int(os.getenv('ORDER_CANCELLATION_LIMIT_MINUTES', 30))
 
+# Precio del carrito (apps/orders/pricing.py)
+CART_TAX_RATE = os.getenv('CART_TAX_RATE', '0')  # Los precios del menú ya incluyen IVA
+CART_DELIVERY_FEE = os.getenv('CART_DELIVERY_FEE', '0')
+
+# Números de pedido (apps/orders/numbering.py)
+# Worker id 0-1023; si no se define se deriva de la máquina y el pid
+ORDER_NUMBER_WORKER_ID = int(os.environ['ORDER_NUMBER_WORKER_ID']) if os.getenv('ORDER_NUMBER_WORKER_ID') else None
+ORDER_NUMBER_EPOCH_MS = 1735689600000  # 2025-01-01T00:00:00Z, no cambiar una vez en producción
+ORDER_NUMBER_MAX_ATTEMPTS = 5
+
+# Capacidad de cocina para pedidos programados (apps/orders/slots.py)
+# Franjas de KITCHEN_SLOT_MINUTES entre la apertura y el cierre (hora local, TIME_ZONE)
+KITCHEN_SLOT_MINUTES = int(os.getenv('KITCHEN_SLOT_MINUTES', 15))
+KITCHEN_SLOT_CAPACITY = int(os.getenv('KITCHEN_SLOT_CAPACITY', 10))  # Pedidos por franja (ajustable por franja en el admin)
+KITCHEN_OPENING_TIME = os.getenv('KITCHEN_OPENING_TIME', '12:00')
+KITCHEN_CLOSING_TIME = os.getenv('KITCHEN_CLOSING_TIME', '23:00')
+
+# Los pedidos programados pasan a PROCESSING estos minutos antes de su hora (release_scheduled_orders)
+SCHEDULED_ORDER_LEAD_MINUTES = int(os.getenv('SCHEDULED_ORDER_LEAD_MINUTES', 45))
+
+# Canal en vivo de pedidos (/api/orders/events/, apps/orders/events.py)
+ORDER_EVENTS_POLL_SECONDS = float(os.getenv('ORDER_EVENTS_POLL_SECONDS', 2))  # Consulta a la BD si no hay aviso del hub
+ORDER_EVENTS_KEEPALIVE_SECONDS = 15
+ORDER_EVENTS_STREAM_SECONDS = int(os.getenv('ORDER_EVENTS_STREAM_SECONDS', 300))  # Luego el cliente se reconecta
+# Streams simultáneos por proceso WSGI (cada uno retiene un hilo de gunicorn); en producción el
+# canal lo sirve restaurant_backend_events.service (ASGI), sin este límite
+ORDER_EVENTS_WSGI_MAX_STREAMS = int(os.getenv('ORDER_EVENTS_WSGI_MAX_STREAMS', 2))
+# Tiempo que un stream espera un id de evento aún sin confirmar antes de darlo por deshecho
+ORDER_EVENTS_COMMIT_GRACE_SECONDS = float(os.getenv('ORDER_EVENTS_COMMIT_GRACE_SECONDS', 30))
+ORDER_EVENTS_TICKET_SECONDS = int(os.getenv('ORDER_EVENTS_TICKET_SECONDS', 60))  # Validez del ?ticket= de EventSource
+ORDER_EVENT_RETENTION_HOURS = int(os.getenv('ORDER_EVENT_RETENTION_HOURS', 48))  # purge_order_events
+
+# Respuestas guardadas para la cabecera Idempotency-Key (apps/core/idempotency.py)
+# Los reintentos con la misma clave dentro de este plazo reciben la respuesta original
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+# Una petición IN_PROGRESS más antigua se da por abandonada (worker caído) y la retoma el siguiente
+# reintento. Debe superar el timeout de los workers (30 s en gunicorn)
+IDEMPOTENCY_LOCK_TIMEOUT_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT_SECONDS', 60))
+
+# Snapshot del menú completo (/api/menu/snapshot/), cacheado en el espacio 'menu' (CACHE_TTL_MENU)
+# max-age enviado a clientes y nginx; después revalidan con If-None-Match
+MENU_SNAPSHOT_MAX_AGE = int(os.getenv('MENU_SNAPSHOT_MAX_AGE', 60))
+
 # Nombre y dirección del restaurante para facturas
 RESTAURANT_NAME = os.getenv('RESTAURANT_NAME', 'Mi Restaurante')
 RESTAURANT_ADDRESS = os.getenv('RESTAURANT_ADDRESS', 'Dirección no configurada')
+# Ubicación del restaurante: punto de recogida para el reparto automático
+RESTAURANT_LATITUDE = float(os.getenv('RESTAURANT_LATITUDE', 40.4168))
+RESTAURANT_LONGITUDE = float(os.getenv('RESTAURANT_LONGITUDE', -3.7038))
+
+# Reparto automático (apps/delivery/dispatch.py)
+DELIVERY_MAX_ACTIVE_ORDERS = int(os.getenv('DELIVERY_MAX_ACTIVE_ORDERS', 3))  # Pedidos simultáneos por repartidor
+DELIVERY_LOAD_PENALTY_KM = float(os.getenv('DELIVERY_LOAD_PENALTY_KM', 2.0))  # Cada pedido en curso "cuesta" como estos km
+DELIVERY_INDEX_TTL_SECONDS = int(os.getenv('DELIVERY_INDEX_TTL_SECONDS', 30))  # Recarga del índice de repartidores
+
+# Almacén de facturas PDF (direccionado por contenido, ver apps/invoices/storage.py)
+INVOICE_STORAGE_ROOT = os.path.join(MEDIA_ROOT, 'invoices')
+# Incrementar al cambiar el diseño de la factura para que se vuelvan a renderizar
+INVOICE_RENDER_VERSION = 1
+# Si se define (ej: '/protected/invoices/'), nginx sirve los PDFs vía X-Accel-Redirect
+INVOICE_X_ACCEL_REDIRECT_PREFIX = os.getenv('INVOICE_X_ACCEL_REDIRECT_PREFIX', '')
+# Exportación masiva de facturas: procesos de renderizado (0 = uno por CPU) y pedidos por lote
+INVOICE_EXPORT_WORKERS = int(os.getenv('INVOICE_EXPORT_WORKERS', 0))
+INVOICE_EXPORT_CHUNK_SIZE = int(os.getenv('INVOICE_EXPORT_CHUNK_SIZE', 200))
+# Exportaciones simultáneas por proceso web (comparten el pool); el resto recibe 503
+INVOICE_EXPORT_MAX_CONCURRENT = int(os.getenv('INVOICE_EXPORT_MAX_CONCURRENT', 1))
+
+# Cola de trabajos en segundo plano (apps.jobs)
+# DatabaseBackend: los trabajos se guardan en la BD y los procesa `python manage.py run_jobs`.
+# EagerBackend: se ejecutan en el mismo proceso al encolarlos (tests/desarrollo).
+JOB_QUEUE = {
+    'BACKEND': os.getenv('JOB_QUEUE_BACKEND', 'apps.jobs.backends.DatabaseBackend'),
+    'MAX_ATTEMPTS': int(os.getenv('JOB_QUEUE_MAX_ATTEMPTS', 5)),
+    'RETRY_BACKOFF_SECONDS': int(os.getenv('JOB_QUEUE_RETRY_BACKOFF_SECONDS', 30)),
+    'LOCK_TIMEOUT_SECONDS': 600,  # Trabajos RUNNING más antiguos se consideran abandonados
+}
+
+# Correo saliente (apps.mailer): todos los emails se guardan en OutboundEmail y los
+# envía `python manage.py send_outbox`, reutilizando una conexión SMTP por proveedor.
+# Cada proveedor puede tener su BACKEND y OPTIONS (host, port, username, password, use_tls...);
+# por defecto se usan EMAIL_BACKEND y EMAIL_*. RATE_PER_MINUTE=0 desactiva el límite.
+# CONNECTIONS > 1 envía cada lote por varias conexiones a la vez (apps/mailer/transport.py,
+# con aiosmtplib si está instalado).
+MAILER = {
+    'BATCH_SIZE': int(os.getenv('MAILER_BATCH_SIZE', 50)),
+    'MAX_ATTEMPTS': int(os.getenv('MAILER_MAX_ATTEMPTS', 5)),
+    'RETRY_BACKOFF_SECONDS': int(os.getenv('MAILER_RETRY_BACKOFF_SECONDS', 60)),
+    'LOCK_TIMEOUT_SECONDS': 600,  # Emails SENDING más antiguos se consideran abandonados
+    'RETENTION_DAYS': int(os.getenv('MAILER_RETENTION_DAYS', 30)),  # purge_outbox
+    'PROVIDERS': {
+        'default': {
+            'RATE_PER_MINUTE': int(os.getenv('MAILER_RATE_PER_MINUTE', 600)),
+            'CONNECTIONS': int(os.getenv('MAILER_CONNECTIONS', 1)),
+        },
+    },
+}
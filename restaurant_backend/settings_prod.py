@@ -27,6 +27,9 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 # Email y contacto
 RESTAURANT_CONTACT_EMAIL = os.getenv('RESTAURANT_CONTACT_EMAIL', 'admin@restaurant.com')
 
+# Caché compartida por los workers de gunicorn (fichero por defecto, o Redis con CACHE_BACKEND=redis)
+CACHES = build_caches(os.getenv('CACHE_BACKEND', 'file'))
+
 # Base de datos para producción (RDS)
 DATABASES = {
     'default': {
@@ -52,6 +55,9 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+INVOICE_STORAGE_ROOT = os.path.join(MEDIA_ROOT, 'invoices')
+# nginx sirve las facturas desde su location interna (ver nginx.conf)
+INVOICE_X_ACCEL_REDIRECT_PREFIX = os.getenv('INVOICE_X_ACCEL_REDIRECT_PREFIX', '/protected/invoices/')
 
 # Deshabilitamos S3 temporalmente
 # DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
@@ -84,6 +84,7 @@ urlpatterns = [
     path('api/contact/', include('apps.contact.urls')),
     path('api/delivery/', include('apps.delivery.urls')),
     path('api/invoices/', include('apps.invoices.urls')),
+    path('api/core/', include('apps.core.urls')),
     path('users/verify-email/<str:token>/', VerifyEmailView.as_view(), name='verify_email'),
 
     # Documentación API (Swagger/Redoc)